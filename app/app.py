@@ -1,7 +1,6 @@
 import base64
 import json
 import sys
-import tempfile
 from pathlib import Path
 
 import pandas as pd
@@ -11,8 +10,112 @@ import streamlit as st
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(PROJECT_ROOT))
 
-from src.inference import load_bundle, predict_texts  # noqa: E402
-from src.pipeline import run as run_pipeline  # noqa: E402
+from src.explain import explain_texts  # noqa: E402
+from src.inference import (  # noqa: E402
+    LongTextConfig,
+    PredictionCache,
+    load_bundle,
+    predict_texts,
+)
+from src.jobs import JobRunner, published_dirs  # noqa: E402
+from src.registry import RunRegistry, describe_run  # noqa: E402
+from src.triage import TriageFilter, TriageQueue  # noqa: E402
+
+
+# Artifacts are cached on (path, mtime, size): a rerun reuses the parsed
+# object until the pipeline rewrites the file, which changes the key.
+def _stamp(path: Path) -> tuple[int, int]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return (-1, -1)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@st.cache_resource
+def _registry() -> RunRegistry:
+    return RunRegistry(RUNS_DIR)
+
+
+@st.cache_resource
+def _job_runner() -> JobRunner:
+    # One runner per server process: reruns, refreshes and other sessions
+    # all see (and de-duplicate against) the same jobs. Finished runs are
+    # recorded in the registry, and a repeat of a recorded run is restored.
+    return JobRunner(registry=_registry())
+
+
+@st.fragment(run_every=1.0)
+def _job_status() -> None:
+    jobs = _job_runner().jobs()
+    if not jobs:
+        return
+    job = jobs[0]
+    snap = job.snapshot()
+    if job.active:
+        stage = snap["stage"] or "waiting for the worker"
+        st.progress(snap["progress"], text=f"Pipeline {snap['state']}: {stage}")
+        if snap["cancel_requested"]:
+            st.caption("Cancelling after the current stage...")
+        elif st.button("Cancel run", key=f"cancel_{job.id}"):
+            job.cancel()
+        return
+    if st.session_state.get("seen_job") != job.id:
+        st.session_state["seen_job"] = job.id
+        if snap["state"] == "done":
+            # Outputs were just published; rerun the page to pick them up.
+            st.rerun(scope="app")
+    if snap["state"] == "done":
+        st.success("Done! Outputs regenerated.")
+    elif snap["state"] == "failed":
+        st.error(f"Pipeline failed: {snap['error']}")
+    else:
+        st.warning("Pipeline run cancelled; previous outputs kept.")
+
+
+@st.cache_resource
+def _prediction_cache() -> PredictionCache:
+    return PredictionCache(max_entries=10_000)
+
+
+@st.cache_resource(max_entries=1, show_spinner="Loading model...")
+def _cached_bundle(path: str, stamp: tuple[int, int]) -> dict:
+    # Re-binding the prediction cache drops scores from the previous bundle.
+    return load_bundle(path, cache=_prediction_cache())
+
+
+@st.cache_data(max_entries=32)
+def _cached_json(path: str, stamp: tuple[int, int]) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+@st.cache_data(max_entries=32)
+def _cached_csv(path: str, stamp: tuple[int, int]) -> pd.DataFrame:
+    return pd.read_csv(path)
+
+
+@st.cache_data(max_entries=32)
+def _cached_png_b64(path: str, stamp: tuple[int, int]) -> str:
+    return base64.b64encode(Path(path).read_bytes()).decode("utf-8")
+
+
+@st.cache_data(max_entries=64)
+def _cached_curves(rid: str, stamp: tuple[int, int]) -> dict:
+    return _registry().curves(rid)
+
+
+@st.cache_resource(max_entries=2)
+def _triage_queue(path: str, stamp: tuple[int, int]) -> TriageQueue:
+    # Builds (or reopens) the column store; filtering and paging stay server-side.
+    return TriageQueue(path)
+
+
+def _load_json(path: Path) -> dict:
+    return _cached_json(str(path), _stamp(path)) if path.exists() else {}
+
+
+def _load_csv(path: Path) -> pd.DataFrame:
+    return _cached_csv(str(path), _stamp(path)) if path.exists() else pd.DataFrame()
 
 
 def _st_image_fixed(path: Path, caption: str, height_px: int = 340) -> None:
@@ -21,7 +124,7 @@ def _st_image_fixed(path: Path, caption: str, height_px: int = 340) -> None:
         st.warning(f"Missing figure: {path.name}")
         return
 
-    b64 = base64.b64encode(path.read_bytes()).decode("utf-8")
+    b64 = _cached_png_b64(str(path), _stamp(path))
     st.markdown(
         f"""
         <div style="border:1px solid rgba(49,51,63,0.15); border-radius:12px; padding:10px;">
@@ -43,6 +146,7 @@ st.caption(
 DEFAULT_INPUT = PROJECT_ROOT / "data" / "raw" / "ai_human_detection.csv"
 OUT_DIR = PROJECT_ROOT / "outputs"
 FIG_DIR = PROJECT_ROOT / "reports" / "figures"
+RUNS_DIR = PROJECT_ROOT / "runs"
 
 with st.sidebar:
     st.header("Pipeline")
@@ -50,41 +154,86 @@ with st.sidebar:
     input_path = st.text_input("Or CSV path", value=str(DEFAULT_INPUT))
     target_cov = st.slider("Target auto-decision coverage", 0.1, 0.95, 0.70, 0.05)
     calibration = st.selectbox("Calibration method", ["sigmoid", "isotonic"], index=0)
+    eval_mode = st.selectbox(
+        "Evaluation",
+        ["holdout", "temporal"],
+        help="temporal: train on rows before a time-column cutoff, test on rows after",
+    )
+    time_column, temporal_cutoff = "generation_date", ""
+    if eval_mode == "temporal":
+        time_column = st.text_input("Time column", value=time_column)
+        temporal_cutoff = st.text_input(
+            "Cutoff (blank: leave the test share after it)",
+            placeholder="2026-01-29 09:40",
+            help="Every label must occur before the cutoff, or the run fails",
+        )
+    abstention = st.selectbox(
+        "Abstention",
+        ["threshold", "conformal"],
+        help="conformal: split-conformal prediction sets; abstain unless one label remains",
+    )
+    conformal_alpha = (
+        st.slider("Conformal miscoverage α", 0.01, 0.3, 0.10, 0.01)
+        if abstention == "conformal"
+        else 0.1
+    )
+    route_languages = st.checkbox(
+        "Route by language",
+        help="Per-language word/char models for well-represented languages, global fallback",
+    )
     run_btn = st.button("Run / Refresh")
 
 effective_input = Path(input_path)
 if uploaded is not None:
-    tmp = Path(tempfile.mkdtemp(prefix="drrc_upload_")) / "uploaded.csv"
-    tmp.write_bytes(uploaded.getbuffer())
-    effective_input = tmp
+    # Stored once per content hash, so reruns and re-uploads reuse the same file.
+    effective_input = _registry().store_upload(uploaded.getvalue())
 
 if run_btn:
-    with st.spinner("Training + evaluating..."):
-        run_pipeline(
-            input_path=str(effective_input),
-            out_dir=str(OUT_DIR),
-            figures_dir=str(FIG_DIR),
-            calibration_method=str(calibration),
-            recommend_target_coverage=float(target_cov),
-        )
-    st.success("Done! Outputs regenerated.")
+    # Non-blocking: a click while the same run is in flight re-attaches to it.
+    _job_runner().submit(
+        input_path=str(effective_input),
+        out_dir=str(OUT_DIR),
+        figures_dir=str(FIG_DIR),
+        calibration_method=str(calibration),
+        recommend_target_coverage=float(target_cov),
+        eval_mode=str(eval_mode),
+        time_column=time_column.strip(),
+        temporal_cutoff=temporal_cutoff.strip() or None,
+        abstention=str(abstention),
+        conformal_alpha=float(conformal_alpha),
+        route_languages=bool(route_languages),
+    )
 
-metrics_path = OUT_DIR / "metrics_overall.json"
-policy_path = OUT_DIR / "abstention_policy.json"
-preds_path = OUT_DIR / "test_predictions.csv"
-curve_path = OUT_DIR / "coverage_curve.csv"
+with st.sidebar:
+    _job_status()
+
+# Dashboard runs are published as versions beside outputs/; CLI runs write it directly.
+LIVE_OUT, LIVE_FIG = published_dirs(OUT_DIR, FIG_DIR)
+
+metrics_path = LIVE_OUT / "metrics_overall.json"
+policy_path = LIVE_OUT / "abstention_policy.json"
+preds_path = LIVE_OUT / "test_predictions.csv"
+curve_path = LIVE_OUT / "coverage_curve.csv"
+rolling_path = LIVE_OUT / "rolling_metrics.csv"
 
 if not metrics_path.exists():
     st.info("Run the pipeline from the sidebar to generate the report card.")
     st.stop()
 
-metrics = json.loads(metrics_path.read_text(encoding="utf-8"))
-policy = json.loads(policy_path.read_text(encoding="utf-8")) if policy_path.exists() else {}
-preds = pd.read_csv(preds_path) if preds_path.exists() else pd.DataFrame()
-curve = pd.read_csv(curve_path) if curve_path.exists() else pd.DataFrame()
+metrics = _load_json(metrics_path)
+policy = _load_json(policy_path)
+curve = _load_csv(curve_path)
 
-tab_report, tab_curve, tab_triage, tab_notes = st.tabs(
-    ["Report Card", "Coverage Curve", "Triage UI", "Notes"]
+tab_report, tab_curve, tab_time, tab_triage, tab_queue, tab_runs, tab_notes = st.tabs(
+    [
+        "Report Card",
+        "Coverage Curve",
+        "Timeline",
+        "Triage UI",
+        "Review Queue",
+        "Compare Runs",
+        "Notes",
+    ]
 )
 
 with tab_report:
@@ -93,25 +242,50 @@ with tab_report:
     c2.metric("Macro F1 (test)", f'{metrics["macro_f1"]:.3f}')
     c3.metric("ECE (lower better)", f'{metrics["ece"]:.3f}')
     c4.metric("Brier (lower better)", f'{metrics["brier"]:.3f}')
+    conformal = metrics.get("conformal")
+    if conformal:
+        k1, k2, k3, k4 = st.columns(4)
+        k1.metric(
+            "Set coverage (test)",
+            f'{conformal["coverage"]:.3f}',
+            help=f'Target ≥ {conformal["target_coverage"]:.2f}',
+        )
+        k2.metric("Mean set size", f'{conformal["mean_set_size"]:.2f}')
+        k3.metric("Single-label rate", f'{conformal["singleton_rate"]:.3f}')
+        k4.metric("Single-label accuracy", f'{conformal["singleton_accuracy"]:.3f}')
+    routing = metrics.get("language_routing")
+    if routing:
+        st.subheader("Per-language calibration")
+        latency = routing["latency_ms_per_text"]
+        st.caption(
+            f"Own models: {', '.join(routing['languages']) or 'none'}; other languages use "
+            f"the global models. Router accuracy {routing['router_accuracy']:.3f}. "
+            f"Scoring {latency['routed']:.2f} ms/text routed vs {latency['global']:.2f} "
+            f"global ({routing['routing_overhead']:+.0%})."
+        )
+        st.dataframe(
+            pd.DataFrame.from_dict(routing["per_language"], orient="index"),
+            width="stretch",
+        )
 
     st.subheader("Figures")
 
     # Row 1
     r1 = st.columns(2, gap="large")
     with r1[0]:
-        _st_image_fixed(FIG_DIR / "confusion_matrix.png", "Confusion matrix", height_px=340)
+        _st_image_fixed(LIVE_FIG / "confusion_matrix.png", "Confusion matrix", height_px=340)
     with r1[1]:
         _st_image_fixed(
-            FIG_DIR / "coverage_vs_accuracy.png", "Coverage vs performance", height_px=340
+            LIVE_FIG / "coverage_vs_accuracy.png", "Coverage vs performance", height_px=340
         )
 
     # Row 2
     r2 = st.columns(2, gap="large")
     with r2[0]:
-        _st_image_fixed(FIG_DIR / "reliability_diagram.png", "Reliability diagram", height_px=340)
+        _st_image_fixed(LIVE_FIG / "reliability_diagram.png", "Reliability diagram", height_px=340)
     with r2[1]:
         _st_image_fixed(
-            FIG_DIR / "probability_histograms.png", "Confidence histogram", height_px=340
+            LIVE_FIG / "probability_histograms.png", "Confidence histogram", height_px=340
         )
 
     if policy:
@@ -129,9 +303,45 @@ with tab_curve:
     else:
         st.info("Coverage curve not found.")
 
+with tab_time:
+    st.subheader("Test metrics over time")
+    temporal = metrics.get("temporal")
+    rolling = _load_csv(rolling_path)
+    if not temporal or rolling.empty:
+        st.info(
+            "Run with **Evaluation: temporal** and a **Cutoff** in the sidebar (or "
+            "`--eval-mode temporal --temporal-cutoff ...`) to train on rows before the cutoff "
+            "and track the test rows after it over time. Labels that only occur after the "
+            "cutoff are never predicted, and the run fails if every test row carries one, as "
+            "the bundled data does at the default cutoff (2026-01-29 09:40 works)."
+        )
+    else:
+        thr = float(policy.get("recommended_threshold", 0.5))
+        st.caption(
+            f"Trained on rows before {temporal['cutoff']}; rolling window "
+            f"{temporal['window']}; coverage and covered accuracy at threshold {thr:.2f}."
+        )
+        temporal_split = _load_json(LIVE_OUT / "splits_summary.json").get("temporal", {})
+        if temporal_split.get("labels_missing_from_train"):
+            st.warning(
+                "Labels absent from the training period (never predicted): "
+                + ", ".join(temporal_split["labels_missing_from_train"])
+            )
+        timeline = rolling.assign(window_end=pd.to_datetime(rolling["window_end"]))
+        st.plotly_chart(
+            px.line(
+                timeline,
+                x="window_end",
+                y=["accuracy", "ece", "coverage", "covered_accuracy"],
+                hover_data=["n"],
+                markers=True,
+            ),
+            width="stretch",
+        )
+
 with tab_triage:
     st.subheader("Paste text → decision-safe output")
-    model_path = OUT_DIR / "model.joblib"
+    model_path = LIVE_OUT / "model.joblib"
     text = st.text_area("Text", height=180, placeholder="Paste or type text here...")
 
     if not model_path.exists():
@@ -140,8 +350,9 @@ with tab_triage:
             "sidebar (or run the pipeline) to generate `outputs/model.joblib`."
         )
     elif text.strip():
-        bundle = load_bundle(model_path)
-        result = predict_texts(bundle, [text])[0]
+        bundle = _cached_bundle(str(model_path), _stamp(model_path))
+        long_cfg = LongTextConfig()
+        result = predict_texts(bundle, [text], cache=_prediction_cache(), long_text=long_cfg)[0]
         thr = float(bundle["threshold"])
 
         col1, col2, col3 = st.columns(3)
@@ -157,14 +368,194 @@ with tab_triage:
             ),
             width="stretch",
         )
+        if "prediction_set" in result:
+            st.caption(
+                f"Prediction set: {{{', '.join(result['prediction_set'])}}}. Rule: abstain unless "
+                "the split-conformal set holds exactly one label "
+                f"(α = {bundle['conformal']['alpha']:.2f}). "
+                f"Models disagree: {result['disagree']}."
+            )
+        else:
+            st.caption(
+                f"Rule: abstain if confidence < {thr:.2f} OR "
+                f"(model disagreement and confidence < {min(0.99, thr + 0.05):.2f}). "
+                f"Models disagree: {result['disagree']}."
+            )
+        win = result["window"]
+        if win["windows"] > 1:
+            st.caption(
+                f"Long text ({win['chars']:,} chars): scored as {win['windows']} windows of "
+                f"{long_cfg.window_chars:,} chars ({win['chars_scored']:,} chars featurized)"
+                + (f", {win['chars_skipped']:,} chars not covered." if win["truncated"] else ".")
+            )
+
+        st.markdown("**Why this label**")
+        labels = list(result["probs"])
+        explain_label = st.selectbox(
+            "Evidence for class", labels, index=labels.index(result["pred_label"])
+        )
+        # Long texts: the length-weighted mean over the windows that were scored.
+        explanation = explain_texts(bundle, [text], top_k=10, long_text=long_cfg)[0]
+        cols = st.columns(2)
+        for col, (model_name, per_class) in zip(cols, explanation.items(), strict=True):
+            evidence = pd.DataFrame(per_class[explain_label], columns=["ngram", "contribution"])
+            col.caption(
+                f"{model_name} model"
+                + (" (primary)" if model_name == bundle["primary_name"] else "")
+            )
+            col.dataframe(evidence, hide_index=True, width="stretch")
         st.caption(
-            f"Rule: abstain if confidence < {thr:.2f} OR "
-            f"(model disagreement and confidence < {min(0.99, thr + 0.05):.2f}). "
-            f"Models disagree: {result['disagree']}."
+            "Contribution = TF-IDF weight × class coefficient, averaged over calibration "
+            "folds (decision-score units, before calibration). Only n-grams that push "
+            "towards the class are listed."
         )
     else:
         st.info("Paste some text to run the detector.")
 
+with tab_queue:
+    st.subheader("Review queue (test predictions)")
+    if not preds_path.exists():
+        st.info("Predictions not found. Run the pipeline to generate `test_predictions.csv`.")
+    else:
+        queue = _triage_queue(str(preds_path), _stamp(preds_path))
+        queue_thr = float(policy.get("recommended_threshold", 0.5))
+        yes_no = {"Any": None, "Yes": True, "No": False}
+
+        f = st.columns(4)
+        abstain_sel = f[0].selectbox("Abstain", list(yes_no))
+        disagree_sel = f[1].selectbox("Models disagree", list(yes_no))
+        label_sel = f[2].multiselect("True label", queue.slice_values("label"))
+        pred_sel = f[3].multiselect("Predicted label", queue.slice_values("pred_label"))
+
+        g = st.columns([2, 1, 1])
+        search = g[0].text_input("Search text", placeholder="case-insensitive substring")
+        slice_col = g[1].selectbox("Slice", ["(none)", *queue.slice_columns()])
+        slice_sel = g[2].multiselect(
+            "Slice values", queue.slice_values(slice_col) if slice_col != "(none)" else []
+        )
+
+        h = st.columns(3)
+        order = h[0].radio(
+            "Sort", ["Least confident first", "Most confident first"], horizontal=True
+        )
+        page_size = int(h[1].selectbox("Rows per page", [25, 50, 100, 200], index=1))
+        page_no = int(h[2].number_input("Page", min_value=1, value=1, step=1))
+
+        queue_filter = TriageFilter(
+            abstain=yes_no[abstain_sel],
+            disagree=yes_no[disagree_sel],
+            labels=tuple(label_sel),
+            pred_labels=tuple(pred_sel),
+            slice_column=None if slice_col == "(none)" else slice_col,
+            slice_values=tuple(slice_sel),
+            search=search,
+            least_confident_first=order == "Least confident first",
+        )
+        page_rows, total = queue.page(queue_filter, queue_thr, page_no - 1, page_size)
+        n_pages = max(1, -(-total // page_size))
+        abstain_rule = (
+            "abstain unless the conformal set holds one label"
+            if policy.get("mode") == "conformal"
+            else f"abstain threshold {queue_thr:.2f}"
+        )
+        st.caption(
+            f"{total:,} of {queue.n_rows:,} rows match · page {page_no} of {n_pages} · "
+            f"{abstain_rule}"
+        )
+        queue_model = LIVE_OUT / "model.joblib"
+        if queue_model.exists() and st.checkbox(
+            "Show top n-grams for abstained rows on this page", value=True
+        ):
+            abstained = page_rows.index[page_rows["abstain"]] if "abstain" in page_rows else []
+            page_rows["top_ngrams"] = ""
+            if len(abstained):
+                queue_bundle = _cached_bundle(str(queue_model), _stamp(queue_model))
+                explained = explain_texts(
+                    queue_bundle, page_rows.loc[abstained, "text"].tolist(), top_k=5
+                )
+                primary_name = queue_bundle["primary_name"]
+                page_rows.loc[abstained, "top_ngrams"] = [
+                    ", ".join(repr(term) for term, _ in ex[primary_name].get(pred, []))
+                    for ex, pred in zip(
+                        explained, page_rows.loc[abstained, "pred_label"], strict=True
+                    )
+                ]
+        st.dataframe(page_rows, hide_index=True, width="stretch")
+
+with tab_runs:
+    st.subheader("Stored runs side by side")
+    entries = _registry().entries()
+    if not entries:
+        st.info(
+            "No registered runs yet. Runs started from the sidebar are recorded "
+            "automatically; from the CLI add `--registry runs`."
+        )
+    else:
+        by_label = {describe_run(e): e for e in entries}
+        chosen = st.multiselect("Runs", list(by_label), default=list(by_label)[:2])
+        summary, coverage_rows, reliability_rows = [], [], []
+        for label in chosen:
+            entry = by_label[label]
+            rid = entry["run_id"]
+            summary.append(
+                {
+                    "run": rid,
+                    "input": entry["input_name"],
+                    **entry["config"],
+                    **entry["metrics"],
+                    "threshold": entry["recommended_threshold"],
+                    "est_coverage": entry["estimated_coverage"],
+                }
+            )
+            curves_path = _registry().run_dir(rid) / "curves.npz"
+            arrays = _cached_curves(rid, _stamp(curves_path))
+            coverage_rows.append(
+                pd.DataFrame(
+                    {
+                        "coverage": arrays["curve_coverage"],
+                        "accuracy": arrays["curve_accuracy"],
+                        "run": rid,
+                    }
+                )
+            )
+            reliability_rows.append(
+                pd.DataFrame(
+                    {
+                        "confidence": arrays["reliability_confidence"],
+                        "accuracy": arrays["reliability_accuracy"],
+                        "run": rid,
+                    }
+                )
+            )
+        if summary:
+            st.dataframe(pd.DataFrame(summary), hide_index=True)
+            r = st.columns(2, gap="large")
+            with r[0]:
+                st.markdown("**Coverage vs accuracy**")
+                st.plotly_chart(
+                    px.line(
+                        pd.concat(coverage_rows),
+                        x="coverage",
+                        y="accuracy",
+                        color="run",
+                        markers=True,
+                    ),
+                    width="stretch",
+                )
+            with r[1]:
+                st.markdown("**Reliability (confidence vs accuracy)**")
+                rel_fig = px.line(
+                    pd.concat(reliability_rows),
+                    x="confidence",
+                    y="accuracy",
+                    color="run",
+                    markers=True,
+                )
+                rel_fig.add_shape(
+                    type="line", x0=0, y0=0, x1=1, y1=1, line={"dash": "dash", "color": "gray"}
+                )
+                st.plotly_chart(rel_fig, width="stretch")
+
 with tab_notes:
     st.markdown("""
 ### Decision safety notes
@@ -0,0 +1,157 @@
+"""Post-hoc calibration of an already-fitted classifier on held-out scores.
+
+``CalibratedClassifierCV(cv=3)`` refits its base pipeline once per fold. The
+wrapper here instead takes a base estimator that is already fitted and learns
+only the score -> probability map from held-out (val) decision scores: either
+per-class sigmoid/isotonic maps (the same one-vs-rest + renormalize scheme as
+scikit-learn) or a single softmax temperature.
+"""
+
+from __future__ import annotations
+
+import warnings
+from typing import Any
+
+import numpy as np
+from scipy.optimize import minimize, minimize_scalar
+from scipy.special import expit, log_softmax, softmax
+from sklearn.isotonic import IsotonicRegression
+
+CALIBRATION_METHODS = ("sigmoid", "isotonic", "temperature")
+
+
+class SigmoidCalibration:
+    """Platt scaling ``p = expit(a * score + b)`` fitted on smoothed targets."""
+
+    def fit(self, scores: np.ndarray, target: np.ndarray) -> SigmoidCalibration:
+        s = np.asarray(scores, dtype=float)
+        t = np.asarray(target, dtype=float)
+        n_pos = float(t.sum())
+        n_neg = float(len(t) - n_pos)
+        # Platt's smoothed targets keep the fit finite on separable scores.
+        t = np.where(t > 0, (n_pos + 1.0) / (n_pos + 2.0), 1.0 / (n_neg + 2.0))
+
+        def loss(ab: np.ndarray) -> tuple[float, np.ndarray]:
+            z = ab[0] * s + ab[1]
+            err = expit(z) - t
+            return float(np.sum(np.logaddexp(0.0, z) - t * z)), np.array(
+                [float(err @ s), float(err.sum())]
+            )
+
+        x0 = np.array([0.0, np.log((n_pos + 1.0) / (n_neg + 1.0))])
+        res = minimize(loss, x0, jac=True, method="L-BFGS-B")
+        self.a_, self.b_ = float(res.x[0]), float(res.x[1])
+        return self
+
+    def predict(self, scores: np.ndarray) -> np.ndarray:
+        return expit(self.a_ * np.asarray(scores, dtype=float) + self.b_)
+
+
+class TemperatureScaling:
+    """Single temperature ``softmax(logits / T)`` fitted by held-out log loss."""
+
+    def fit(self, logits: np.ndarray, y_idx: np.ndarray) -> TemperatureScaling:
+        rows = np.arange(len(y_idx))
+
+        def nll(log_t: float) -> float:
+            return float(-log_softmax(logits / np.exp(log_t), axis=1)[rows, y_idx].mean())
+
+        res = minimize_scalar(nll, bounds=(-5.0, 5.0), method="bounded")
+        self.temperature_ = float(np.exp(res.x))
+        return self
+
+    def predict_proba(self, logits: np.ndarray) -> np.ndarray:
+        return softmax(logits / self.temperature_, axis=1)
+
+
+def _logits(scores: np.ndarray) -> np.ndarray:
+    # A binary decision function is the log-odds of the positive class.
+    return (
+        np.column_stack([np.zeros(len(scores)), scores[:, 0]]) if scores.shape[1] == 1 else scores
+    )
+
+
+def _as_2d(scores: np.ndarray) -> np.ndarray:
+    scores = np.asarray(scores, dtype=float)
+    return scores.reshape(-1, 1) if scores.ndim == 1 else scores
+
+
+class PrefitCalibratedClassifier:
+    """Calibrate a fitted classifier's ``decision_function`` on held-out data.
+
+    ``method`` is ``"sigmoid"``, ``"isotonic"`` or ``"temperature"``. The base
+    estimator is never refit; ``fit`` only scores the held-out rows and learns
+    the calibration map.
+
+    Held-out rows whose label is not in ``base.classes_`` (possible when labels
+    are encoded over more rows than train, e.g. a temporal split) have no logit
+    column, so temperature scaling drops them with a warning; the count is kept
+    in ``n_unknown_labels_``. The one-vs-rest maps keep them as negatives.
+    """
+
+    def __init__(self, base: Any, method: str = "sigmoid") -> None:
+        if method not in CALIBRATION_METHODS:
+            raise ValueError(f"Unknown calibration method: {method}")
+        self.base = base
+        self.method = method
+
+    @property
+    def classes_(self) -> np.ndarray:
+        return np.asarray(self.base.classes_)
+
+    def fit(self, X: Any, y: np.ndarray) -> PrefitCalibratedClassifier:
+        return self.fit_scores(self.base.decision_function(X), y)
+
+    def fit_scores(self, scores: np.ndarray, y: np.ndarray) -> PrefitCalibratedClassifier:
+        """Fit the calibration map from precomputed decision scores."""
+        scores = _as_2d(scores)
+        y = np.asarray(y)
+        classes = self.classes_
+        known = np.isin(y, classes)
+        self.n_unknown_labels_ = int((~known).sum())
+        self.calibrators_: list[Any] = []
+        if self.method == "temperature":
+            if not known.any():
+                raise ValueError(
+                    "Temperature scaling: no held-out label is among the model's classes."
+                )
+            if self.n_unknown_labels_:
+                unknown = ", ".join(map(str, np.unique(y[~known])))
+                warnings.warn(
+                    f"Temperature scaling: dropped {self.n_unknown_labels_} of {len(y)} "
+                    f"held-out rows with labels the model was not trained on ({unknown}).",
+                    stacklevel=2,
+                )
+            y_idx = np.searchsorted(classes, y[known])
+            self.calibrators_.append(TemperatureScaling().fit(_logits(scores[known]), y_idx))
+            return self
+        # Binary decision functions have one column, scoring the positive class.
+        positives = classes[1:] if scores.shape[1] == 1 else classes
+        for j, cls in enumerate(positives):
+            target = (y == cls).astype(float)
+            cal: Any
+            if self.method == "isotonic":
+                cal = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip")
+            else:
+                cal = SigmoidCalibration()
+            self.calibrators_.append(cal.fit(scores[:, j], target))
+        return self
+
+    def proba_from_scores(self, scores: np.ndarray) -> np.ndarray:
+        scores = _as_2d(scores)
+        if self.method == "temperature":
+            return self.calibrators_[0].predict_proba(_logits(scores))
+        proba = np.column_stack(
+            [cal.predict(scores[:, j]) for j, cal in enumerate(self.calibrators_)]
+        )
+        if proba.shape[1] == 1:
+            return np.column_stack([1.0 - proba[:, 0], proba[:, 0]])
+        denom = proba.sum(axis=1, keepdims=True)
+        uniform = np.full_like(proba, 1.0 / proba.shape[1])
+        return np.divide(proba, denom, out=uniform, where=denom > 0)
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        return self.proba_from_scores(self.base.decision_function(X))
+
+    def predict(self, X: Any) -> np.ndarray:
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
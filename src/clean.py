@@ -9,40 +9,53 @@ def _is_text_like(s: pd.Series) -> bool:
     return pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s)
 
 
-def clean_df(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-
-    # find text column
-    text_col = None
-    for c in out.columns:
+def detect_text_column(df: pd.DataFrame) -> str:
+    # A column named text/content/sentence, else the longest string column.
+    for c in df.columns:
         if c.lower() in {"text", "content", "sentence"}:
-            text_col = c
-            break
-    if text_col is None:
-        obj_cols = [c for c in out.columns if _is_text_like(out[c])]
-        if not obj_cols:
-            raise ValueError("No obvious text column found.")
-        lengths = {c: out[c].astype(str).str.len().mean() for c in obj_cols}
-        text_col = max(lengths, key=lambda c: lengths[c])
+            return c
+    obj_cols = [c for c in df.columns if _is_text_like(df[c])]
+    if not obj_cols:
+        raise ValueError(
+            "No obvious text column found: expected a text/content/sentence column or a "
+            f"string column, got {list(df.columns)}."
+        )
+    lengths = {c: df[c].astype(str).str.len().mean() for c in obj_cols}
+    return max(lengths, key=lambda c: lengths[c])
+
+
+def detect_columns(df: pd.DataFrame) -> tuple[str, str]:
+    text_col = detect_text_column(df)
 
     # find label column
     label_col = None
-    for c in out.columns:
+    for c in df.columns:
         if c.lower() in {"label", "class", "human_or_ai", "target"}:
             label_col = c
             break
     if label_col is None:
-        for c in out.columns:
+        for c in df.columns:
             if c == text_col:
                 continue
-            if _is_text_like(out[c]):
-                nun = out[c].nunique(dropna=True)
+            if _is_text_like(df[c]):
+                nun = df[c].nunique(dropna=True)
                 if 2 <= nun <= 6:
                     label_col = c
                     break
     if label_col is None:
         raise ValueError("No obvious label column found.")
+    return text_col, label_col
+
 
+def clean_df(
+    df: pd.DataFrame, text_col: str | None = None, label_col: str | None = None
+) -> pd.DataFrame:
+    # Explicit columns let chunked readers pin the detection done on the first
+    # chunk instead of re-running the heuristics on every chunk.
+    if text_col is None or label_col is None:
+        text_col, label_col = detect_columns(df)
+
+    out = df.copy()
     out = out.rename(columns={text_col: "text", label_col: "label"})
     out["text"] = out["text"].astype(str).fillna("").str.strip()
     out["label"] = out["label"].astype(str).str.strip().str.lower()
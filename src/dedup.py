@@ -0,0 +1,292 @@
+"""Near-duplicate detection with MinHash + LSH banding.
+
+The raw data contains many near-identical rows (e.g. repeated
+``Error: 400 Client Error ...`` API responses). Randomly splitting them puts
+copies in both train and test. ``NearDupIndex`` groups such rows into clusters
+so splits can be group-aware (or duplicates dropped).
+
+Cost is linear in the number of rows: every text is reduced to a fixed-size
+MinHash signature over character shingles, each signature is cut into bands,
+and candidate pairs are only rows whose band keys collide, never all pairs.
+Rows can be added chunk by chunk while the CSV is streamed.
+
+Each signature slot is the minimum of an independent 64-bit permutation of the
+shingle hashes (XOR with a random mask, then the splitmix64 finalizer, a
+bijection with full avalanche), so the 64 slots are 64 separate minhashes.
+Clusters are formed leader-first in row order: a row joins the earliest
+cluster root that shares one of its band buckets and whose Jaccard with it is
+at least ``threshold``, otherwise it starts a cluster. Every member is thus
+within the threshold of its root, and chains of pairwise links cannot pull
+unrelated texts together. With ``exact_jaccard`` (the default) the Jaccard is
+computed on the stored shingle sets; without it (used by the out-of-core mode,
+which cannot hold every row's shingles) it is the signature agreement.
+
+The stored shingles cost 8 bytes per distinct shingle (about one per
+character). Once an index holds more than ``exact_max_shingles`` of them
+(~256 MiB by default) it drops them and estimates Jaccard from signatures for
+every row; ``exact`` tells which applied. Rows are shingled ``_ADD_CHUNK`` at a
+time, so a large ``add`` holds no more. The clustering loop only visits rows
+that share a band bucket with a row of different content: repeats of a row
+take its root, and rows that collide with nobody are their own root.
+
+Every row costs 320 bytes of signature and band keys (64 x uint32 + 8 x
+uint64). With ``spill_dir`` these are appended to files there and read back
+through ``np.memmap``, so what stays in memory is about 160 bytes per row,
+and only while ``clusters`` runs (digests, root and grouping arrays).
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Iterable
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+_ROLL = np.uint64(1_000_003)
+_MIX1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = np.uint64(0x94D049BB133111EB)
+_EMPTY = np.uint64(np.iinfo(np.uint64).max)
+_SHINGLE_BLOCK = 8192
+_ADD_CHUNK = 4096  # rows shingled and signed at a time
+
+# off: skip the index; report: stats only; group: clusters never straddle
+# splits; drop: keep one row per cluster.
+DEDUP_MODES = ("off", "report", "group", "drop")
+
+
+@dataclass(frozen=True)
+class DedupConfig:
+    num_perm: int = 64
+    bands: int = 8  # num_perm / bands rows per band; candidate Jaccard ~ (1/b)^(1/r)
+    shingle_size: int = 5  # characters
+    threshold: float = 0.8  # min Jaccard between a row and its cluster root
+    seed: int = 1
+    exact_jaccard: bool = True  # verify on shingle sets (kept in memory), not signatures
+    exact_max_shingles: int = 2**25  # 8 bytes each; past this, fall back to signatures
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer: a bijection on uint64 (multiplication wraps mod 2**64).
+    x = (x ^ (x >> np.uint64(30))) * _MIX1
+    x = (x ^ (x >> np.uint64(27))) * _MIX2
+    return x ^ (x >> np.uint64(31))
+
+
+def _shingle_hashes(text: str, k: int) -> np.ndarray:
+    norm = " ".join(text.lower().split())
+    codes = np.frombuffer(norm.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) == 0:
+        return np.zeros(1, dtype=np.uint64)
+    k = min(k, len(codes))
+    n = len(codes) - k + 1
+    h = np.zeros(n, dtype=np.uint64)
+    # Rolling polynomial hash (mod 2**64) of every k-character window.
+    for j in range(k):
+        h = h * _ROLL + codes[j : j + n]
+    return _mix64(h)
+
+
+class NearDupIndex:
+    """Incremental MinHash/LSH index; ``add`` batches, then read ``clusters``."""
+
+    def __init__(self, cfg: DedupConfig | None = None, spill_dir: str | Path | None = None) -> None:
+        self.cfg = cfg or DedupConfig()
+        if self.cfg.num_perm % self.cfg.bands != 0:
+            raise ValueError("num_perm must be divisible by bands.")
+        # Signatures and band keys go to files here instead of memory.
+        self._spill = None if spill_dir is None else Path(spill_dir)
+        if self._spill is not None:
+            self._spill.mkdir(parents=True, exist_ok=True)
+            for name in ("sigs", "keys"):
+                self._spill_file(name).write_bytes(b"")
+        rng = np.random.default_rng(self.cfg.seed)
+        self._masks = rng.integers(
+            0, _EMPTY, size=self.cfg.num_perm, dtype=np.uint64, endpoint=True
+        )
+        self._sigs: list[np.ndarray] = []
+        self._keys: list[np.ndarray] = []
+        # Per ``add`` chunk: its rows' sorted shingle hashes, concatenated, and
+        # each row's count. Rows are located by chunk, never copied into one array.
+        self._shingles: list[np.ndarray] = []
+        self._counts: list[np.ndarray] = []
+        self._spans: np.ndarray | None = None  # (chunk, start, end) per row
+        self.exact = self.cfg.exact_jaccard
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def _signature(self, h: np.ndarray) -> np.ndarray:
+        sig = np.full(self.cfg.num_perm, _EMPTY, dtype=np.uint64)
+        for start in range(0, len(h), _SHINGLE_BLOCK):
+            block = h[start : start + _SHINGLE_BLOCK]
+            perm = _mix64(self._masks[:, None] ^ block[None, :])
+            np.minimum(sig, perm.min(axis=1), out=sig)
+        return sig
+
+    def signature(self, text: str) -> np.ndarray:
+        return self._signature(np.unique(_shingle_hashes(text, self.cfg.shingle_size)))
+
+    def add(self, texts: Iterable[str]) -> None:
+        texts = iter(texts)
+        # A chunk at a time, so the shingles of a large batch are never all
+        # held at once unless they are kept for exact Jaccard.
+        while chunk := list(islice(texts, _ADD_CHUNK)):
+            self._add(chunk)
+
+    def _add(self, texts: list[str]) -> None:
+        shingles = [np.unique(_shingle_hashes(t, self.cfg.shingle_size)) for t in texts]
+        sigs = np.array([self._signature(h) for h in shingles], dtype=np.uint64)
+        if self.exact:
+            self._shingles.append(np.concatenate(shingles))
+            self._counts.append(np.fromiter(map(len, shingles), dtype=np.int64))
+            self._spans = None
+            if sum(len(h) for h in self._shingles) > self.cfg.exact_max_shingles:
+                # Too many to hold: estimate Jaccard from signatures for every row.
+                self._shingles, self._counts, self.exact = [], [], False
+        rows = self.cfg.num_perm // self.cfg.bands
+        banded = sigs.reshape(len(sigs), self.cfg.bands, rows)
+        keys = np.zeros((len(sigs), self.cfg.bands), dtype=np.uint64)
+        for r in range(rows):
+            keys = keys * _ROLL + banded[:, :, r]
+        # Low 32 bits are plenty to estimate Jaccard from signature agreement.
+        sigs = sigs.astype(np.uint32)
+        if self._spill is None:
+            self._sigs.append(sigs)
+            self._keys.append(keys)
+        else:
+            for name, arr in (("sigs", sigs), ("keys", keys)):
+                with open(self._spill_file(name), "ab") as f:
+                    f.write(arr.tobytes())
+            self._sigs, self._keys = [], []  # mapped again by _compact
+        self._n += len(sigs)
+
+    def _compact(self) -> None:
+        # One signature and key array, so rows index directly.
+        if self._spill is not None and not self._sigs and self._n:
+            self._sigs = [self._mapped("sigs", np.uint32, self.cfg.num_perm)]
+            self._keys = [self._mapped("keys", np.uint64, self.cfg.bands)]
+        for parts in (self._sigs, self._keys):
+            if len(parts) > 1:
+                parts[:] = [np.concatenate(parts)]
+        if self.exact and self._spans is None:
+            chunk = np.repeat(np.arange(len(self._counts)), [len(c) for c in self._counts])
+            ends = np.concatenate([np.cumsum(c) for c in self._counts])
+            self._spans = np.column_stack([chunk, ends - np.concatenate(self._counts), ends])
+
+    def _spill_file(self, name: str) -> Path:
+        assert self._spill is not None  # only called when spilling
+        return self._spill / f"{name}.bin"
+
+    def _mapped(self, name: str, dtype: type, width: int) -> np.ndarray:
+        return np.memmap(self._spill_file(name), dtype=dtype, mode="r", shape=(self._n, width))
+
+    def _row_shingles(self, i: int) -> np.ndarray:
+        spans = self._spans
+        assert spans is not None  # set by _compact
+        chunk, start, end = spans[i]
+        return self._shingles[chunk][start:end]
+
+    def jaccard(self, i: int, j: int) -> float:
+        """Jaccard of rows ``i`` and ``j`` (estimated once ``exact`` is False)."""
+        self._compact()
+        if self.exact:
+            a, b = self._row_shingles(i), self._row_shingles(j)
+            inter = len(np.intersect1d(a, b, assume_unique=True))
+            return inter / (len(a) + len(b) - inter)
+        sigs = self._sigs[0]
+        return float((sigs[i] == sigs[j]).mean())
+
+    def _contents(self) -> np.ndarray:
+        # A 128-bit digest per row; rows with equal contents have equal Jaccard
+        # to every other row.
+        if self.exact:
+            rows = (self._row_shingles(i) for i in range(self._n))
+        else:
+            rows = (
+                k.tobytes() + s.tobytes() for k, s in zip(self._keys[0], self._sigs[0], strict=True)
+            )
+        digests = b"".join(hashlib.blake2b(row, digest_size=16).digest() for row in rows)
+        return np.frombuffer(digests, dtype=np.uint64).reshape(self._n, 2)
+
+    @staticmethod
+    def _linked_keys(keys: np.ndarray, rows: np.ndarray) -> Iterable[tuple[int, list[int]]]:
+        # Band keys as Python ints, _ADD_CHUNK rows at a time.
+        for start in range(0, len(rows), _ADD_CHUNK):
+            block = rows[start : start + _ADD_CHUNK]
+            yield from zip(block.tolist(), keys[block].tolist(), strict=True)
+
+    def clusters(self) -> np.ndarray:
+        """Cluster id per added row: the smallest row index in its cluster."""
+        n = self._n
+        root = np.arange(n, dtype=np.int64)
+        if n == 0:
+            return root
+        self._compact()
+        keys = self._keys[0]
+        _, first, inverse = np.unique(
+            self._contents(), axis=0, return_index=True, return_inverse=True
+        )
+        # A repeat sees the same candidates as the content's first row, plus
+        # that row or its root, so it always lands in the same cluster.
+        first = first[inverse.reshape(-1)]
+        unique = np.flatnonzero(first == root)
+        # Rows sharing no band bucket with any other content are their own roots.
+        shared = np.zeros(len(unique), dtype=bool)
+        for band in range(keys.shape[1]):
+            _, inv, counts = np.unique(keys[unique, band], return_inverse=True, return_counts=True)
+            shared |= counts[inv] > 1
+        # Per band, the cluster roots seen so far in each bucket, in row order.
+        leaders: list[dict[int, list[int]]] = [{} for _ in range(keys.shape[1])]
+        linked = unique[shared]
+        for j, row_keys in self._linked_keys(keys, linked):
+            seen: set[int] = set()
+            candidates = []
+            for band, key in enumerate(row_keys):
+                for i in leaders[band].get(key, ()):
+                    if i not in seen:
+                        seen.add(i)
+                        candidates.append(i)
+            for i in sorted(candidates):
+                if self.jaccard(i, j) >= self.cfg.threshold:
+                    root[j] = i
+                    break
+            else:
+                for band, key in enumerate(row_keys):
+                    leaders[band].setdefault(key, []).append(j)
+        return root[first]
+
+
+def build_index(texts: Iterable[str], cfg: DedupConfig | None = None) -> NearDupIndex:
+    index = NearDupIndex(cfg)
+    index.add(texts)
+    return index
+
+
+def cluster_stats(clusters: np.ndarray, split: np.ndarray | None = None) -> dict:
+    """Duplicate-cluster summary; with ``split``, also count clusters that leak."""
+    _, inverse, sizes = np.unique(clusters, return_inverse=True, return_counts=True)
+    multi = sizes > 1
+    stats = {
+        "n_rows": int(len(clusters)),
+        "n_clusters": int(len(sizes)),
+        "n_duplicate_rows": int(len(clusters) - len(sizes)),
+        "n_multi_row_clusters": int(multi.sum()),
+        "rows_in_multi_row_clusters": int(sizes[multi].sum()),
+        "largest_cluster": int(sizes.max()) if len(sizes) else 0,
+    }
+    if split is not None:
+        split = np.asarray(split)
+        parts = np.unique(split)
+        seen = np.zeros((len(sizes), len(parts)), dtype=bool)
+        seen[inverse, np.searchsorted(parts, split)] = True
+        stats["clusters_spanning_splits"] = int((seen.sum(axis=1) > 1).sum())
+    return stats
+
+
+def representatives(clusters: np.ndarray) -> np.ndarray:
+    """Boolean mask keeping the first row of every cluster."""
+    return clusters == np.arange(len(clusters))
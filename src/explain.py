@@ -0,0 +1,156 @@
+"""Per-text n-gram attributions for the linear text models.
+
+``src.inference.predict_texts`` returns what the detector decided;
+``explain_texts`` returns why. For every text, model (word and char) and class
+it lists the n-grams with the largest contribution ``tfidf[term] *
+coef[class, term]`` to that class's decision score, averaged over calibration
+folds. Contributions are in decision-score (logit) space, before calibration.
+
+A batch costs one sparse product per fold and class: the coefficient column is
+gathered at the non-zeros of the TF-IDF rows, and the top-k terms of every row
+come from a single sort over those non-zeros. Fitted scikit-learn models are
+converted once per model object into the fold-sharing ``CompactTextModel``
+layout (without pruning); compiled scorer models are used as they are. Hashed
+(streaming) models have no vocabulary, so their n-grams are reported by hash
+column (``#123``). Language-routed models (``src.routing``) are explained by
+the model each text was routed to. Long texts can be explained window by
+window (``long_text``), matching how ``predict_texts`` scores them.
+"""
+
+from __future__ import annotations
+
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import scipy.sparse as sp
+
+from src.export import compact_model
+from src.inference import LongTextConfig, window_segments
+
+MODEL_KEYS = ("primary_model", "other_model")
+
+_VIEWS: weakref.WeakKeyDictionary[Any, _LinearView] = weakref.WeakKeyDictionary()
+_VIEWS_LOCK = threading.Lock()
+
+
+@dataclass(frozen=True)
+class _LinearView:
+    # ``model.fold_features(texts)`` gives one (n_texts, n_terms) CSR per fold;
+    # ``weights`` holds the matching (n_terms, n_classes) coefficient arrays.
+    model: Any
+    weights: list[np.ndarray]
+    terms: np.ndarray | None
+
+
+def _linear_view(model: Any) -> _LinearView:
+    with _VIEWS_LOCK:
+        view = _VIEWS.get(model)
+    if view is not None:
+        return view
+    linear = model if hasattr(model, "fold_features") else compact_model(model, tol=0.0)["model"]
+    weights = []
+    for coef in linear.coef:
+        w = coef.toarray()
+        # Binary heads score the positive class; the negative class gets -w.
+        weights.append(np.hstack([-w, w]) if w.shape[1] == 1 else w)
+    view = _LinearView(linear, weights, linear.terms())
+    with _VIEWS_LOCK:
+        _VIEWS[model] = view
+    return view
+
+
+def class_contributions(model: Any, texts: list[str]) -> list[sp.csr_matrix]:
+    """Per class, the (n_texts, n_terms) matrix of fold-averaged term contributions."""
+    view = _linear_view(model)
+    feats = view.model.fold_features(texts)
+    out = []
+    for c in range(view.weights[0].shape[1]):
+        total = sp.csr_matrix((len(texts), view.weights[0].shape[0]))
+        for X, w in zip(feats, view.weights, strict=True):
+            total = total + sp.csr_matrix((X.data * w[X.indices, c], X.indices, X.indptr), X.shape)
+        out.append(total / len(feats))
+    return out
+
+
+def top_k_rows(C: sp.csr_matrix, k: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(row, column, value) of the ``k`` largest positive entries of each row."""
+    C = sp.csr_matrix(C)
+    rows = np.repeat(np.arange(C.shape[0]), np.diff(C.indptr))
+    positive = C.data > 0
+    rows, cols, vals = rows[positive], C.indices[positive], C.data[positive]
+    order = np.lexsort((-vals, rows))
+    rows, cols, vals = rows[order], cols[order], vals[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows, side="left")
+    keep = rank < k
+    return rows[keep], cols[keep], vals[keep]
+
+
+def explain_texts(
+    bundle: dict[str, Any],
+    texts: list[str],
+    top_k: int = 5,
+    long_text: LongTextConfig | None = None,
+) -> list[dict[str, dict[str, list[tuple[str, float]]]]]:
+    """Top-``top_k`` n-grams per model and class for each text.
+
+    Returns one dict per text, ``{model_name: {label: [(ngram, contribution),
+    ...]}}`` with model names ``"word"``/``"char"`` and contributions sorted
+    in decreasing order. Only n-grams that push towards a class are listed.
+    With ``long_text``, long texts are explained as ``predict_texts`` scores
+    them: each window on its own, then the length-weighted mean of the
+    windows' contributions.
+    """
+    labels: list[str] = list(bundle["labels"])
+    primary = bundle["primary_name"]
+    names = {"primary_model": primary, "other_model": "char" if primary == "word" else "word"}
+    out: list[dict[str, dict[str, list[tuple[str, float]]]]] = [
+        {names[key]: {lab: [] for lab in labels} for key in MODEL_KEYS} for _ in texts
+    ]
+    if not texts:
+        return out
+    segments, doc, weight = texts, np.arange(len(texts)), np.ones(len(texts))
+    if long_text is not None:
+        segments, doc, weight = window_segments(texts, long_text)
+    windowed = len(segments) != len(texts)
+    for key in MODEL_KEYS:
+        model = bundle[key]
+        parts = model.groups(segments) if hasattr(model, "groups") else [(model, None)]
+        # Windows of one text may take different routes: sum every term over
+        # the routes before ranking, rather than merging per-route top-k lists.
+        merged: dict[tuple[int, str], dict[str, float]] = {}
+        for sub, positions in parts:
+            pos = np.arange(len(segments)) if positions is None else positions
+            sub_texts = [segments[i] for i in pos]
+            # A routed language model may know fewer labels than the bundle.
+            label_cols = np.searchsorted(model.classes_, sub.classes_) if sub is not model else None
+            terms = _linear_view(sub).terms
+            # Length-weighted mean over each text's windows: (n_texts, n_sub_segments).
+            mean = sp.csr_matrix(
+                (weight[pos], (doc[pos], np.arange(len(pos)))), shape=(len(texts), len(pos))
+            )
+            for c, C in enumerate(class_contributions(sub, sub_texts)):
+                label = labels[c if label_cols is None else label_cols[c]]
+                if not windowed:
+                    rows, cols, vals = top_k_rows(C, top_k)
+                    rows = pos[rows]
+                elif len(parts) == 1:
+                    rows, cols, vals = top_k_rows(mean @ C, top_k)
+                else:
+                    coo = sp.coo_matrix(mean @ C)
+                    for r, j, v in zip(
+                        coo.row.tolist(), coo.col.tolist(), coo.data.tolist(), strict=True
+                    ):
+                        term = terms[j] if terms is not None else f"#{j}"
+                        bucket = merged.setdefault((r, label), {})
+                        bucket[term] = bucket.get(term, 0.0) + v
+                    continue
+                for r, j, v in zip(rows.tolist(), cols.tolist(), vals.tolist(), strict=True):
+                    term = terms[j] if terms is not None else f"#{j}"
+                    out[r][names[key]][label].append((term, v))
+        for (r, label), totals in merged.items():
+            ranked = sorted(((t, v) for t, v in totals.items() if v > 0), key=lambda tv: -tv[1])
+            out[r][names[key]][label] = ranked[:top_k]
+    return out
@@ -0,0 +1,594 @@
+"""Compact export of the persisted model bundle.
+
+``outputs/model.joblib`` stores each calibrated model as scikit-learn objects:
+``CalibratedClassifierCV`` keeps one full pipeline per calibration fold, each
+with its own float64 IDF vector, 60k-term vocabulary and dense coefficients.
+``compact_bundle`` flattens a bundle into ``CompactTextModel`` objects that
+share one pruned vocabulary across folds and store float32, sparse weights:
+
+- terms whose coefficients are below ``tol`` (in absolute value) for every fold
+  and class are dropped from the vocabulary;
+- IDF, coefficients and intercepts are stored as float32 (coefficients as CSR);
+- with ``collapse_folds`` the fold models are averaged into one linear model
+  plus one calibration map. Only the parametric maps (sigmoid, temperature)
+  can be averaged; isotonic models always keep their folds.
+
+Pruning and collapsing are approximations (dropped terms no longer count
+towards the TF-IDF row norm), so ``export_compact`` measures the maximum
+probability deviation and the primary decision agreement against the original
+bundle on the benchmark texts, and refuses to write a bundle outside
+``max_proba_diff``/``min_agreement``. Without an explicit ``tol`` it picks the
+largest tolerance in ``TOL_GRID`` that stays within those bounds: coefficient
+scale depends on the model's regularization, so no fixed tolerance fits every
+bundle.
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+from typing import Any
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer, TfidfVectorizer
+from sklearn.pipeline import Pipeline
+
+from src.calibration import PrefitCalibratedClassifier
+from src.inference import load_bundle
+from src.io_utils import write_json
+from src.routing import FALLBACK, LanguageRoutedModel
+from src.scorer import CompiledTextModel, apply_calibration, save_scorer
+
+# Bounds a compact bundle must meet on the benchmark texts.
+MAX_PROBA_DIFF = 0.02
+MIN_AGREEMENT = 0.995
+# Pruning tolerances ``export_compact`` tries, smallest first, when none is given.
+TOL_GRID = (0.0, 2.5e-3, 5e-3, 1e-2, 2e-2, 5e-2, 0.1)
+
+
+def _calibration_params(calibrators: list[Any], method: str, sklearn_sign: bool) -> dict:
+    """Normalize fitted calibrators to plain arrays (``p = expit(a * s + b)``)."""
+    if method == "sigmoid":
+        a = np.array([c.a_ for c in calibrators])
+        b = np.array([c.b_ for c in calibrators])
+        if sklearn_sign:
+            # sklearn's _SigmoidCalibration predicts expit(-(a * s + b)).
+            a, b = -a, -b
+        return {"method": "sigmoid", "a": a, "b": b}
+    if method == "isotonic":
+        return {
+            "method": "isotonic",
+            "x": [np.asarray(c.X_thresholds_, dtype=float) for c in calibrators],
+            "y": [np.asarray(c.y_thresholds_, dtype=float) for c in calibrators],
+        }
+    if method == "temperature":
+        return {"method": "temperature", "temperature": float(calibrators[0].temperature_)}
+    raise ValueError(f"Unsupported calibration method: {method}")
+
+
+def model_folds(model: Any) -> list[dict]:
+    """Split a fitted text model into (vectorizer, linear head, calibration) folds.
+
+    Supports ``CalibratedClassifierCV`` and ``PrefitCalibratedClassifier`` over a
+    ``Pipeline`` of a TF-IDF or hashing vectorizer and a linear classifier.
+    """
+    parts: list[tuple[Any, list[Any], str, bool]] = []
+    if isinstance(model, LanguageRoutedModel):
+        raise ValueError(
+            "Language-routed models have one set of folds per route; "
+            "split them with model.models / model.fallback first."
+        )
+    if isinstance(model, CalibratedClassifierCV):
+        for cc in model.calibrated_classifiers_:
+            parts.append((cc.estimator, cc.calibrators, cc.method, True))
+    elif isinstance(model, PrefitCalibratedClassifier):
+        parts.append((model.base, model.calibrators_, model.method, False))
+    else:
+        raise ValueError(f"Unsupported model type for export: {type(model).__name__}")
+
+    folds = []
+    for pipe, calibrators, method, sklearn_sign in parts:
+        if not isinstance(pipe, Pipeline) or len(pipe.steps) != 2:
+            raise ValueError("Export expects a (vectorizer, linear classifier) pipeline.")
+        vec, clf = pipe.steps[0][1], pipe.steps[1][1]
+        folds.append(
+            {
+                "vectorizer": vec,
+                "coef": np.asarray(clf.coef_, dtype=float),
+                "intercept": np.asarray(clf.intercept_, dtype=float),
+                "calibration": _calibration_params(calibrators, method, sklearn_sign),
+            }
+        )
+    return folds
+
+
+def _row_normalize(X: sp.csr_matrix) -> sp.csr_matrix:
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sp.csr_matrix(sp.diags(1.0 / norms) @ X)
+
+
+class CompactTextModel:
+    """Pruned, float32, fold-sharing replacement for a calibrated text model.
+
+    ``counter`` produces raw term counts over the shared (pruned) vocabulary;
+    each fold applies its own IDF (zero for terms outside its original
+    vocabulary), L2 normalization, sparse coefficients and calibration map, and
+    fold probabilities are averaged like ``CalibratedClassifierCV`` does.
+    """
+
+    def __init__(
+        self,
+        counter: Any,
+        sublinear_tf: bool,
+        idf: np.ndarray | None,
+        coef: list[sp.csr_matrix],
+        intercept: np.ndarray,
+        calibration: list[dict],
+        n_classes: int,
+        classes: np.ndarray | None = None,
+    ) -> None:
+        self.counter = counter
+        self.sublinear_tf = sublinear_tf
+        self.idf = idf
+        self.coef = coef
+        self.intercept = intercept
+        self.calibration = calibration
+        self.n_classes = n_classes
+        # The original label ids: a routed language model may lack some labels.
+        self.classes_ = np.arange(n_classes) if classes is None else np.asarray(classes)
+
+    def fold_features(self, texts: Any) -> list[sp.csr_matrix]:
+        """Per-fold normalized rows over the shared vocabulary (or hash columns)."""
+        counts = sp.csr_matrix(self.counter.transform(texts), dtype=np.float32)
+        if self.sublinear_tf:
+            np.log(counts.data, out=counts.data)
+            counts.data += 1.0
+        return [
+            _row_normalize(
+                counts if self.idf is None else sp.csr_matrix(counts @ sp.diags(self.idf[f]))
+            )
+            for f in range(len(self.coef))
+        ]
+
+    def terms(self) -> np.ndarray | None:
+        """Column names, or None for hashed columns (which have no inverse)."""
+        vocabulary = getattr(self.counter, "vocabulary", None)
+        if not vocabulary:
+            return None
+        names = np.empty(len(vocabulary), dtype=object)
+        for term, col in vocabulary.items():
+            names[col] = term
+        return names
+
+    def decision_scores(self, texts: Any) -> list[np.ndarray]:
+        return [
+            (X @ coef).toarray() + self.intercept[f]
+            for f, (X, coef) in enumerate(zip(self.fold_features(texts), self.coef, strict=True))
+        ]
+
+    def predict_proba(self, texts: Any) -> np.ndarray:
+        scores = self.decision_scores(texts)
+        proba = np.zeros((scores[0].shape[0], self.n_classes))
+        for s, cal in zip(scores, self.calibration, strict=True):
+            proba += apply_calibration(s.astype(float), cal, self.n_classes)
+        return proba / len(scores)
+
+    def predict(self, texts: Any) -> np.ndarray:
+        return self.classes_[self.predict_proba(texts).argmax(axis=1)]
+
+
+def compact_model(model: Any, tol: float, collapse_folds: bool = False) -> dict:
+    """Build a ``CompactTextModel``; returns it with vocabulary/fold statistics."""
+    folds = model_folds(model)
+    vec0 = folds[0]["vectorizer"]
+    n_classes = len(model.classes_)
+    methods = {f["calibration"]["method"] for f in folds}
+    collapse = collapse_folds and len(folds) > 1 and methods <= {"sigmoid", "temperature"}
+
+    if isinstance(vec0, HashingVectorizer):
+        # Stateless hashing: columns are fixed, so only the coefficients shrink.
+        counter = HashingVectorizer(**{**vec0.get_params(), "norm": None})
+        n_cols = vec0.n_features
+        col_maps = [np.arange(n_cols) for _ in folds]
+        idf = None
+        sublinear = False
+        n_terms_before = n_terms_after = None
+    elif isinstance(vec0, TfidfVectorizer):
+        union: dict[str, int] = {}
+        for f in folds:
+            for term in f["vectorizer"].vocabulary_:
+                union.setdefault(term, len(union))
+        n_terms_before = len(union)
+        # Max |coef| per union term across folds/classes decides what survives.
+        strength = np.zeros(len(union))
+        for f in folds:
+            vocab = f["vectorizer"].vocabulary_
+            cols = np.fromiter((union[t] for t in vocab), dtype=np.int64, count=len(vocab))
+            local = np.fromiter(vocab.values(), dtype=np.int64, count=len(vocab))
+            np.maximum.at(strength, cols, np.abs(f["coef"][:, local]).max(axis=0))
+        kept = np.flatnonzero(strength >= tol)
+        new_index = np.full(len(union), -1, dtype=np.int64)
+        new_index[kept] = np.arange(len(kept))
+        terms = list(union)
+        vocabulary = {terms[i]: int(new_index[i]) for i in kept}
+        n_terms_after = len(vocabulary)
+        n_cols = len(vocabulary)
+
+        params = {k: v for k, v in vec0.get_params().items() if k in CountVectorizer().get_params()}
+        params.update(vocabulary=vocabulary, max_features=None, min_df=1, max_df=1.0)
+        counter = CountVectorizer(**params)
+        sublinear = bool(vec0.sublinear_tf)
+
+        col_maps = []
+        idf = np.zeros((len(folds), n_cols), dtype=np.float32)
+        for i, f in enumerate(folds):
+            vocab = f["vectorizer"].vocabulary_
+            cmap = np.full(len(f["vectorizer"].idf_), -1, dtype=np.int64)
+            for term, local in vocab.items():
+                cmap[local] = new_index[union[term]]
+            in_vocab = cmap >= 0
+            idf[i, cmap[in_vocab]] = f["vectorizer"].idf_[in_vocab]
+            col_maps.append(cmap)
+    else:
+        raise ValueError(f"Unsupported vectorizer for export: {type(vec0).__name__}")
+
+    coefs = []
+    intercepts = []
+    for f, cmap in zip(folds, col_maps, strict=True):
+        coef = f["coef"]  # (n_out, n_local)
+        present = np.flatnonzero(cmap >= 0)
+        full = np.zeros((n_cols, coef.shape[0]), dtype=np.float32)
+        full[cmap[present]] = coef[:, present].T
+        full[np.abs(full) < tol] = 0.0
+        coefs.append(sp.csr_matrix(full))
+        intercepts.append(f["intercept"])
+    calibration = [f["calibration"] for f in folds]
+    intercept = np.array(intercepts, dtype=np.float32)
+
+    if collapse:
+        coefs = [sp.csr_matrix(sum(coefs) / len(coefs), dtype=np.float32)]
+        intercept = intercept.mean(axis=0, keepdims=True)
+        if idf is not None:
+            n_with = (idf > 0).sum(axis=0)
+            idf = (idf.sum(axis=0) / np.maximum(n_with, 1)).astype(np.float32)[None, :]
+        if methods == {"sigmoid"}:
+            calibration = [
+                {
+                    "method": "sigmoid",
+                    "a": np.mean([c["a"] for c in calibration], axis=0),
+                    "b": np.mean([c["b"] for c in calibration], axis=0),
+                }
+            ]
+        else:
+            calibration = [
+                {
+                    "method": "temperature",
+                    "temperature": float(np.mean([c["temperature"] for c in calibration])),
+                }
+            ]
+
+    compact = CompactTextModel(
+        counter, sublinear, idf, coefs, intercept, calibration, n_classes, model.classes_
+    )
+    return {
+        "model": compact,
+        "n_folds": len(folds),
+        "collapsed": bool(collapse),
+        "vocab_terms_before": n_terms_before,
+        "vocab_terms_after": n_terms_after,
+        "nonzero_coefficients": int(sum(c.nnz for c in coefs)),
+    }
+
+
+def compact_routed_model(
+    model: LanguageRoutedModel, tol: float, collapse_folds: bool = False
+) -> dict:
+    """Compact every route of a routed model; statistics are summed over routes."""
+    routes = {**model.models, FALLBACK: model.fallback}
+    compacted = {
+        route: compact_model(sub, tol=tol, collapse_folds=collapse_folds)
+        for route, sub in routes.items()
+    }
+    fallback = compacted[FALLBACK].pop("model")
+    models = {route: compacted[route].pop("model") for route in model.models}
+    return {
+        "model": LanguageRoutedModel(model.router, models, fallback),
+        "n_folds": sum(r["n_folds"] for r in compacted.values()),
+        "collapsed": all(r["collapsed"] for r in compacted.values()),
+        "vocab_terms_before": sum(r["vocab_terms_before"] for r in compacted.values()),
+        "vocab_terms_after": sum(r["vocab_terms_after"] for r in compacted.values()),
+        "nonzero_coefficients": sum(r["nonzero_coefficients"] for r in compacted.values()),
+        "routes": compacted,
+    }
+
+
+def compact_bundle(
+    bundle: dict[str, Any], tol: float, collapse_folds: bool = False
+) -> tuple[dict[str, Any], dict]:
+    """Compact both models of a bundle; returns the new bundle and per-model stats."""
+    out = dict(bundle)
+    stats = {}
+    for key in ("primary_model", "other_model"):
+        model = bundle[key]
+        compact = compact_routed_model if isinstance(model, LanguageRoutedModel) else compact_model
+        res = compact(model, tol=tol, collapse_folds=collapse_folds)
+        out[key] = res.pop("model")
+        stats[key] = res
+    return out, stats
+
+
+def _analyzer_settings(vec: Any) -> dict:
+    unsupported = [
+        name
+        for name in ("preprocessor", "tokenizer", "stop_words", "strip_accents")
+        if getattr(vec, name) is not None
+    ]
+    if unsupported or vec.analyzer not in ("word", "char") or vec.norm != "l2":
+        raise ValueError(
+            "The compiled scorer supports plain word/char TF-IDF with l2 norm; "
+            f"got analyzer={vec.analyzer!r}, norm={vec.norm!r}, custom={unsupported}"
+        )
+    return {
+        "kind": vec.analyzer,
+        "lowercase": bool(vec.lowercase),
+        "token_pattern": vec.token_pattern,
+        "ngram_range": [int(n) for n in vec.ngram_range],
+        "sublinear_tf": bool(vec.sublinear_tf),
+    }
+
+
+def compile_model(model: Any) -> CompiledTextModel:
+    """Exact NumPy/SciPy replica of a calibrated TF-IDF text model (no pruning)."""
+    if isinstance(model, LanguageRoutedModel):
+        raise ValueError(
+            "Language-routed bundles cannot be compiled: the language router needs "
+            "scikit-learn at scoring time. Use export_compact for a routed bundle."
+        )
+    folds = model_folds(model)
+    vec0 = folds[0]["vectorizer"]
+    if not isinstance(vec0, TfidfVectorizer):
+        # Hashing models would need scikit-learn's murmurhash at scoring time.
+        raise ValueError(f"Unsupported vectorizer for the compiled scorer: {type(vec0).__name__}")
+    analyzer = _analyzer_settings(vec0)
+
+    vocabulary: dict[str, int] = {}
+    for f in folds:
+        for term in f["vectorizer"].vocabulary_:
+            vocabulary.setdefault(term, len(vocabulary))
+    n_terms = len(vocabulary)
+    idf = np.zeros((len(folds), n_terms))
+    coefs = []
+    for i, f in enumerate(folds):
+        vec = f["vectorizer"]
+        if _analyzer_settings(vec) != analyzer:
+            raise ValueError("Calibration folds disagree on analyzer settings.")
+        local = np.fromiter(vec.vocabulary_.values(), dtype=np.int64, count=len(vec.vocabulary_))
+        cols = np.fromiter(
+            (vocabulary[t] for t in vec.vocabulary_), dtype=np.int64, count=len(vec.vocabulary_)
+        )
+        idf[i, cols] = vec.idf_[local] if vec.use_idf else 1.0
+        full = np.zeros((n_terms, f["coef"].shape[0]))
+        full[cols] = f["coef"][:, local].T
+        coefs.append(sp.csr_matrix(full))
+    return CompiledTextModel(
+        analyzer=analyzer,
+        vocabulary=vocabulary,
+        idf=idf,
+        coef=coefs,
+        intercept=np.array([f["intercept"] for f in folds], dtype=float),
+        calibration=[f["calibration"] for f in folds],
+        n_classes=len(model.classes_),
+    )
+
+
+def compile_bundle(bundle: dict[str, Any]) -> dict[str, Any]:
+    """Bundle whose models are ``CompiledTextModel`` (same keys as the original)."""
+    out = dict(bundle)
+    for key in ("primary_model", "other_model"):
+        out[key] = compile_model(bundle[key])
+    return out
+
+
+def export_scorer(model_path: str | Path, out_dir: str | Path) -> Path:
+    """Compile ``model_path`` and write ``scorer.json``/``scorer.npz`` to ``out_dir``."""
+    return save_scorer(compile_bundle(load_bundle(model_path)), out_dir)
+
+
+def _median_seconds(fn: Any, repeats: int) -> float:
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(statistics.median(times))
+
+
+def _bundle_proba(bundle: dict[str, Any], texts: list[str]) -> np.ndarray:
+    return np.hstack(
+        [bundle["primary_model"].predict_proba(texts), bundle["other_model"].predict_proba(texts)]
+    )
+
+
+def _deviation(p_orig: np.ndarray, p_comp: np.ndarray) -> tuple[float, float]:
+    """Max absolute probability difference and primary decision agreement."""
+    if not len(p_orig):
+        return 0.0, 1.0
+    n = p_orig.shape[1] // 2
+    agreement = (p_orig[:, :n].argmax(axis=1) == p_comp[:, :n].argmax(axis=1)).mean()
+    return float(np.abs(p_orig - p_comp).max()), float(agreement)
+
+
+def export_compact(
+    model_path: str | Path,
+    out_path: str | Path,
+    texts: list[str],
+    tol: float | None = None,
+    collapse_folds: bool = False,
+    max_proba_diff: float = MAX_PROBA_DIFF,
+    min_agreement: float = MIN_AGREEMENT,
+    report_path: str | Path | None = None,
+    repeats: int = 3,
+) -> dict:
+    """Write a compact bundle next to the original and report what it saved.
+
+    ``texts`` is the benchmark batch used for latency, for the maximum
+    absolute probability deviation (over both models of the bundle) and for
+    the primary decision agreement. With ``tol=None`` the largest ``TOL_GRID``
+    tolerance within both bounds is used. Raises ``ValueError`` (after writing
+    the report, without writing the bundle) when the chosen options exceed
+    ``max_proba_diff`` or fall below ``min_agreement``.
+    """
+    model_path, out_path = Path(model_path), Path(out_path)
+    original = load_bundle(model_path)
+    p_orig = _bundle_proba(original, texts) if texts else np.empty((0, 0))
+
+    def attempt(candidate: float) -> tuple[dict[str, Any], dict, float, float]:
+        compact, stats = compact_bundle(original, tol=candidate, collapse_folds=collapse_folds)
+        p_comp = _bundle_proba(compact, texts) if texts else p_orig
+        return compact, stats, *_deviation(p_orig, p_comp)
+
+    # Without benchmark texts nothing can be verified, so the search prunes nothing.
+    candidates = (tol,) if tol is not None else TOL_GRID if texts else TOL_GRID[:1]
+    chosen_tol = candidates[0]
+    compact, model_stats, max_diff, agreement = attempt(chosen_tol)
+    for candidate in candidates[1:]:
+        try:
+            trial = attempt(candidate)
+        except ValueError:  # pruned the whole vocabulary
+            break
+        if trial[2] > max_proba_diff or trial[3] < min_agreement:
+            break
+        chosen_tol = candidate
+        compact, model_stats, max_diff, agreement = trial
+    within = max_diff <= max_proba_diff and agreement >= min_agreement
+
+    report: dict[str, Any] = {
+        "tol": chosen_tol,
+        "tol_searched": tol is None,
+        "collapse_folds": collapse_folds,
+        "models": model_stats,
+        "n_benchmark_texts": len(texts),
+        "max_abs_proba_diff": max_diff,
+        "primary_decision_agreement": agreement,
+        "max_proba_diff_bound": max_proba_diff,
+        "min_agreement_bound": min_agreement,
+        "within_bounds": within,
+    }
+    if not within:
+        if report_path is not None:
+            write_json(report, report_path)
+        raise ValueError(
+            f"Compact bundle (tol={chosen_tol:g}, collapse_folds={collapse_folds}) deviates by "
+            f"max |dp| = {max_diff:.4f} with decision agreement {agreement:.4f}; bounds are "
+            f"max |dp| <= {max_proba_diff:g} and agreement >= {min_agreement:g}."
+        )
+
+    joblib.dump(compact, out_path, compress=3)
+    load_orig = _median_seconds(lambda: load_bundle(model_path), repeats)
+    load_comp = _median_seconds(lambda: load_bundle(out_path), repeats)
+    pred_orig = _median_seconds(lambda: _bundle_proba(original, texts), repeats)
+    pred_comp = _median_seconds(lambda: _bundle_proba(compact, texts), repeats)
+    report.update(
+        {
+            "original_bytes": model_path.stat().st_size,
+            "compact_bytes": out_path.stat().st_size,
+            "size_ratio": out_path.stat().st_size / model_path.stat().st_size,
+            "original_load_seconds": load_orig,
+            "compact_load_seconds": load_comp,
+            "load_speedup": load_orig / max(load_comp, 1e-9),
+            "original_predict_seconds": pred_orig,
+            "compact_predict_seconds": pred_comp,
+            "predict_speedup": pred_orig / max(pred_comp, 1e-9),
+        }
+    )
+    if report_path is not None:
+        write_json(report, report_path)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export a compact scoring bundle")
+    parser.add_argument("--model", default="outputs/model.joblib", help="Bundle to compact")
+    parser.add_argument("--out", default="outputs/model_compact.joblib", help="Compact bundle")
+    parser.add_argument(
+        "--texts",
+        default="outputs/test_predictions.csv",
+        help="CSV with a 'text' column used for latency/deviation benchmarks",
+    )
+    parser.add_argument(
+        "--scorer",
+        default=None,
+        help="Also write a dependency-light compiled scorer to this directory",
+    )
+    parser.add_argument(
+        "--tol",
+        type=float,
+        default=None,
+        help="Coefficient pruning tolerance (default: largest grid value within the bounds)",
+    )
+    parser.add_argument(
+        "--collapse-folds",
+        action="store_true",
+        help="Average calibration-fold models into one (sigmoid/temperature only)",
+    )
+    parser.add_argument(
+        "--max-proba-diff",
+        type=float,
+        default=MAX_PROBA_DIFF,
+        help="Fail when any probability moves by more than this on the benchmark texts",
+    )
+    parser.add_argument(
+        "--min-agreement",
+        type=float,
+        default=MIN_AGREEMENT,
+        help="Fail when fewer primary decisions than this fraction agree with the original",
+    )
+    parser.add_argument(
+        "--report", default="outputs/compact_report.json", help="Where to write the report"
+    )
+    args = parser.parse_args()
+    if args.scorer and any(
+        isinstance(load_bundle(args.model)[key], LanguageRoutedModel)
+        for key in ("primary_model", "other_model")
+    ):
+        parser.error("--scorer does not support language-routed bundles (--route-languages)")
+
+    texts = pd.read_csv(args.texts)["text"].astype(str).tolist()
+    report = export_compact(
+        args.model,
+        args.out,
+        texts,
+        tol=args.tol,
+        collapse_folds=args.collapse_folds,
+        max_proba_diff=args.max_proba_diff,
+        min_agreement=args.min_agreement,
+        report_path=args.report,
+    )
+    terms = ", ".join(
+        f"{key}: {s['vocab_terms_after']}/{s['vocab_terms_before']} terms"
+        for key, s in report["models"].items()
+        if s["vocab_terms_before"] is not None
+    )
+    print(
+        f"Compact bundle: {args.out} (tol={report['tol']:g}, "
+        f"collapse_folds={report['collapse_folds']}; {terms})\n"
+        f"  {report['size_ratio']:.2f}x size, {report['load_speedup']:.1f}x load, "
+        f"{report['predict_speedup']:.1f}x predict\n"
+        f"  max |dp| = {report['max_abs_proba_diff']:.4f} (bound {args.max_proba_diff:g}), "
+        f"decision agreement = {report['primary_decision_agreement']:.4f} "
+        f"(bound {args.min_agreement:g})",
+        flush=True,
+    )
+    if args.scorer:
+        print(f"Compiled scorer: {export_scorer(args.model, args.scorer)}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
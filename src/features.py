@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
 
 
 @dataclass(frozen=True)
@@ -11,6 +11,7 @@ class FeatureConfig:
     char_ngram_min: int = 3
     char_ngram_max: int = 5
     max_features: int = 60000
+    hash_features: int = 2**20
 
 
 def make_word_vectorizer(cfg: FeatureConfig) -> TfidfVectorizer:
@@ -26,3 +27,24 @@ def make_char_vectorizer(cfg: FeatureConfig) -> TfidfVectorizer:
         ngram_range=(cfg.char_ngram_min, cfg.char_ngram_max),
         max_features=cfg.max_features,
     )
+
+
+# Stateless counterparts for out-of-core training: no vocabulary or IDF to fit,
+# so every chunk is featurized identically without a pass over the corpus.
+def make_word_hasher(cfg: FeatureConfig) -> HashingVectorizer:
+    return HashingVectorizer(
+        lowercase=True,
+        ngram_range=(1, cfg.word_ngram_max),
+        n_features=cfg.hash_features,
+        alternate_sign=False,
+    )
+
+
+def make_char_hasher(cfg: FeatureConfig) -> HashingVectorizer:
+    return HashingVectorizer(
+        lowercase=True,
+        analyzer="char",
+        ngram_range=(cfg.char_ngram_min, cfg.char_ngram_max),
+        n_features=cfg.hash_features,
+        alternate_sign=False,
+    )
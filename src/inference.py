@@ -4,45 +4,318 @@ The pipeline writes ``outputs/model.joblib`` containing the fitted primary and
 secondary models, the label order, and the recommended abstention threshold.
 This module loads that bundle and scores raw text, applying the same abstention
 rule the report card recommends.
+
+Traffic repeats itself (boilerplate, templated posts, identical API error
+strings), so ``predict_texts`` optionally takes a ``PredictionCache``: a
+bounded LRU map from a keyed hash of the normalized text to the model scores.
+
+Featurization cost grows with text length (the char analyzer emits one n-gram
+per character and order), so a single huge paste can stall a whole batch. With
+a ``LongTextConfig``, texts over ``max_chars`` are split into overlapping
+windows, at most ``max_windows`` of them evenly spaced over the text. All
+windows of the batch are scored together and their probabilities averaged per
+text (weighted by window length) before the abstention rule is applied.
 """
 
 from __future__ import annotations
 
+import hashlib
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
 import joblib
+import numpy as np
+
+from src.conformal import prediction_sets
+from src.io_utils import file_digest
 
 # Extra confidence margin required to auto-decide when the two models disagree.
 ABSTAIN_DELTA = 0.05
 
+_WHITE_SPACES = re.compile(r"\s\s+")
+
+
+@dataclass(frozen=True)
+class LongTextConfig:
+    # Longer than every text in the bundled training data (max ~7.3k chars).
+    max_chars: int = 8_000
+    window_chars: int = 4_000
+    overlap_chars: int = 200
+    # Caps the characters featurized per text at max_windows * window_chars.
+    max_windows: int = 8
+
+    def __post_init__(self) -> None:
+        if not 0 <= self.overlap_chars < self.window_chars <= self.max_chars:
+            raise ValueError("Need 0 <= overlap_chars < window_chars <= max_chars.")
+        if self.max_windows < 1:
+            raise ValueError("max_windows must be at least 1.")
+
+
+def window_starts(n_chars: int, cfg: LongTextConfig) -> tuple[np.ndarray, int]:
+    """Start offsets of the windows scored for a text, and the untruncated count."""
+    if n_chars <= cfg.max_chars:
+        return np.zeros(1, dtype=np.int64), 1
+    stride = cfg.window_chars - cfg.overlap_chars
+    starts = np.arange(0, n_chars - cfg.overlap_chars, stride, dtype=np.int64)
+    n_full = len(starts)
+    if n_full > cfg.max_windows:
+        # Evenly spaced windows keep the beginning, the end and the middle.
+        keep = np.unique(np.linspace(0, n_full - 1, cfg.max_windows).round().astype(np.int64))
+        starts = starts[keep]
+    return starts, n_full
+
+
+def _window_stats(n_chars: int, starts: np.ndarray, n_full: int, cfg: LongTextConfig) -> dict:
+    if n_chars <= cfg.max_chars:
+        return {"chars": n_chars, "windows": 1, "chars_scored": n_chars, "truncated": False}
+    ends = np.minimum(starts + cfg.window_chars, n_chars)
+    # Characters covered by the union of the (sorted) windows.
+    covered = int(np.minimum(ends, np.append(starts[1:], n_chars)).sum() - starts.sum())
+    return {
+        "chars": n_chars,
+        "windows": int(len(starts)),
+        "chars_scored": int((ends - starts).sum()),
+        "truncated": bool(len(starts) < n_full),
+        "chars_skipped": n_chars - covered,
+    }
+
+
+def window_segments(
+    texts: list[str], cfg: LongTextConfig
+) -> tuple[list[str], np.ndarray, np.ndarray]:
+    """Segments scored for ``texts``, each one's text index, and its weight.
+
+    A text within ``max_chars`` is one segment; a longer one is cut into its
+    windows. Weights are proportional to segment length and sum to one per text.
+    """
+    segments: list[str] = []
+    doc_of: list[int] = []
+    for i, text in enumerate(texts):
+        text = str(text)
+        starts, _ = window_starts(len(text), cfg)
+        if len(text) <= cfg.max_chars:
+            segments.append(text)
+        else:
+            segments.extend(text[s : s + cfg.window_chars] for s in starts)
+        doc_of.extend([i] * len(starts))
+    rows = np.asarray(doc_of, dtype=np.int64)
+    weight = np.array([max(len(s), 1) for s in segments], dtype=float)
+    weight /= np.bincount(rows, weights=weight, minlength=len(texts))[rows]
+    return segments, rows, weight
+
+
+def window_stats(results: list[dict[str, Any]]) -> dict[str, Any]:
+    """Per-request windowing summary of ``predict_texts(..., long_text=...)`` results."""
+    stats = [r["window"] for r in results if "window" in r]
+    return {
+        "texts": len(stats),
+        "windowed": sum(s["windows"] > 1 for s in stats),
+        "truncated": sum(s["truncated"] for s in stats),
+        "windows": sum(s["windows"] for s in stats),
+        "chars": sum(s["chars"] for s in stats),
+        "chars_scored": sum(s["chars_scored"] for s in stats),
+        "chars_skipped": sum(s.get("chars_skipped", 0) for s in stats),
+        "max_chars": max((s["chars"] for s in stats), default=0),
+    }
+
+
+def normalize_text(text: str) -> str:
+    """Cache-key normalization that cannot change a prediction.
+
+    The vectorizers lowercase their input and both analyzers treat any run of
+    two or more whitespace characters like a single space.
+    """
+    return _WHITE_SPACES.sub(" ", str(text)).lower()
+
+
+class PredictionCache:
+    """Bounded LRU cache of per-text model scores for one bundle at a time.
+
+    Entries are keyed by a BLAKE2b hash of the normalized text, keyed with the
+    bundle fingerprint. Binding a different bundle (``load_bundle(...,
+    cache=...)`` or passing another bundle to ``predict_texts``) drops every
+    entry.
+    """
 
-def load_bundle(path: str | Path) -> dict[str, Any]:
-    """Load a model bundle saved by ``src.pipeline.run``."""
-    return joblib.load(path)
+    def __init__(self, max_entries: int = 50_000) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.max_entries = max_entries
+        self._entries: OrderedDict[bytes, tuple[np.ndarray, int]] = OrderedDict()
+        self._bundle: dict[str, Any] | None = None
+        self._key_salt = b""
+        self.fingerprint: str | None = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.batch_duplicates = 0
+        self.invalidations = 0
 
+    def __len__(self) -> int:
+        return len(self._entries)
 
-def predict_texts(bundle: dict[str, Any], texts: list[str]) -> list[dict[str, Any]]:
+    def bind(self, bundle: dict[str, Any], fingerprint: str | None = None) -> None:
+        """Switch to ``bundle``; entries scored by another bundle are dropped."""
+        fingerprint = fingerprint or f"in-memory-{id(bundle):x}"
+        if bundle is self._bundle and fingerprint == self.fingerprint:
+            return
+        if self._entries:
+            self.invalidations += 1
+            self._entries.clear()
+        # The cache holds a reference, so an in-memory id cannot be reused.
+        self._bundle = bundle
+        self.fingerprint = fingerprint
+        self._key_salt = hashlib.blake2b(fingerprint.encode(), digest_size=32).digest()
+
+    def key(self, text: str) -> bytes:
+        data = normalize_text(text).encode("utf-8", "surrogatepass")
+        return hashlib.blake2b(data, digest_size=16, key=self._key_salt).digest()
+
+    def score(self, bundle: dict[str, Any], texts: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        """Primary probabilities and secondary argmax, scoring each unique miss once."""
+        if bundle is not self._bundle:
+            self.bind(bundle)
+        keys = [self.key(t) for t in texts]
+        found: dict[bytes, tuple[np.ndarray, int]] = {}
+        missing: dict[bytes, str] = {}
+        for k, text in zip(keys, texts, strict=True):
+            if k in found or k in missing:
+                self.batch_duplicates += 1
+                continue
+            entry = self._entries.get(k)
+            if entry is None:
+                self.misses += 1
+                missing[k] = text
+            else:
+                self.hits += 1
+                self._entries.move_to_end(k)
+                found[k] = entry
+
+        if missing:
+            batch = list(missing.values())
+            proba = bundle["primary_model"].predict_proba(batch)
+            other = bundle["other_model"].predict_proba(batch).argmax(axis=1)
+            for i, k in enumerate(missing):
+                # A copy, so a cached row does not keep its whole batch alive.
+                found[k] = (proba[i].copy(), int(other[i]))
+                self._entries[k] = found[k]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        if not keys:
+            return np.zeros((0, len(bundle["labels"]))), np.zeros(0, dtype=int)
+        primary_proba = np.array([found[k][0] for k in keys])
+        other_pred = np.array([found[k][1] for k in keys])
+        return primary_proba, other_pred
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "batch_duplicates": self.batch_duplicates,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "fingerprint": self.fingerprint,
+        }
+
+
+def load_bundle(path: str | Path, cache: PredictionCache | None = None) -> dict[str, Any]:
+    """Load a model bundle saved by ``src.pipeline.run``.
+
+    With ``cache``, the cache is re-bound to the new bundle (keyed by its file
+    content), which invalidates predictions made with any earlier bundle.
+    """
+    bundle = joblib.load(path)
+    if cache is not None:
+        cache.bind(bundle, file_digest(path))
+    return bundle
+
+
+def predict_texts(
+    bundle: dict[str, Any],
+    texts: list[str],
+    cache: PredictionCache | None = None,
+    long_text: LongTextConfig | None = None,
+) -> list[dict[str, Any]]:
     """Score raw texts and apply the abstention policy.
 
     Returns one dict per input text with the predicted label, confidence,
     per-class probabilities, model-disagreement flag, and abstain decision.
+    With ``cache``, repeated texts (within the batch or seen earlier) are
+    scored once. With ``long_text``, long texts are scored as windows (see
+    the module docstring): probabilities are the length-weighted mean over
+    windows, the secondary model's label is a length-weighted vote, and each
+    result gains a ``window`` dict of windowing/truncation stats.
+
+    A bundle with a ``conformal`` entry (``run(abstention="conformal")``)
+    switches the abstention rule: each result gets its ``prediction_set`` and
+    abstains unless the set holds exactly one label.
     """
     primary = bundle["primary_model"]
     other = bundle["other_model"]
     labels: list[str] = list(bundle["labels"])
-    threshold = float(bundle["threshold"])
 
-    primary_proba = primary.predict_proba(texts)
-    other_pred = other.predict_proba(texts).argmax(axis=1)
+    segments = texts
+    windows: list[dict] = []
+    if long_text is not None:
+        segments, rows, weight = window_segments(texts, long_text)
+        for text in texts:
+            n_chars = len(str(text))
+            starts, n_full = window_starts(n_chars, long_text)
+            windows.append(_window_stats(n_chars, starts, n_full, long_text))
+
+    if cache is None:
+        primary_proba = primary.predict_proba(segments)
+        other_pred = other.predict_proba(segments).argmax(axis=1)
+    else:
+        primary_proba, other_pred = cache.score(bundle, segments)
+
+    if len(segments) != len(texts):
+        doc_proba = np.zeros((len(texts), primary_proba.shape[1]))
+        np.add.at(doc_proba, rows, primary_proba * weight[:, None])
+        votes = np.zeros((len(texts), len(labels)))
+        np.add.at(votes, (rows, other_pred), weight)
+        primary_proba, other_pred = doc_proba, votes.argmax(axis=1)
+
+    results = decide(bundle, primary_proba, other_pred)
+    for result, window in zip(results, windows, strict=False):
+        result["window"] = window
+    return results
+
+
+def decide(
+    bundle: dict[str, Any], primary_proba: np.ndarray, other_pred: np.ndarray
+) -> list[dict[str, Any]]:
+    """Apply the bundle's abstention rule to precomputed model scores.
+
+    ``primary_proba`` holds the primary model's probabilities (one column per
+    bundle label) and ``other_pred`` the secondary model's argmax per text.
+    """
+    labels: list[str] = list(bundle["labels"])
+    threshold = float(bundle["threshold"])
+    conformal = bundle.get("conformal")
+    sets = None if conformal is None else prediction_sets(primary_proba, conformal["quantile"])
 
     results: list[dict[str, Any]] = []
-    for i in range(len(texts)):
+    for i in range(len(primary_proba)):
         probs = primary_proba[i]
         pred_idx = int(probs.argmax())
         conf = float(probs.max())
         disagree = pred_idx != int(other_pred[i])
-        abstain = (conf < threshold) or (disagree and conf < min(0.99, threshold + ABSTAIN_DELTA))
+        if sets is None:
+            abstain = (conf < threshold) or (
+                disagree and conf < min(0.99, threshold + ABSTAIN_DELTA)
+            )
+        else:
+            abstain = int(sets[i].sum()) != 1
         results.append(
             {
                 "pred_label": labels[pred_idx],
@@ -52,4 +325,6 @@ def predict_texts(bundle: dict[str, Any], texts: list[str]) -> list[dict[str, An
                 "abstain": abstain,
             }
         )
+        if sets is not None:
+            results[-1]["prediction_set"] = [labels[j] for j in np.flatnonzero(sets[i])]
     return results
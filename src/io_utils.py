@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import hashlib
 import json
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 import pandas as pd
@@ -19,7 +21,35 @@ def write_csv(df: pd.DataFrame, path: str | Path) -> None:
     df.to_csv(p, index=False)
 
 
+def write_csv_chunks(frames: Iterable[pd.DataFrame], path: str | Path) -> None:
+    """Write frames sharing one schema to a single CSV without concatenating them."""
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with p.open("w", encoding="utf-8", newline="") as f:
+        header = True
+        for df in frames:
+            df.to_csv(f, index=False, header=header)
+            header = False
+
+
 def write_json(obj: dict, path: str | Path) -> None:
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
     p.write_text(json.dumps(obj, indent=2), encoding="utf-8")
+
+
+def iter_csv_chunks(path: str | Path, chunksize: int) -> Iterator[pd.DataFrame]:
+    p = Path(path)
+    if not p.exists():
+        raise FileNotFoundError(f"Input not found: {p}")
+    with pd.read_csv(p, chunksize=chunksize) as reader:
+        yield from reader
+
+
+def file_digest(path: str | Path) -> str:
+    """BLAKE2b content hash of a file, read in 1 MiB blocks."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
@@ -0,0 +1,291 @@
+"""Background pipeline runs with progress, de-duplication and cancellation.
+
+The dashboard used to call ``pipeline.run`` inside the Streamlit script, which
+froze the UI for the whole retrain and started a second run on every extra
+click. ``JobRunner`` executes runs on a single worker thread instead:
+
+- each job reports the stage and fraction from ``run``'s progress callback;
+- a job is keyed by its run id (input content hash plus run settings, see
+  ``src.registry``) and output directories; submitting a key that is already
+  queued or running returns that job;
+- with a ``RunRegistry``, finished runs are recorded there and a run id that
+  is already registered is restored instead of retrained;
+- ``Job.cancel`` takes effect at the next stage boundary (a model fit in
+  progress is not interrupted);
+- each run writes into its own version directory under
+  ``.<out_dir>.versions/`` (figures in its ``_figures/`` subdirectory). Only a
+  successful run is published, by pointing the ``CURRENT`` file in that
+  directory at it with one atomic rename (as ``src.triage`` does for its
+  stores). ``published_dirs`` resolves the pointer, so readers see all of one
+  run's artifacts or all of the previous run's, never a mix. Failed or
+  cancelled runs leave the published outputs untouched.
+- ``out_dir`` and ``figures_dir`` themselves are never written, moved or
+  deleted: they stay plain directories that the CLI writes to (and that may be
+  tracked by git). If the CLI wrote ``out_dir`` after the last published run,
+  ``published_dirs`` returns ``out_dir`` instead.
+- the version directory starts with the published ``splits.npz``, so an
+  unchanged input keeps its holdout split.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from src.io_utils import file_digest
+from src.pipeline import run, run_config
+from src.registry import RunRegistry, run_id
+
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+
+# Figures live inside each published version.
+FIGURES_SUBDIR = "_figures"
+POINTER = "CURRENT"
+# Published versions kept on disk (the current one plus the one before it, which
+# a reader may still be in the middle of).
+KEEP_VERSIONS = 2
+
+
+class JobCancelled(Exception):
+    """Raised inside a run when its job has been cancelled."""
+
+
+def job_key(rid: str, out_dir: str | Path, figures_dir: str | Path) -> str:
+    return f"{rid}:{Path(out_dir).resolve()}:{Path(figures_dir).resolve()}"
+
+
+class Job:
+    """State of one submitted pipeline run; safe to read from other threads."""
+
+    def __init__(self, key: str, run_id: str, data_digest: str, params: dict[str, Any]) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.run_id = run_id
+        self.data_digest = data_digest
+        self.params = params
+        self.state = "queued"
+        self.stage: str | None = None
+        self.progress = 0.0
+        self.result: dict | None = None
+        self.error: str | None = None
+        self.submitted_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.state in ("queued", "running")
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> bool:
+        """Request cancellation; returns False if the job already finished."""
+        if not self.active:
+            return False
+        self._cancel.set()
+        return True
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until the job finishes; False if ``timeout`` expired first."""
+        return self._finished.wait(timeout)
+
+    def _update(self, **fields: Any) -> None:
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "id": self.id,
+                "run_id": self.run_id,
+                "state": self.state,
+                "stage": self.stage,
+                "progress": self.progress,
+                "error": self.error,
+                "submitted_at": self.submitted_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "cancel_requested": self.cancel_requested,
+            }
+
+
+def versions_dir(out_dir: Path) -> Path:
+    return out_dir.parent / f".{out_dir.name}.versions"
+
+
+def current_version(out_dir: Path) -> Path | None:
+    """The published version directory of ``out_dir``, if any."""
+    root = versions_dir(out_dir)
+    try:
+        name = (root / POINTER).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    version = root / name
+    return version if version.is_dir() else None
+
+
+def published_dirs(out_dir: str | Path, figures_dir: str | Path) -> tuple[Path, Path]:
+    """Directories to read a run's outputs and figures from.
+
+    The published version when there is one, unless a CLI run wrote
+    ``out_dir`` after it was published; otherwise ``out_dir``/``figures_dir``.
+    """
+    out_dir, figures_dir = Path(out_dir), Path(figures_dir)
+    version = current_version(out_dir)
+    if version is None:
+        return out_dir, figures_dir
+    published_at = (versions_dir(out_dir) / POINTER).stat().st_mtime_ns
+    cli_metrics = out_dir / "metrics_overall.json"
+    if cli_metrics.exists() and cli_metrics.stat().st_mtime_ns > published_at:
+        return out_dir, figures_dir
+    return version, version / FIGURES_SUBDIR
+
+
+def publish_version(version: Path, out_dir: Path) -> None:
+    """Point ``CURRENT`` at ``version`` and drop versions no longer kept.
+
+    Only directories under ``versions_dir(out_dir)`` that this module created
+    are ever removed.
+    """
+    root = versions_dir(out_dir)
+    tmp = root / f"{POINTER}.tmp-{uuid.uuid4().hex[:8]}"
+    tmp.write_text(version.name, encoding="utf-8")
+    os.replace(tmp, root / POINTER)
+    for old in sorted(root.glob("v-*"))[:-KEEP_VERSIONS]:
+        if old != version:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+class JobRunner:
+    """Runs ``pipeline.run`` jobs one at a time on a background thread."""
+
+    def __init__(self, registry: RunRegistry | None = None) -> None:
+        self.registry = registry
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline-job")
+        self._lock = threading.Lock()
+        self._jobs: dict[str, Job] = {}
+
+    def submit(
+        self,
+        input_path: str,
+        out_dir: str = "outputs",
+        figures_dir: str = "reports/figures",
+        **run_kwargs: Any,
+    ) -> Job:
+        """Queue a run, or return the active job with the same inputs/settings."""
+        digest = file_digest(input_path)
+        rid = run_id(digest, run_config(**run_kwargs))
+        key = job_key(rid, out_dir, figures_dir)
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and job.active:
+                    return job
+            params = {
+                "input_path": input_path,
+                "out_dir": out_dir,
+                "figures_dir": figures_dir,
+                **run_kwargs,
+            }
+            job = Job(key, rid, digest, params)
+            self._jobs[job.id] = job
+        self._executor.submit(self._execute, job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> list[Job]:
+        """All jobs, newest first."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda j: j.submitted_at, reverse=True)
+
+    def active(self) -> list[Job]:
+        return [job for job in self.jobs() if job.active]
+
+    def shutdown(self, wait: bool = True) -> None:
+        for job in self.active():
+            job.cancel()
+        self._executor.shutdown(wait=wait)
+
+    def _execute(self, job: Job) -> None:
+        if job.cancel_requested:
+            job._update(state="cancelled", finished_at=time.time())
+            job._finished.set()
+            return
+        job._update(state="running", started_at=time.time())
+
+        def on_progress(stage: str, fraction: float) -> None:
+            if job.cancel_requested:
+                raise JobCancelled(job.id)
+            job._update(stage=stage, progress=fraction)
+
+        params = dict(job.params)
+        out_dir, fig_dir = Path(params.pop("out_dir")), Path(params.pop("figures_dir"))
+        stage_out = versions_dir(out_dir) / f"building-{job.id}"
+        stage_fig = stage_out / FIGURES_SUBDIR
+        state, error = "failed", None
+        result: dict[str, Any] | None = None
+        try:
+            registry = self.registry
+            entry = registry.get(job.run_id) if registry is not None else None
+            if registry is not None and entry is not None:
+                # Same data and settings ran before: republish, don't retrain.
+                job._update(stage="restore", progress=0.5)
+                registry.restore(job.run_id, stage_out, stage_fig)
+                result = {"restored": True, "primary_model": entry["metrics"]["primary_model"]}
+            else:
+                # Seed the staging dir with the current split so it is reused.
+                live_out, _ = published_dirs(out_dir, fig_dir)
+                if (live_out / "splits.npz").exists():
+                    stage_out.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(live_out / "splits.npz", stage_out / "splits.npz")
+                result = run(
+                    out_dir=str(stage_out),
+                    figures_dir=str(stage_fig),
+                    progress=on_progress,
+                    **params,
+                )
+            if job.cancel_requested:
+                raise JobCancelled(job.id)
+            if registry is not None and entry is None:
+                registry.add(
+                    job.run_id,
+                    run_config(**params),
+                    stage_out,
+                    stage_fig,
+                    data_digest=job.data_digest,
+                    input_name=Path(params["input_path"]).name,
+                )
+            # Rename the finished build into place, then swap the pointer.
+            stage_fig.mkdir(parents=True, exist_ok=True)
+            version = stage_out.with_name(f"v-{time.time_ns():020d}-{job.id}")
+            os.replace(stage_out, version)
+            publish_version(version, out_dir)
+            result.update(
+                out_dir=str(version),
+                figures_dir=str(version / FIGURES_SUBDIR),
+                model_path=str(version / "model.joblib"),
+                run_id=job.run_id,
+            )
+            state = "done"
+        except JobCancelled:
+            state, result = "cancelled", None
+        except Exception as exc:  # surfaced to the UI through the job state
+            result, error = None, f"{type(exc).__name__}: {exc}"
+        finally:
+            shutil.rmtree(stage_out, ignore_errors=True)
+            job._update(state=state, result=result, error=error, finished_at=time.time())
+            job._finished.set()
@@ -24,6 +24,23 @@ def expected_calibration_error(y_true: np.ndarray, proba: np.ndarray, n_bins: in
     return float(ece)
 
 
+def reliability_bins(conf: np.ndarray, correct: np.ndarray, n_bins: int = 10) -> dict:
+    """Mean confidence, accuracy and count of each non-empty confidence bin."""
+    conf = np.asarray(conf, dtype=float)
+    correct = np.asarray(correct, dtype=float)
+    bins = np.linspace(0.0, 1.0, n_bins + 1)
+    out: dict[str, list] = {"confidence": [], "accuracy": [], "count": []}
+    for i in range(n_bins):
+        lo, hi = bins[i], bins[i + 1]
+        mask = (conf > lo) & (conf <= hi) if i > 0 else (conf >= lo) & (conf <= hi)
+        if mask.sum() == 0:
+            continue
+        out["confidence"].append(conf[mask].mean())
+        out["accuracy"].append(correct[mask].mean())
+        out["count"].append(int(mask.sum()))
+    return {k: np.asarray(v) for k, v in out.items()}
+
+
 def multiclass_brier(y_true: np.ndarray, proba: np.ndarray, n_classes: int) -> float:
     y_true = np.asarray(y_true)
     proba = np.asarray(proba)
@@ -68,3 +85,77 @@ def coverage_curve(y_true: np.ndarray, proba: np.ndarray, thresholds: np.ndarray
             }
         )
     return pd.DataFrame(rows)
+
+
+def rolling_window_metrics(
+    times: np.ndarray,
+    y_true: np.ndarray,
+    proba: np.ndarray,
+    threshold: float,
+    window: str | pd.Timedelta | None = None,
+    n_points: int = 50,
+    n_bins: int = 10,
+) -> pd.DataFrame:
+    """Accuracy, ECE and coverage at ``threshold`` over sliding time windows.
+
+    Predictions are sorted by time once and every statistic is read off
+    prefix sums at the window bounds (found by binary search), so the cost is
+    O(n log n + n_points * n_bins) however much the windows overlap. Windows
+    are ``[end - window, end]`` for ``n_points`` evenly spaced ends; the
+    default window is a fifth of the time span. ECE uses the same bins as
+    ``expected_calibration_error``.
+    """
+    t = np.asarray(times, dtype="datetime64[ns]")
+    keep = ~np.isnat(t)
+    order = np.flatnonzero(keep)[np.argsort(t[keep], kind="stable")]
+    t = t[order].astype(np.int64)
+    proba = np.asarray(proba)[order]
+    conf = proba.max(axis=1)
+    correct = (proba.argmax(axis=1) == np.asarray(y_true)[order]).astype(float)
+    covered = (conf >= threshold).astype(float)
+    columns = ["window_start", "window_end", "n", "accuracy", "ece", "coverage", "covered_accuracy"]
+    if len(t) == 0:
+        return pd.DataFrame(columns=columns)
+
+    span = int(t[-1] - t[0])
+    width = pd.Timedelta(window).value if window is not None else max(span // 5, 1)
+    if span > width:
+        # Offsets from the first timestamp keep the float grid exact to the ns.
+        ends = t[0] + np.unique(np.linspace(width, span, n_points).astype(np.int64))
+    else:
+        ends = np.array([t[-1]])
+    hi = np.searchsorted(t, ends, side="right")
+    lo = np.searchsorted(t, ends - width, side="left")
+    n = (hi - lo).astype(float)
+
+    def window_sum(values: np.ndarray) -> np.ndarray:
+        prefix = np.concatenate([[0.0], np.cumsum(values)])
+        return prefix[hi] - prefix[lo]
+
+    # Bin i holds conf in (edge_i, edge_i+1], except bin 0 which also holds 0.
+    edges = np.linspace(0.0, 1.0, n_bins + 1)
+    bin_of = np.searchsorted(edges[1:-1], conf, side="left")
+    gap = np.zeros(len(ends))
+    for b in range(n_bins):
+        rows = np.flatnonzero(bin_of == b)
+        if len(rows) == 0:
+            continue
+        a, z = np.searchsorted(rows, lo), np.searchsorted(rows, hi)
+        pc = np.concatenate([[0.0], np.cumsum(correct[rows])])
+        pf = np.concatenate([[0.0], np.cumsum(conf[rows])])
+        gap += np.abs((pc[z] - pc[a]) - (pf[z] - pf[a]))
+
+    n_covered = window_sum(covered)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = pd.DataFrame(
+            {
+                "window_start": pd.to_datetime(ends - width),
+                "window_end": pd.to_datetime(ends),
+                "n": n.astype(int),
+                "accuracy": window_sum(correct) / n,
+                "ece": gap / n,
+                "coverage": n_covered / n,
+                "covered_accuracy": window_sum(correct * covered) / n_covered,
+            }
+        )
+    return out[out["n"] > 0].reset_index(drop=True)
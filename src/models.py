@@ -3,10 +3,16 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 from sklearn.calibration import CalibratedClassifierCV
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.pipeline import Pipeline
 
-from src.features import FeatureConfig, make_char_vectorizer, make_word_vectorizer
+from src.features import (
+    FeatureConfig,
+    make_char_hasher,
+    make_char_vectorizer,
+    make_word_hasher,
+    make_word_vectorizer,
+)
 
 
 @dataclass(frozen=True)
@@ -14,7 +20,12 @@ class ModelConfig:
     C: float = 3.0
     max_iter: int = 2000
     calibrate: bool = True
-    calibration_method: str = "sigmoid"  # sigmoid or isotonic
+    calibration_method: str = "sigmoid"  # sigmoid, isotonic (or temperature with prefit)
+    # cv: CalibratedClassifierCV(cv=3) refits the pipeline per fold.
+    # prefit: builders return the bare pipeline; the caller fits it once on train
+    # and calibrates it on val with src.calibration.PrefitCalibratedClassifier.
+    calibration_mode: str = "cv"
+    sgd_alpha: float = 1e-5  # L2 strength for the out-of-core SGD models
 
 
 def build_word_model(fcfg: FeatureConfig, mcfg: ModelConfig):
@@ -26,7 +37,7 @@ def build_word_model(fcfg: FeatureConfig, mcfg: ModelConfig):
     )
     return (
         CalibratedClassifierCV(base, method=mcfg.calibration_method, cv=3)
-        if mcfg.calibrate
+        if mcfg.calibrate and mcfg.calibration_mode == "cv"
         else base
     )
 
@@ -40,6 +51,26 @@ def build_char_model(fcfg: FeatureConfig, mcfg: ModelConfig):
     )
     return (
         CalibratedClassifierCV(base, method=mcfg.calibration_method, cv=3)
-        if mcfg.calibrate
+        if mcfg.calibrate and mcfg.calibration_mode == "cv"
         else base
     )
+
+
+# Out-of-core variants: the classifier is trained with ``partial_fit`` on hashed
+# chunks by ``src.streaming`` and calibrated afterwards on the val split.
+def build_hashed_word_model(fcfg: FeatureConfig, mcfg: ModelConfig) -> Pipeline:
+    return Pipeline(
+        [
+            ("hash", make_word_hasher(fcfg)),
+            ("clf", SGDClassifier(loss="log_loss", alpha=mcfg.sgd_alpha)),
+        ]
+    )
+
+
+def build_hashed_char_model(fcfg: FeatureConfig, mcfg: ModelConfig) -> Pipeline:
+    return Pipeline(
+        [
+            ("hash", make_char_hasher(fcfg)),
+            ("clf", SGDClassifier(loss="log_loss", alpha=mcfg.sgd_alpha)),
+        ]
+    )
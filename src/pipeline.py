@@ -1,20 +1,37 @@
 from __future__ import annotations
 
 import argparse
+import inspect
+import time
+import warnings
+from collections.abc import Callable
+from dataclasses import replace
 from pathlib import Path
+from typing import Any
 
 import joblib
 import numpy as np
 import pandas as pd
 from sklearn.metrics import f1_score
 
+from src.calibration import CALIBRATION_METHODS, PrefitCalibratedClassifier
 from src.clean import clean_df
+from src.conformal import conformal_report, prediction_sets
+from src.dedup import DEDUP_MODES, build_index, cluster_stats, representatives
 from src.features import FeatureConfig
-from src.io_utils import read_csv, write_csv, write_json
-from src.metrics import compute_overall, coverage_curve
+from src.io_utils import file_digest, read_csv, write_csv, write_json
+from src.kfold import KFoldConfig, cross_val_oof
+from src.metrics import (
+    compute_overall,
+    coverage_curve,
+    expected_calibration_error,
+    rolling_window_metrics,
+)
 from src.models import ModelConfig, build_char_model, build_word_model
+from src.registry import RunRegistry, run_id
 from src.reporting import plot_confidence_hist, plot_confusion, plot_coverage, plot_reliability
-from src.split import SplitConfig, make_splits
+from src.routing import RoutingConfig, fit_routed_pair, routing_report
+from src.split import SplitConfig, cached_split_indices, parse_times, temporal_split_indices
 
 
 def _encode_labels(y: pd.Series):
@@ -24,76 +41,80 @@ def _encode_labels(y: pd.Series):
     return y.map(mapping).to_numpy(), labels, mapping, inv
 
 
-def run(
-    input_path: str,
-    out_dir: str = "outputs",
-    figures_dir: str = "reports/figures",
-    random_state: int = 42,
-    calibration_method: str = "sigmoid",
-    recommend_target_coverage: float = 0.7,
-) -> dict:
-    out_path = Path(out_dir)
-    out_path.mkdir(parents=True, exist_ok=True)
-    fig_dir = Path(figures_dir)
-    fig_dir.mkdir(parents=True, exist_ok=True)
-
-    df = clean_df(read_csv(input_path))
-    splits = make_splits(df, SplitConfig(random_state=random_state))
-    train, val, test = splits["train"], splits["val"], splits["test"]
-
-    y_train, labels, mapping, inv = _encode_labels(train["label"])
-    y_val = val["label"].map(mapping).to_numpy()
-    y_test = test["label"].map(mapping).to_numpy()
-
-    fcfg = FeatureConfig()
-    mcfg = ModelConfig(calibrate=True, calibration_method=calibration_method)
-
-    word_model = build_word_model(fcfg, mcfg)
-    char_model = build_char_model(fcfg, mcfg)
-
-    word_model.fit(train["text"], y_train)
-    char_model.fit(train["text"], y_train)
-
-    w_val_proba = word_model.predict_proba(val["text"])
-    w_val_pred = w_val_proba.argmax(axis=1)
-    c_val_proba = char_model.predict_proba(val["text"])
-    c_val_pred = c_val_proba.argmax(axis=1)
-
-    w_f1 = float(f1_score(y_val, w_val_pred, average="macro"))
-    c_f1 = float(f1_score(y_val, c_val_pred, average="macro"))
-
-    primary = "word" if w_f1 >= c_f1 else "char"
-    primary_model = word_model if primary == "word" else char_model
-    other_model = char_model if primary == "word" else word_model
-
-    proba = primary_model.predict_proba(test["text"])
-    pred = proba.argmax(axis=1)
-    conf = proba.max(axis=1)
-
-    other_pred = other_model.predict_proba(test["text"]).argmax(axis=1)
-    disagree = pred != other_pred
-
-    overall = compute_overall(y_test, pred, proba, labels)
-    overall.update(
-        {
-            "primary_model": primary,
-            "val_macro_f1_word": w_f1,
-            "val_macro_f1_char": c_f1,
-        }
-    )
-
-    thresholds = np.linspace(0.0, 0.99, 40)
-    curve = coverage_curve(y_test, proba, thresholds)
-
-    cand = curve[curve["coverage"] >= recommend_target_coverage].dropna()
+def _proba_full(model, texts: np.ndarray, n_classes: int) -> np.ndarray:
+    # A label absent from train (possible with a temporal split) gets zero probability.
+    proba = model.predict_proba(texts)
+    if proba.shape[1] == n_classes:
+        return proba
+    full = np.zeros((len(proba), n_classes))
+    full[:, model.classes_] = proba
+    return full
+
+
+def _time_range(times: np.ndarray) -> list[str]:
+    return [str(times.min()), str(times.max())]
+
+
+def label_counts(labels: np.ndarray) -> dict:
+    return pd.Series(labels).value_counts().to_dict()
+
+
+def _fit_pair(
+    fcfg: FeatureConfig,
+    mcfg: ModelConfig,
+    train_text: np.ndarray,
+    y_train: np.ndarray,
+    val_text: np.ndarray,
+    y_val: np.ndarray,
+):
+    """Fit the word/char models; returns both plus wall-clock training seconds."""
+    start = time.perf_counter()
+    models = []
+    for build in (build_word_model, build_char_model):
+        model = build(fcfg, mcfg).fit(train_text, y_train)
+        if mcfg.calibrate and mcfg.calibration_mode == "prefit":
+            model = PrefitCalibratedClassifier(model, mcfg.calibration_method)
+            model.fit(val_text, y_val)
+        models.append(model)
+    return models[0], models[1], time.perf_counter() - start
+
+
+# holdout: train/val/test split; kfold: pooled out-of-fold predictions;
+# temporal: train on rows before a generation_date cutoff, test on rows after.
+EVAL_MODES = ("holdout", "kfold", "temporal")
+# cv: CalibratedClassifierCV(cv=3); prefit: fit once on train, calibrate on val.
+CALIBRATION_MODES = ("cv", "prefit")
+# threshold: max-probability cut-off from the coverage curve; conformal:
+# split-conformal prediction sets calibrated on val (abstain unless one label).
+ABSTENTION_MODES = ("threshold", "conformal")
+
+# Stage name -> fraction of the run completed when the stage starts; run()
+# reports each one to its optional ``progress`` callback.
+PIPELINE_STAGES = {
+    "load": 0.0,
+    "dedup": 0.05,
+    "train": 0.15,
+    "evaluate": 0.8,
+    "save": 0.9,
+    "done": 1.0,
+}
+
+ProgressCallback = Callable[[str, float], None]
+
+# Threshold grid swept for the coverage curve / recommended abstention policy.
+THRESHOLDS = np.linspace(0.0, 0.99, 40)
+
+
+def recommend_policy(curve: pd.DataFrame, target_coverage: float) -> dict:
+    cand = curve[curve["coverage"] >= target_coverage].dropna()
     if len(cand) == 0:
         rec = curve.dropna().iloc[-1]
     else:
         rec = cand.sort_values(["accuracy", "coverage"], ascending=[False, False]).iloc[0]
 
-    policy = {
+    return {
         "recommended_threshold": float(rec["threshold"]),
-        "target_coverage": float(recommend_target_coverage),
+        "target_coverage": float(target_coverage),
         "estimated_coverage": float(rec["coverage"]),
         "estimated_accuracy": float(rec["accuracy"]),
         "estimated_macro_f1": float(rec["macro_f1"]),
@@ -103,46 +124,131 @@ def run(
         ),
     }
 
-    # Save
-    proba_df = pd.DataFrame(proba, columns=[f"p_{lab}" for lab in labels])
-    out_pred = pd.concat([test.reset_index(drop=True)[["text", "label"]], proba_df], axis=1)
-    out_pred["pred_label"] = [inv[i] for i in pred]
-    out_pred["confidence"] = conf
+
+def predictions_frame(
+    rows: pd.DataFrame,
+    proba: np.ndarray,
+    labels: list[str],
+    disagree: np.ndarray,
+    sets: np.ndarray | None = None,
+) -> pd.DataFrame:
+    out_pred = rows.reset_index(drop=True)
+    for j, lab in enumerate(labels):
+        out_pred[f"p_{lab}"] = proba[:, j]
+    out_pred["pred_label"] = [labels[i] for i in proba.argmax(axis=1)]
+    out_pred["confidence"] = proba.max(axis=1)
     out_pred["disagree_word_char"] = disagree.astype(int)
-    write_csv(out_pred, out_path / "test_predictions.csv")
+    if sets is not None:
+        names = np.asarray(labels, dtype=object)
+        out_pred["prediction_set"] = ["|".join(names[row]) for row in sets]
+        out_pred["set_size"] = sets.sum(axis=1)
+    return out_pred
+
+
+def save_report(
+    out_path: Path,
+    fig_dir: Path,
+    y_test: np.ndarray,
+    proba: np.ndarray,
+    overall: dict,
+    curve: pd.DataFrame,
+    policy: dict,
+    split_summary: dict,
+    bundle: dict,
+) -> None:
+    """Write the report-card JSON/CSV artifacts, the model bundle, and figures."""
     write_csv(curve, out_path / "coverage_curve.csv")
-
-    split_summary = {
-        "n_total": int(len(df)),
-        "n_train": int(len(train)),
-        "n_val": int(len(val)),
-        "n_test": int(len(test)),
-        "label_counts_total": df["label"].value_counts().to_dict(),
-        "label_counts_train": train["label"].value_counts().to_dict(),
-        "label_counts_val": val["label"].value_counts().to_dict(),
-        "label_counts_test": test["label"].value_counts().to_dict(),
-        "labels": labels,
-    }
     write_json(split_summary, out_path / "splits_summary.json")
     write_json(overall, out_path / "metrics_overall.json")
     write_json(policy, out_path / "abstention_policy.json")
-
-    # Persist the fitted models + label order + threshold for live inference
-    # (see src/inference.py and the dashboard Triage tab).
-    bundle = {
-        "primary_model": primary_model,
-        "other_model": other_model,
-        "labels": labels,
-        "threshold": float(rec["threshold"]),
-        "primary_name": primary,
-    }
     joblib.dump(bundle, out_path / "model.joblib", compress=3)
 
+    labels = bundle["labels"]
     plot_confusion(np.array(overall["confusion_matrix"]), labels, fig_dir / "confusion_matrix.png")
     plot_reliability(y_test, proba, fig_dir / "reliability_diagram.png")
     plot_coverage(curve, fig_dir / "coverage_vs_accuracy.png")
     plot_confidence_hist(proba, fig_dir / "probability_histograms.png")
 
+
+def evaluate_pair(
+    y_eval: np.ndarray,
+    labels: list[str],
+    w_proba: np.ndarray,
+    c_proba: np.ndarray,
+    w_f1: float,
+    c_f1: float,
+    score_prefix: str = "val",
+) -> dict:
+    """Pick the primary model by ``{score_prefix}`` macro-F1 and score it.
+
+    Returns the primary name (``"word"``/``"char"``), its evaluation
+    probabilities, the word/char disagreement mask and the overall metrics.
+    """
+    primary = "word" if w_f1 >= c_f1 else "char"
+    proba, other = (w_proba, c_proba) if primary == "word" else (c_proba, w_proba)
+    pred = proba.argmax(axis=1)
+    overall = compute_overall(y_eval, pred, proba, labels)
+    overall.update(
+        {
+            "primary_model": primary,
+            f"{score_prefix}_macro_f1_word": w_f1,
+            f"{score_prefix}_macro_f1_char": c_f1,
+        }
+    )
+    return {
+        "primary": primary,
+        "proba": proba,
+        "disagree": pred != other.argmax(axis=1),
+        "overall": overall,
+    }
+
+
+def write_report_card(
+    out_path: Path,
+    fig_dir: Path,
+    eval_rows: pd.DataFrame,
+    y_eval: np.ndarray,
+    evaluation: dict,
+    labels: list[str],
+    curve: pd.DataFrame,
+    policy: dict,
+    split_summary: dict,
+    models: dict[str, Any],
+    sets: np.ndarray | None = None,
+    bundle_extra: dict | None = None,
+) -> dict:
+    """Write predictions, the model bundle and the report card; return the run result.
+
+    ``evaluation`` is ``evaluate_pair``'s result and ``models`` maps ``"word"``
+    and ``"char"`` to the fitted models.
+    """
+    proba, primary = evaluation["proba"], evaluation["primary"]
+    out_pred = predictions_frame(eval_rows, proba, labels, evaluation["disagree"], sets)
+    write_csv(out_pred, out_path / "test_predictions.csv")
+
+    # Persist the fitted models + label order + threshold for live inference
+    # (see src/inference.py and the dashboard Triage tab).
+    primary_model = models[primary]
+    bundle = {
+        "primary_model": primary_model,
+        "other_model": models["char" if primary == "word" else "word"],
+        # The labels the served models can predict, in predict_proba column order.
+        "labels": [labels[c] for c in primary_model.classes_],
+        "threshold": policy["recommended_threshold"],
+        "primary_name": primary,
+        **(bundle_extra or {}),
+    }
+    save_report(
+        out_path,
+        fig_dir,
+        y_eval,
+        proba,
+        evaluation["overall"],
+        curve,
+        policy,
+        split_summary,
+        bundle,
+    )
     return {
         "out_dir": str(out_path),
         "figures_dir": str(fig_dir),
@@ -153,6 +259,389 @@ def run(
     }
 
 
+def print_summary(res: dict, headline: str = "Reliability report card created.") -> None:
+    """Print a run result (``run`` or ``src.incremental.run_incremental``)."""
+    print(f"\nDone! {headline}", flush=True)
+    print(f"Outputs: {res['out_dir']}", flush=True)
+    print(f"Figures: {res['figures_dir']}", flush=True)
+    print(f"Primary model: {res['primary_model']}", flush=True)
+    print(
+        f"Recommended threshold: {res['policy']['recommended_threshold']:.2f} "
+        f"(coverage≈{res['policy']['estimated_coverage']:.2f})\n",
+        flush=True,
+    )
+
+
+def run(
+    input_path: str,
+    out_dir: str = "outputs",
+    figures_dir: str = "reports/figures",
+    random_state: int = 42,
+    calibration_method: str = "sigmoid",
+    recommend_target_coverage: float = 0.7,
+    dedup: str = "report",
+    eval_mode: str = "holdout",
+    n_folds: int = 5,
+    cache_dir: str | None = None,
+    calibration_mode: str = "cv",
+    compare_calibration: bool = False,
+    time_column: str = "generation_date",
+    temporal_cutoff: str | None = None,
+    rolling_window: str | None = None,
+    abstention: str = "threshold",
+    conformal_alpha: float = 0.1,
+    route_languages: bool = False,
+    route_min_rows: int = 60,
+    progress: ProgressCallback | None = None,
+) -> dict:
+    """Train, evaluate and write the report card.
+
+    ``eval_mode="temporal"`` splits on ``time_column`` at ``temporal_cutoff``
+    (default: the last ``test_size`` share of rows is the test split) and also
+    writes ``rolling_metrics.csv``: accuracy, ECE and coverage at the
+    recommended threshold over sliding ``rolling_window`` windows of the test
+    rows (e.g. ``"1D"``; default a fifth of the test period).
+
+    ``abstention="conformal"`` calibrates split-conformal prediction sets at
+    miscoverage ``conformal_alpha`` on the val split (see ``src.conformal``):
+    the quantile goes into the bundle, the sets into ``test_predictions.csv``
+    and their test coverage / size stats into ``metrics_overall.json``.
+
+    ``route_languages=True`` fits word/char models per language with at least
+    ``route_min_rows`` train rows plus global fallbacks (see ``src.routing``)
+    and records per-language calibration and routing latency under
+    ``language_routing`` in ``metrics_overall.json``.
+
+    ``progress(stage, fraction)`` is called as each of ``PIPELINE_STAGES``
+    starts; an exception raised by the callback aborts the run.
+    """
+
+    def notify(stage: str) -> None:
+        if progress is not None:
+            progress(stage, PIPELINE_STAGES[stage])
+
+    if dedup not in DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode: {dedup}")
+    if eval_mode not in EVAL_MODES:
+        raise ValueError(f"Unknown eval mode: {eval_mode}")
+    if calibration_mode not in CALIBRATION_MODES:
+        raise ValueError(f"Unknown calibration mode: {calibration_mode}")
+    if calibration_mode == "cv" and calibration_method == "temperature":
+        raise ValueError("Temperature scaling needs --calibration-mode prefit.")
+    if eval_mode == "kfold" and (calibration_mode == "prefit" or compare_calibration):
+        raise ValueError(
+            "Prefit calibration needs a val split (eval_mode 'holdout' or 'temporal')."
+        )
+    if abstention not in ABSTENTION_MODES:
+        raise ValueError(f"Unknown abstention mode: {abstention}")
+    if eval_mode == "kfold" and abstention == "conformal":
+        raise ValueError(
+            "Conformal abstention needs a val split (eval_mode 'holdout' or 'temporal')."
+        )
+    if abstention == "conformal" and calibration_mode == "prefit":
+        # Prefit calibration is fitted on the val rows, so their scores are no
+        # longer exchangeable with test scores and the 1 - alpha bound fails.
+        raise ValueError("Conformal abstention needs --calibration-mode cv (prefit fits on val).")
+    if eval_mode == "kfold" and route_languages:
+        raise ValueError("Language routing needs a val split (eval_mode 'holdout' or 'temporal').")
+    out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+    fig_dir = Path(figures_dir)
+    fig_dir.mkdir(parents=True, exist_ok=True)
+
+    notify("load")
+    df = clean_df(read_csv(input_path))
+    rcfg = RoutingConfig(min_rows=route_min_rows)
+    if route_languages and rcfg.language_column not in df:
+        raise ValueError(f"Language routing needs a '{rcfg.language_column}' column.")
+
+    # Near-duplicate clusters: reported always (unless "off"), used as split
+    # groups in "group" mode, and collapsed to one row each in "drop" mode.
+    dup_stats: dict | None = None
+    groups = None
+    if dedup != "off":
+        notify("dedup")
+        index = build_index(df["text"])
+        clusters = index.clusters()
+        dup_stats = {**cluster_stats(clusters), "jaccard": "exact" if index.exact else "estimated"}
+        if dedup == "drop":
+            keep = representatives(clusters)
+            df, clusters = df[keep].reset_index(drop=True), clusters[keep]
+            dup_stats["n_dropped"] = int((~keep).sum())
+        df = df.assign(dup_cluster=clusters)
+        groups = clusters if dedup == "group" else None
+
+    fcfg = FeatureConfig()
+    mcfg = ModelConfig(
+        calibrate=True, calibration_method=calibration_method, calibration_mode=calibration_mode
+    )
+    calib_report: dict = {"calibration_mode": calibration_mode}
+    notify("train")
+
+    if eval_mode == "kfold":
+        # Every row is scored out-of-fold; the served models are refit on all rows.
+        y_eval, labels, _, _ = _encode_labels(df["label"])
+        kcfg = KFoldConfig(n_splits=n_folds, cache_dir=cache_dir)
+        start = time.perf_counter()
+        cv = cross_val_oof(
+            df["text"].to_numpy(), y_eval, len(labels), fcfg, mcfg, kcfg, random_state, groups
+        )
+        calib_report["train_seconds"] = time.perf_counter() - start
+        word_model, char_model = cv["word_model"], cv["char_model"]
+        w_proba, c_proba = cv["word_oof"], cv["char_oof"]
+        w_f1 = float(f1_score(y_eval, w_proba.argmax(axis=1), average="macro"))
+        c_f1 = float(f1_score(y_eval, c_proba.argmax(axis=1), average="macro"))
+        eval_rows = df[["text", "label"]].assign(fold=cv["fold"])
+        if dup_stats is not None:
+            part_clusters, part_ids = df["dup_cluster"].to_numpy(), cv["fold"]
+
+        split_summary = {
+            "n_total": int(len(df)),
+            "n_folds": int(n_folds),
+            "fold_sizes": np.bincount(cv["fold"]).tolist(),
+            "label_counts_total": df["label"].value_counts().to_dict(),
+            "labels": labels,
+        }
+    else:
+        # Row positions into ``df``; columns are indexed as arrays, never copied
+        # as frames. The holdout split is reused from ``splits.npz`` while the
+        # data and split settings are unchanged.
+        scfg = SplitConfig(random_state=random_state)
+        if eval_mode == "temporal":
+            idx, splits_reused = (
+                temporal_split_indices(df, scfg, time_column, temporal_cutoff),
+                False,
+            )
+        else:
+            idx, splits_reused = cached_split_indices(
+                df, scfg, out_path / "splits.npz", groups=groups
+            )
+        tr, va, te = idx["train"], idx["val"], idx["test"]
+        texts, label_col = df["text"].to_numpy(), df["label"].to_numpy()
+
+        # Labels come from every row so val/test may hold labels train lacks.
+        y_all, labels, _, _ = _encode_labels(df["label"])
+        y_train, y_val, y_eval = y_all[tr], y_all[va], y_all[te]
+        n_classes = len(labels)
+
+        if route_languages:
+            lang_col = df[rcfg.language_column].fillna("unknown").astype(str).to_numpy()
+            word_model, char_model, train_seconds, routing_summary = fit_routed_pair(
+                fcfg, mcfg, rcfg, texts[tr], y_train, lang_col[tr], texts[va], y_val, lang_col[va]
+            )
+        else:
+            word_model, char_model, train_seconds = _fit_pair(
+                fcfg, mcfg, texts[tr], y_train, texts[va], y_val
+            )
+        calib_report["train_seconds"] = train_seconds
+        if calibration_method == "temperature" and isinstance(
+            word_model, PrefitCalibratedClassifier
+        ):
+            # Val rows whose label train lacks cannot enter temperature scaling.
+            calib_report["calibration_rows_dropped"] = word_model.n_unknown_labels_
+
+        w_val = _proba_full(word_model, texts[va], n_classes)
+        c_val = _proba_full(char_model, texts[va], n_classes)
+
+        w_f1 = float(f1_score(y_val, w_val.argmax(axis=1), average="macro"))
+        c_f1 = float(f1_score(y_val, c_val.argmax(axis=1), average="macro"))
+
+        w_proba = _proba_full(word_model, texts[te], n_classes)
+        c_proba = _proba_full(char_model, texts[te], n_classes)
+        eval_rows = pd.DataFrame({"text": texts[te], "label": label_col[te]})
+
+        if compare_calibration:
+            # Fit the pair again under the other mode to price the trade-off.
+            alt_mode = "cv" if calibration_mode == "prefit" else "prefit"
+            alt_method = "sigmoid" if calibration_method == "temperature" else calibration_method
+            alt_cfg = replace(mcfg, calibration_mode=alt_mode, calibration_method=alt_method)
+            alt_word, alt_char, alt_seconds = _fit_pair(
+                fcfg, alt_cfg, texts[tr], y_train, texts[va], y_val
+            )
+            calib_report["calibration_comparison"] = {
+                calibration_mode: {
+                    "train_seconds": train_seconds,
+                    "ece_word": expected_calibration_error(y_eval, w_proba),
+                    "ece_char": expected_calibration_error(y_eval, c_proba),
+                },
+                alt_mode: {
+                    "calibration_method": alt_method,
+                    "train_seconds": alt_seconds,
+                    "ece_word": expected_calibration_error(
+                        y_eval, _proba_full(alt_word, texts[te], n_classes)
+                    ),
+                    "ece_char": expected_calibration_error(
+                        y_eval, _proba_full(alt_char, texts[te], n_classes)
+                    ),
+                },
+            }
+
+        split_summary = {
+            "n_total": int(len(df)),
+            "n_train": int(len(tr)),
+            "n_val": int(len(va)),
+            "n_test": int(len(te)),
+            "label_counts_total": df["label"].value_counts().to_dict(),
+            "label_counts_train": label_counts(label_col[tr]),
+            "label_counts_val": label_counts(label_col[va]),
+            "label_counts_test": label_counts(label_col[te]),
+            "labels": labels,
+            "splits_reused": splits_reused,
+        }
+        if eval_mode == "temporal":
+            times = parse_times(df[time_column])
+            eval_times = times[te]
+            split_summary["temporal"] = {
+                "time_column": time_column,
+                "cutoff": str(eval_times.min()),
+                "train_range": _time_range(times[tr]),
+                "val_range": _time_range(times[va]),
+                "test_range": _time_range(eval_times),
+                "n_untimed": int(len(df) - len(tr) - len(va) - len(te)),
+                "labels_missing_from_train": sorted(set(labels) - set(label_col[tr])),
+            }
+            missing = split_summary["temporal"]["labels_missing_from_train"]
+            n_missing = int(np.isin(label_col[te], missing).sum())
+            # The models never predict these labels, so every test row carrying
+            # one is an error in accuracy, F1 and the coverage curve.
+            if n_missing and n_missing == len(te):
+                raise ValueError(
+                    f"Temporal split: every test row has a label absent from train "
+                    f"({', '.join(missing)}), so no metric would be meaningful. "
+                    "Move the cutoff later or pick another time column."
+                )
+            if n_missing:
+                warnings.warn(
+                    f"Temporal split: test labels absent from train ({', '.join(missing)}) "
+                    f"are never predicted; {n_missing} test rows count as errors. "
+                    "Move the cutoff later to train on them.",
+                    stacklevel=2,
+                )
+        if dup_stats is not None:
+            part_clusters = df["dup_cluster"].to_numpy()[np.concatenate([tr, va, te])]
+            part_ids = np.repeat(["train", "val", "test"], [len(tr), len(va), len(te)])
+
+    notify("evaluate")
+    # "val_*" scores come from the val split (holdout) or pooled out-of-fold
+    # predictions (kfold); either way they only drive primary-model selection.
+    score_prefix = "oof" if eval_mode == "kfold" else "val"
+    evaluation = evaluate_pair(y_eval, labels, w_proba, c_proba, w_f1, c_f1, score_prefix)
+    primary, proba, overall = evaluation["primary"], evaluation["proba"], evaluation["overall"]
+    primary_model = word_model if primary == "word" else char_model
+    overall.update({"eval_mode": eval_mode, **calib_report})
+    comparison = overall.get("calibration_comparison")
+    if comparison is not None:
+        cmp_cv, cmp_prefit = comparison["cv"], comparison["prefit"]
+        comparison["prefit_speedup"] = cmp_cv["train_seconds"] / max(
+            cmp_prefit["train_seconds"], 1e-9
+        )
+        comparison["prefit_minus_cv_ece"] = cmp_prefit[f"ece_{primary}"] - cmp_cv[f"ece_{primary}"]
+
+    if route_languages:
+        overall["language_routing"] = {
+            **routing_summary,
+            **routing_report(primary_model, texts[te], y_eval, lang_col[te], proba),
+        }
+        eval_rows = eval_rows.assign(route=primary_model.routes(texts[te]))
+
+    curve = coverage_curve(y_eval, proba, THRESHOLDS)
+    policy = recommend_policy(curve, recommend_target_coverage)
+    sets = None
+    if abstention == "conformal":
+        val_proba = w_val if primary == "word" else c_val
+        conformal = conformal_report(y_val, val_proba, y_eval, proba, conformal_alpha)
+        sets = prediction_sets(proba, conformal["quantile"])
+        overall["conformal"] = conformal
+        policy.update(
+            {
+                "mode": "conformal",
+                "conformal_alpha": conformal["alpha"],
+                "conformal_quantile": conformal["quantile"],
+                "conformal_rule": (
+                    "abstain unless exactly one label has 1 - p(label) <= conformal_quantile"
+                ),
+            }
+        )
+    if eval_mode == "temporal":
+        rolling = rolling_window_metrics(
+            eval_times, y_eval, proba, policy["recommended_threshold"], rolling_window
+        )
+        write_csv(rolling, out_path / "rolling_metrics.csv")
+        overall["temporal"] = {
+            "cutoff": split_summary["temporal"]["cutoff"],
+            "window": str(
+                (rolling["window_end"].iloc[0] - rolling["window_start"].iloc[0]).round("s")
+            ),
+            "n_windows": int(len(rolling)),
+            "accuracy_first_window": float(rolling["accuracy"].iloc[0]),
+            "accuracy_last_window": float(rolling["accuracy"].iloc[-1]),
+        }
+        missing = split_summary["temporal"]["labels_missing_from_train"]
+        if missing:
+            seen = ~np.isin(label_col[te], missing)
+            overall["temporal"].update(
+                {
+                    "labels_missing_from_train": missing,
+                    "test_rows_missing_from_train": int((~seen).sum()),
+                    # accuracy restricted to test rows whose label train covers
+                    "accuracy_on_train_labels": float(
+                        np.mean(proba[seen].argmax(axis=1) == y_eval[seen])
+                    ),
+                }
+            )
+
+    # Save
+    notify("save")
+    if dup_stats is not None:
+        spanning = cluster_stats(part_clusters, part_ids)
+        split_summary["near_duplicates"] = {
+            **dup_stats,
+            "mode": dedup,
+            "clusters_spanning_splits": spanning["clusters_spanning_splits"],
+        }
+
+    bundle_extra = None
+    if abstention == "conformal":
+        bundle_extra = {
+            "conformal": {
+                "alpha": overall["conformal"]["alpha"],
+                "quantile": overall["conformal"]["quantile"],
+            }
+        }
+    result = write_report_card(
+        out_path,
+        fig_dir,
+        eval_rows,
+        y_eval,
+        evaluation,
+        labels,
+        curve,
+        policy,
+        split_summary,
+        {"word": word_model, "char": char_model},
+        sets=sets,
+        bundle_extra=bundle_extra,
+    )
+    notify("done")
+
+    return {
+        **result,
+        **({"temporal": overall["temporal"]} if eval_mode == "temporal" else {}),
+        **({"language_routing": overall["language_routing"]} if route_languages else {}),
+    }
+
+
+# Paths, caches and callbacks do not change what a run produces.
+_NON_CONFIG_PARAMS = ("input_path", "out_dir", "figures_dir", "cache_dir", "progress")
+
+
+def run_config(**run_kwargs) -> dict:
+    """``run``'s result-affecting settings with defaults filled in."""
+    bound = inspect.signature(run).bind_partial(**run_kwargs)
+    bound.apply_defaults()
+    return {k: v for k, v in bound.arguments.items() if k not in _NON_CONFIG_PARAMS}
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Detector Reliability Report Card pipeline")
     parser.add_argument("--input", required=True, help="Path to CSV")
@@ -162,8 +651,19 @@ def main() -> None:
     parser.add_argument(
         "--calibration",
         default="sigmoid",
-        choices=["sigmoid", "isotonic"],
-        help="Calibration method",
+        choices=list(CALIBRATION_METHODS),
+        help="Calibration method (temperature requires --calibration-mode prefit)",
+    )
+    parser.add_argument(
+        "--calibration-mode",
+        default="cv",
+        choices=list(CALIBRATION_MODES),
+        help="cv: CalibratedClassifierCV(cv=3); prefit: fit once on train, calibrate on val",
+    )
+    parser.add_argument(
+        "--compare-calibration",
+        action="store_true",
+        help="Also fit the other calibration mode and report train time / ECE for both",
     )
     parser.add_argument(
         "--target-coverage",
@@ -171,26 +671,129 @@ def main() -> None:
         default=0.7,
         help="Target coverage for recommended threshold",
     )
+    parser.add_argument(
+        "--dedup",
+        default="report",
+        choices=list(DEDUP_MODES),
+        help="Near-duplicate handling: off, report stats, group-aware split, or drop",
+    )
+    parser.add_argument(
+        "--eval-mode",
+        default="holdout",
+        choices=list(EVAL_MODES),
+        help=(
+            "Single train/val/test split, pooled out-of-fold k-fold evaluation, "
+            "or a train-before/test-after split on --time-column"
+        ),
+    )
+    parser.add_argument("--folds", type=int, default=5, help="Number of folds (kfold mode)")
+    parser.add_argument(
+        "--time-column",
+        default="generation_date",
+        help="Timestamp column for --eval-mode temporal",
+    )
+    parser.add_argument(
+        "--temporal-cutoff",
+        default=None,
+        help="Rows at or after this timestamp form the test split (temporal mode)",
+    )
+    parser.add_argument(
+        "--rolling-window",
+        default=None,
+        help="Rolling-metrics window, e.g. 1D or 30min (temporal mode; default span/5)",
+    )
+    parser.add_argument(
+        "--abstention",
+        default="threshold",
+        choices=list(ABSTENTION_MODES),
+        help="Max-probability threshold policy or split-conformal prediction sets (needs val)",
+    )
+    parser.add_argument(
+        "--conformal-alpha",
+        type=float,
+        default=0.1,
+        help="Conformal miscoverage: sets hold the true label with probability >= 1 - alpha",
+    )
+    parser.add_argument(
+        "--route-languages",
+        action="store_true",
+        help="Fit per-language word/char models (plus a global fallback) and route by language",
+    )
+    parser.add_argument(
+        "--route-min-rows",
+        type=int,
+        default=60,
+        help="Train rows a language needs for its own models (--route-languages)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Cache fold predictions and fits here so re-runs skip refitting (kfold mode)",
+    )
+    parser.add_argument(
+        "--registry",
+        default=None,
+        help="Also record the run (artifacts + index entry) in this run registry, e.g. runs",
+    )
     args = parser.parse_args()
 
-    res = run(
-        input_path=args.input,
-        out_dir=args.out,
-        figures_dir=args.figures,
+    settings = dict(
         random_state=args.seed,
         calibration_method=args.calibration,
         recommend_target_coverage=args.target_coverage,
+        dedup=args.dedup,
+        eval_mode=args.eval_mode,
+        n_folds=args.folds,
+        calibration_mode=args.calibration_mode,
+        compare_calibration=args.compare_calibration,
+        time_column=args.time_column,
+        temporal_cutoff=args.temporal_cutoff,
+        rolling_window=args.rolling_window,
+        abstention=args.abstention,
+        conformal_alpha=args.conformal_alpha,
+        route_languages=args.route_languages,
+        route_min_rows=args.route_min_rows,
     )
-
-    print("\nDone! Reliability report card created.", flush=True)
-    print(f"Outputs: {res['out_dir']}", flush=True)
-    print(f"Figures: {res['figures_dir']}", flush=True)
-    print(f"Primary model: {res['primary_model']}", flush=True)
-    print(
-        f"Recommended threshold: {res['policy']['recommended_threshold']:.2f} "
-        f"(coverage≈{res['policy']['estimated_coverage']:.2f})\n",
-        flush=True,
+    res = run(
+        input_path=args.input,
+        out_dir=args.out,
+        figures_dir=args.figures,
+        cache_dir=args.cache_dir,
+        **settings,
     )
+    if args.registry:
+        digest = file_digest(args.input)
+        config = run_config(**settings)
+        rid = run_id(digest, config)
+        RunRegistry(args.registry).add(
+            rid, config, args.out, args.figures, digest, Path(args.input).name
+        )
+        print(f"Registered run {rid} in {args.registry}", flush=True)
+
+    print_summary(res)
+    if "conformal_quantile" in res["policy"]:
+        print(
+            f"Conformal quantile: {res['policy']['conformal_quantile']:.3f} "
+            f"(alpha={res['policy']['conformal_alpha']:.2f})\n",
+            flush=True,
+        )
+    temporal = res.get("temporal", {})
+    if temporal.get("labels_missing_from_train"):
+        print(
+            f"Warning: test labels absent from train "
+            f"({', '.join(temporal['labels_missing_from_train'])}) are never predicted "
+            f"({temporal['test_rows_missing_from_train']} test rows); accuracy on the "
+            f"other test rows is {temporal['accuracy_on_train_labels']:.3f}\n",
+            flush=True,
+        )
+    routing = res.get("language_routing")
+    if routing is not None:
+        print(
+            f"Routed languages: {', '.join(routing['languages']) or 'none'} "
+            f"(others use the global models; routing overhead "
+            f"{routing['routing_overhead']:+.0%})\n",
+            flush=True,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,167 @@
+"""Run registry: keep every run's artifacts for side-by-side comparison.
+
+``pipeline.run`` overwrites ``outputs/`` and ``reports/figures/``, so comparing
+calibration methods or datasets used to mean retraining back and forth. The
+registry copies each finished run into ``runs/<run_id>/`` where the run id is
+a hash of the input data's content and the run configuration, so the same
+data + settings always map to the same run and never train twice.
+
+Layout::
+
+    runs/index.json            compact list of runs (config + headline metrics)
+    runs/<run_id>/outputs/     report-card artifacts and model.joblib
+    runs/<run_id>/figures/     figures
+    runs/<run_id>/curves.npz   coverage curve + reliability bins for overlays
+    runs/uploads/<hash>.csv    uploaded inputs, stored once per content hash
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.metrics import reliability_bins
+
+RUN_ARTIFACTS = (
+    "metrics_overall.json",
+    "abstention_policy.json",
+    "splits_summary.json",
+    "splits.npz",
+    "test_predictions.csv",
+    "coverage_curve.csv",
+    "rolling_metrics.csv",
+    "model.joblib",
+)
+RUN_FIGURES = (
+    "confusion_matrix.png",
+    "reliability_diagram.png",
+    "coverage_vs_accuracy.png",
+    "probability_histograms.png",
+)
+
+
+def run_id(data_digest: str, config: dict) -> str:
+    payload = data_digest + json.dumps(config, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=6).hexdigest()
+
+
+def _copy_files(src_dir: Path, dst_dir: Path, names: tuple[str, ...]) -> None:
+    dst_dir.mkdir(parents=True, exist_ok=True)
+    for name in names:
+        if (src_dir / name).exists():
+            shutil.copy2(src_dir / name, dst_dir / name)
+
+
+def curve_arrays(out_dir: str | Path) -> dict[str, Any]:
+    """Coverage curve and reliability bins of a run's output directory."""
+    out = Path(out_dir)
+    curve = pd.read_csv(out / "coverage_curve.csv")
+    preds = pd.read_csv(out / "test_predictions.csv", usecols=["label", "pred_label", "confidence"])
+    rel = reliability_bins(
+        preds["confidence"].to_numpy(), (preds["pred_label"] == preds["label"]).to_numpy()
+    )
+    arrays: dict[str, Any] = {f"curve_{c}": curve[c].to_numpy(dtype=float) for c in curve.columns}
+    arrays.update({f"reliability_{k}": v for k, v in rel.items()})
+    return arrays
+
+
+def describe_run(entry: dict[str, Any]) -> str:
+    """One-line label for an index entry."""
+    cfg = entry["config"]
+    return (
+        f"{entry['run_id']} · {entry['input_name'] or 'input'} · "
+        f"{cfg.get('calibration_mode', 'cv')}/{cfg.get('calibration_method')} · "
+        f"acc {entry['metrics']['accuracy']:.3f}"
+    )
+
+
+class RunRegistry:
+    """Run store under ``root`` with a JSON index; safe to share across threads."""
+
+    def __init__(self, root: str | Path = "runs") -> None:
+        self.root = Path(root)
+        self.index_path = self.root / "index.json"
+        self._lock = threading.Lock()
+
+    def entries(self) -> list[dict]:
+        """Index entries, newest first."""
+        if not self.index_path.exists():
+            return []
+        entries = json.loads(self.index_path.read_text(encoding="utf-8"))
+        return sorted(entries, key=lambda e: e["created_at"], reverse=True)
+
+    def get(self, rid: str) -> dict | None:
+        return next((e for e in self.entries() if e["run_id"] == rid), None)
+
+    def run_dir(self, rid: str) -> Path:
+        return self.root / rid
+
+    def add(
+        self,
+        rid: str,
+        config: dict,
+        out_dir: str | Path,
+        figures_dir: str | Path,
+        data_digest: str,
+        input_name: str = "",
+    ) -> dict:
+        """Copy a finished run's artifacts into the registry and index it."""
+        out_dir, figures_dir = Path(out_dir), Path(figures_dir)
+        dest = self.run_dir(rid)
+        _copy_files(out_dir, dest / "outputs", RUN_ARTIFACTS)
+        _copy_files(figures_dir, dest / "figures", RUN_FIGURES)
+        np.savez(dest / "curves.npz", **curve_arrays(out_dir))
+
+        metrics = json.loads((out_dir / "metrics_overall.json").read_text(encoding="utf-8"))
+        policy = json.loads((out_dir / "abstention_policy.json").read_text(encoding="utf-8"))
+        entry = {
+            "run_id": rid,
+            "created_at": time.time(),
+            "input_name": input_name,
+            "data_digest": data_digest,
+            "config": config,
+            "metrics": {
+                k: metrics[k] for k in ("accuracy", "macro_f1", "ece", "brier", "primary_model")
+            },
+            "recommended_threshold": policy["recommended_threshold"],
+            "estimated_coverage": policy["estimated_coverage"],
+        }
+        with self._lock:
+            entries = [e for e in self.entries() if e["run_id"] != rid] + [entry]
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self.index_path.with_suffix(".json.tmp")
+            tmp.write_text(
+                json.dumps(entries, separators=(",", ":"), default=str), encoding="utf-8"
+            )
+            os.replace(tmp, self.index_path)
+        return entry
+
+    def restore(self, rid: str, out_dir: str | Path, figures_dir: str | Path) -> None:
+        """Copy a stored run's artifacts into ``out_dir``/``figures_dir``."""
+        dest = self.run_dir(rid)
+        _copy_files(dest / "outputs", Path(out_dir), RUN_ARTIFACTS)
+        _copy_files(dest / "figures", Path(figures_dir), RUN_FIGURES)
+
+    def curves(self, rid: str) -> dict[str, np.ndarray]:
+        with np.load(self.run_dir(rid) / "curves.npz") as arrays:
+            return {k: arrays[k] for k in arrays.files}
+
+    def store_upload(self, data: bytes, suffix: str = ".csv") -> Path:
+        """Persist uploaded bytes once per content hash; returns the stored path."""
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        path = self.root / "uploads" / f"{digest}{suffix}"
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        return path
@@ -6,6 +6,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from src.metrics import reliability_bins
+
 
 def plot_confusion(cm: np.ndarray, labels: list[str], out_path: Path) -> None:
     plt.figure(figsize=(6, 5))
@@ -29,18 +31,9 @@ def plot_confusion(cm: np.ndarray, labels: list[str], out_path: Path) -> None:
 def plot_reliability(
     y_true: np.ndarray, proba: np.ndarray, out_path: Path, n_bins: int = 10
 ) -> None:
-    conf = proba.max(axis=1)
-    pred = proba.argmax(axis=1)
-    correct = (pred == y_true).astype(float)
-    bins = np.linspace(0.0, 1.0, n_bins + 1)
-    bin_acc, bin_conf = [], []
-    for i in range(n_bins):
-        lo, hi = bins[i], bins[i + 1]
-        mask = (conf > lo) & (conf <= hi) if i > 0 else (conf >= lo) & (conf <= hi)
-        if mask.sum() == 0:
-            continue
-        bin_acc.append(correct[mask].mean())
-        bin_conf.append(conf[mask].mean())
+    correct = proba.argmax(axis=1) == y_true
+    rel = reliability_bins(proba.max(axis=1), correct, n_bins)
+    bin_conf, bin_acc = rel["confidence"], rel["accuracy"]
     plt.figure(figsize=(6, 6))
     plt.plot([0, 1], [0, 1], linestyle="--")
     plt.plot(bin_conf, bin_acc, marker="o")
@@ -0,0 +1,275 @@
+"""Language-routed word/char models with a global fallback.
+
+The global models share one 60k-feature vocabulary across every script in the
+data, so Latin, Arabic and Devanagari n-grams compete for the same slots. With
+routing, every language that has at least ``min_rows`` train rows (and at least
+``CV_FOLDS`` rows of each label) gets its own word and char models; the global
+models are still fitted on all train rows and serve every other language. Each
+model carries its own calibration: its CalibratedClassifierCV folds, or (prefit)
+a calibration map fitted on that language's val rows. A language whose val
+slice is too small for that (the same ``min_rows``/``CV_FOLDS`` checks) has its
+map fitted on all val rows instead, like the global models.
+
+At serving time a ``LanguageRouter`` (multinomial naive Bayes over hashed char
+n-grams of the first ``router_chars`` characters of each text after
+``normalize_text``, trained on the ``language`` column) picks a language per
+text. ``LanguageRoutedModel`` then scores each language's texts as one batch
+with its model and scatters the probabilities back into input order, so it is
+a drop-in ``predict_proba`` model for ``src.inference.predict_texts``. All
+models are fitted in parallel with joblib.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.naive_bayes import MultinomialNB
+
+from src.calibration import PrefitCalibratedClassifier
+from src.features import FeatureConfig
+from src.inference import normalize_text
+from src.metrics import expected_calibration_error
+from src.models import ModelConfig, build_char_model, build_word_model
+
+# Route of texts whose language has no model of its own.
+FALLBACK = "*"
+# Rows of every label a language needs for CalibratedClassifierCV(cv=3).
+CV_FOLDS = 3
+# Texts ``routing_report`` times scoring on; latency is per text, so a sample will do.
+LATENCY_SAMPLE = 1000
+
+
+@dataclass(frozen=True)
+class RoutingConfig:
+    language_column: str = "language"
+    min_rows: int = 60  # train rows a language needs for its own models
+    router_chars: int = 300  # leading characters the router looks at
+    router_features: int = 2**18
+    n_jobs: int = -1
+
+
+class LanguageRouter:
+    """Predict a text's language from hashed char 1-3-grams of its opening."""
+
+    def __init__(self, chars: int = 300, n_features: int = 2**18) -> None:
+        self.chars = chars
+        self.vectorizer = HashingVectorizer(
+            lowercase=True,
+            analyzer="char",
+            ngram_range=(1, 3),
+            n_features=n_features,
+            alternate_sign=False,
+            norm=None,
+        )
+        self.classifier = MultinomialNB(alpha=0.1)
+
+    def _features(self, texts: Any) -> Any:
+        # Truncate after normalization, so texts sharing a prediction cache key
+        # (``normalize_text``) always take the same route.
+        return self.vectorizer.transform([normalize_text(t)[: self.chars] for t in texts])
+
+    def fit(self, texts: Any, languages: Any) -> LanguageRouter:
+        self.classifier.fit(self._features(texts), np.asarray(languages, dtype=str))
+        return self
+
+    def predict(self, texts: Any) -> np.ndarray:
+        if len(texts) == 0:
+            return np.array([], dtype=str)
+        return self.classifier.predict(self._features(texts))
+
+
+class LanguageRoutedModel:
+    """``predict_proba`` over per-language models, falling back to a global one."""
+
+    def __init__(self, router: LanguageRouter, models: dict[str, Any], fallback: Any) -> None:
+        self.router = router
+        self.models = models
+        self.fallback = fallback
+
+    @property
+    def classes_(self) -> np.ndarray:
+        return np.asarray(self.fallback.classes_)
+
+    def routes(self, texts: Any) -> np.ndarray:
+        """Language per text, or ``FALLBACK`` where it has no model of its own."""
+        langs = self.router.predict(texts)
+        return np.where(np.isin(langs, list(self.models)), langs, FALLBACK)
+
+    def groups(self, texts: Any) -> list[tuple[Any, np.ndarray]]:
+        """``(model, positions)`` for each route taken by ``texts``."""
+        routes = self.routes(texts)
+        return [
+            (self.models.get(route, self.fallback), np.flatnonzero(routes == route))
+            for route in np.unique(routes)
+        ]
+
+    def predict_proba(self, texts: Any) -> np.ndarray:
+        texts = np.asarray(texts, dtype=object)
+        proba = np.zeros((len(texts), len(self.classes_)))
+        for model, idx in self.groups(texts):
+            # A language model may lack a label the global model knows.
+            cols = np.searchsorted(self.classes_, model.classes_)
+            proba[np.ix_(idx, cols)] = model.predict_proba(texts[idx])
+        return proba
+
+    def predict(self, texts: Any) -> np.ndarray:
+        return self.classes_[self.predict_proba(texts).argmax(axis=1)]
+
+
+def _enough_rows(y_slice: np.ndarray, labels: np.ndarray, min_rows: int) -> bool:
+    """At least ``min_rows`` rows, and ``CV_FOLDS`` of every label in ``labels``."""
+    counts = np.bincount(y_slice, minlength=int(labels.max()) + 1)
+    return bool(counts.sum() >= min_rows and counts[labels].min() >= CV_FOLDS)
+
+
+def routed_languages(languages: np.ndarray, y: np.ndarray, cfg: RoutingConfig) -> list[str]:
+    """Languages with enough train rows, of every label, for their own models."""
+    labels = np.unique(y)
+    return [
+        str(lang)
+        for lang in np.unique(languages)
+        if _enough_rows(y[languages == lang], labels, cfg.min_rows)
+    ]
+
+
+def _fit_model(
+    kind: str,
+    fcfg: FeatureConfig,
+    mcfg: ModelConfig,
+    train_text: np.ndarray,
+    y_train: np.ndarray,
+    val_text: np.ndarray,
+    y_val: np.ndarray,
+) -> Any:
+    build = build_word_model if kind == "word" else build_char_model
+    model = build(fcfg, mcfg).fit(train_text, y_train)
+    if mcfg.calibrate and mcfg.calibration_mode == "prefit":
+        model = PrefitCalibratedClassifier(model, mcfg.calibration_method).fit(val_text, y_val)
+    return model
+
+
+def fit_routed_pair(
+    fcfg: FeatureConfig,
+    mcfg: ModelConfig,
+    cfg: RoutingConfig,
+    train_text: np.ndarray,
+    y_train: np.ndarray,
+    lang_train: np.ndarray,
+    val_text: np.ndarray,
+    y_val: np.ndarray,
+    lang_val: np.ndarray,
+) -> tuple[LanguageRoutedModel, LanguageRoutedModel, float, dict]:
+    """Fit routed word/char models; returns both, training seconds and a summary.
+
+    The global and per-language word/char fits run as parallel joblib jobs.
+    Prefit calibration of a language model uses that language's val rows, or
+    all val rows when the language's slice fails the ``min_rows``/``CV_FOLDS``
+    checks (listed as ``val_fallback_languages`` in the summary).
+    """
+    start = time.perf_counter()
+    lang_train, lang_val = lang_train.astype(str), lang_val.astype(str)
+    languages = routed_languages(lang_train, y_train, cfg)
+    val_fallback = []
+    if mcfg.calibrate and mcfg.calibration_mode == "prefit":
+        labels = np.unique(y_train)
+        val_fallback = [
+            lang
+            for lang in languages
+            if not _enough_rows(y_val[lang_val == lang], labels, cfg.min_rows)
+        ]
+    scopes: list[str | None] = [None, *languages]
+    kinds = ("word", "char")
+    jobs = []
+    for scope in scopes:
+        tr = slice(None) if scope is None else lang_train == scope
+        va = slice(None) if scope is None or scope in val_fallback else lang_val == scope
+        jobs += [
+            delayed(_fit_model)(
+                kind, fcfg, mcfg, train_text[tr], y_train[tr], val_text[va], y_val[va]
+            )
+            for kind in kinds
+        ]
+    fitted = Parallel(n_jobs=cfg.n_jobs)(jobs)
+    router = LanguageRouter(cfg.router_chars, cfg.router_features).fit(train_text, lang_train)
+
+    pair = []
+    for k in range(len(kinds)):
+        models = {lang: fitted[2 * (i + 1) + k] for i, lang in enumerate(languages)}
+        pair.append(LanguageRoutedModel(router, models, fitted[k]))
+    summary = {
+        "language_column": cfg.language_column,
+        "min_rows": cfg.min_rows,
+        "languages": languages,
+        "fallback_languages": sorted(set(lang_train) - set(languages)),
+        "val_fallback_languages": val_fallback,
+        "train_rows": {str(k): int(v) for k, v in Counter(lang_train.tolist()).most_common()},
+    }
+    return pair[0], pair[1], time.perf_counter() - start, summary
+
+
+def _timed(fn: Any, *args: Any, repeats: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def routing_report(
+    model: LanguageRoutedModel,
+    texts: np.ndarray,
+    y: np.ndarray,
+    languages: np.ndarray,
+    proba: np.ndarray,
+) -> dict:
+    """Per-language calibration of the routed model against its global fallback.
+
+    ``proba`` is the routed model's (full-width) test probabilities. Latency
+    compares routing + grouped scoring with the global model alone on the same
+    texts (best of three runs), timed on at most ``LATENCY_SAMPLE`` test texts.
+    """
+    languages = languages.astype(str)
+    predicted = model.router.predict(texts)
+    global_proba = np.zeros_like(proba)
+    global_proba[:, model.fallback.classes_] = model.fallback.predict_proba(texts)
+    per_language = {}
+    for lang in np.unique(languages):
+        rows = languages == lang
+        y_l, routed, glob = y[rows], proba[rows], global_proba[rows]
+        per_language[str(lang)] = {
+            "n": int(rows.sum()),
+            "own_model": str(lang) in model.models,
+            "router_accuracy": float(np.mean(predicted[rows] == lang)),
+            "accuracy": float(np.mean(routed.argmax(axis=1) == y_l)),
+            "ece": expected_calibration_error(y_l, routed),
+            "global_accuracy": float(np.mean(glob.argmax(axis=1) == y_l)),
+            "global_ece": expected_calibration_error(y_l, glob),
+        }
+    sample = texts
+    if len(texts) > LATENCY_SAMPLE:
+        rng = np.random.default_rng(0)
+        sample = texts[np.sort(rng.choice(len(texts), LATENCY_SAMPLE, replace=False))]
+    n = max(len(sample), 1)
+    router_s = _timed(model.routes, sample)
+    routed_s = _timed(model.predict_proba, sample)
+    global_s = _timed(model.fallback.predict_proba, sample)
+    return {
+        "router_accuracy": float(np.mean(predicted == languages)),
+        "global_ece": expected_calibration_error(y, global_proba),
+        "global_accuracy": float(np.mean(global_proba.argmax(axis=1) == y)),
+        "per_language": per_language,
+        "latency_ms_per_text": {
+            "router": 1000.0 * router_s / n,
+            "routed": 1000.0 * routed_s / n,
+            "global": 1000.0 * global_s / n,
+        },
+        "latency_sample_size": len(sample),
+        "routing_overhead": routed_s / max(global_s, 1e-9) - 1.0,
+    }
@@ -0,0 +1,277 @@
+"""Dependency-light scorer compiled from the persisted model bundle.
+
+Scoring ``outputs/model.joblib`` imports all of scikit-learn and walks
+``CalibratedClassifierCV`` -> ``Pipeline`` -> ``TfidfVectorizer`` ->
+``LogisticRegression`` for every fold of both models on each call. A compiled
+scorer (written by ``src.export --scorer``) is a directory with two files:
+
+- ``scorer.json``: labels, threshold, analyzer settings and vocabularies;
+- ``scorer.npz``: per-fold IDF vectors, coefficients, intercepts and
+  calibration parameters, all float64.
+
+``load_scorer`` rebuilds a bundle dict whose models only need NumPy/SciPy, so
+it is a drop-in for ``src.inference.predict_texts``. Each model tokenizes a
+text once over the union vocabulary of its folds; the analyzers, sublinear TF,
+L2 normalization and calibration maps replicate scikit-learn exactly.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.special import expit, softmax
+
+SCORER_FORMAT = 1
+
+# scikit-learn's char analyzer collapses runs of whitespace before slicing.
+_WHITE_SPACES = re.compile(r"\s\s+")
+
+
+def word_ngrams(text: str, token_pattern: re.Pattern[str], ngram_range: tuple[int, int]) -> list:
+    """Word n-grams as produced by ``TfidfVectorizer(analyzer="word")``."""
+    tokens = token_pattern.findall(text)
+    min_n, max_n = ngram_range
+    grams = list(tokens) if min_n == 1 else []
+    for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+        grams.extend(" ".join(tokens[i : i + n]) for i in range(len(tokens) - n + 1))
+    return grams
+
+
+def char_ngrams(text: str, ngram_range: tuple[int, int]) -> list:
+    """Character n-grams as produced by ``TfidfVectorizer(analyzer="char")``."""
+    text = _WHITE_SPACES.sub(" ", text)
+    min_n, max_n = ngram_range
+    grams: list[str] = []
+    for n in range(min_n, min(max_n, len(text)) + 1):
+        grams.extend(text[i : i + n] for i in range(len(text) - n + 1))
+    return grams
+
+
+def apply_calibration(scores: np.ndarray, cal: dict, n_classes: int) -> np.ndarray:
+    """Map decision scores (n, n_out) to class probabilities, like sklearn does."""
+    if cal["method"] == "temperature":
+        logits = scores
+        if scores.shape[1] == 1:
+            logits = np.column_stack([np.zeros(len(scores)), scores[:, 0]])
+        return softmax(logits / cal["temperature"], axis=1)
+
+    if cal["method"] == "sigmoid":
+        cols = expit(scores * cal["a"] + cal["b"])
+    else:
+        cols = np.column_stack(
+            [
+                np.interp(scores[:, j], x, y)
+                for j, (x, y) in enumerate(zip(cal["x"], cal["y"], strict=True))
+            ]
+        )
+    if n_classes == 2:
+        proba = np.column_stack([1.0 - cols[:, 0], cols[:, 0]])
+    else:
+        denom = cols.sum(axis=1, keepdims=True)
+        proba = np.divide(cols, denom, out=np.full_like(cols, 1.0 / n_classes), where=denom != 0)
+    proba[(proba > 1.0) & (proba <= 1.0 + 1e-5)] = 1.0
+    return proba
+
+
+class CompiledTextModel:
+    """Word or char TF-IDF + linear model ensemble evaluated with NumPy/SciPy.
+
+    ``idf`` is (n_folds, n_terms) with zeros for terms outside a fold's own
+    vocabulary, ``coef`` holds one (n_terms, n_out) CSR matrix per fold, and
+    fold probabilities are averaged like ``CalibratedClassifierCV`` does.
+    """
+
+    def __init__(
+        self,
+        analyzer: dict,
+        vocabulary: dict[str, int],
+        idf: np.ndarray,
+        coef: list[sp.csr_matrix],
+        intercept: np.ndarray,
+        calibration: list[dict],
+        n_classes: int,
+    ) -> None:
+        self.analyzer = analyzer
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.coef = coef
+        self.intercept = intercept
+        self.calibration = calibration
+        self.n_classes = n_classes
+        self.classes_ = np.arange(n_classes)
+        self._token_pattern = re.compile(analyzer["token_pattern"])
+        self._ngram_range = (int(analyzer["ngram_range"][0]), int(analyzer["ngram_range"][1]))
+
+    def _analyze(self, text: str) -> list:
+        if self.analyzer["lowercase"]:
+            text = text.lower()
+        if self.analyzer["kind"] == "char":
+            return char_ngrams(text, self._ngram_range)
+        return word_ngrams(text, self._token_pattern, self._ngram_range)
+
+    def counts(self, texts: Any) -> sp.csr_matrix:
+        """Raw term counts over the union vocabulary (float64 CSR)."""
+        vocab = self.vocabulary
+        indptr = [0]
+        indices: list[int] = []
+        data: list[int] = []
+        for text in texts:
+            counter = Counter(vocab[g] for g in self._analyze(text) if g in vocab)
+            indices.extend(counter.keys())
+            data.extend(counter.values())
+            indptr.append(len(indices))
+        X = sp.csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), indptr),
+            shape=(len(indptr) - 1, len(vocab)),
+        )
+        X.sort_indices()
+        return X
+
+    def fold_features(self, texts: Any) -> list[sp.csr_matrix]:
+        """Per-fold TF-IDF rows over the union vocabulary."""
+        counts = self.counts(texts)
+        if self.analyzer["sublinear_tf"]:
+            np.log(counts.data, out=counts.data)
+            counts.data += 1.0
+        out = []
+        for f in range(len(self.coef)):
+            X = counts.copy()
+            X.data *= self.idf[f][X.indices]
+            norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+            norms[norms == 0.0] = 1.0
+            X.data /= np.repeat(norms, np.diff(X.indptr))
+            out.append(X)
+        return out
+
+    def terms(self) -> np.ndarray:
+        names = np.empty(len(self.vocabulary), dtype=object)
+        for term, col in self.vocabulary.items():
+            names[col] = term
+        return names
+
+    def decision_scores(self, texts: Any) -> list[np.ndarray]:
+        return [
+            (X @ coef).toarray() + self.intercept[f]
+            for f, (X, coef) in enumerate(zip(self.fold_features(texts), self.coef, strict=True))
+        ]
+
+    def predict_proba(self, texts: Any) -> np.ndarray:
+        scores = self.decision_scores(texts)
+        proba = np.zeros((scores[0].shape[0], self.n_classes))
+        for s, cal in zip(scores, self.calibration, strict=True):
+            proba += apply_calibration(s, cal, self.n_classes)
+        return proba / len(scores)
+
+    def predict(self, texts: Any) -> np.ndarray:
+        return self.predict_proba(texts).argmax(axis=1)
+
+
+def _model_arrays(name: str, model: CompiledTextModel) -> dict[str, np.ndarray]:
+    arrays = {f"{name}/idf": model.idf, f"{name}/intercept": model.intercept}
+    for f, (coef, cal) in enumerate(zip(model.coef, model.calibration, strict=True)):
+        arrays[f"{name}/{f}/coef_data"] = coef.data
+        arrays[f"{name}/{f}/coef_indices"] = coef.indices
+        arrays[f"{name}/{f}/coef_indptr"] = coef.indptr
+        if cal["method"] == "sigmoid":
+            arrays[f"{name}/{f}/cal_a"] = np.asarray(cal["a"], dtype=float)
+            arrays[f"{name}/{f}/cal_b"] = np.asarray(cal["b"], dtype=float)
+        elif cal["method"] == "isotonic":
+            for j, (x, y) in enumerate(zip(cal["x"], cal["y"], strict=True)):
+                arrays[f"{name}/{f}/cal_x{j}"] = x
+                arrays[f"{name}/{f}/cal_y{j}"] = y
+    return arrays
+
+
+def save_scorer(bundle: dict[str, Any], out_dir: str | Path) -> Path:
+    """Write a compiled bundle (``CompiledTextModel`` models) to ``out_dir``."""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    meta: dict[str, Any] = {
+        "format": SCORER_FORMAT,
+        "labels": list(bundle["labels"]),
+        "threshold": float(bundle["threshold"]),
+        "primary_name": bundle["primary_name"],
+        "models": {},
+    }
+    if "conformal" in bundle:
+        meta["conformal"] = {k: float(v) for k, v in bundle["conformal"].items()}
+    arrays: dict[str, Any] = {}
+    for key in ("primary_model", "other_model"):
+        model: CompiledTextModel = bundle[key]
+        terms = [""] * len(model.vocabulary)
+        for term, col in model.vocabulary.items():
+            terms[col] = term
+        meta["models"][key] = {
+            "analyzer": model.analyzer,
+            "terms": terms,
+            "n_classes": model.n_classes,
+            "n_out": int(model.intercept.shape[1]),
+            "calibration": [
+                {"method": c["method"], "temperature": c.get("temperature")}
+                for c in model.calibration
+            ],
+        }
+        arrays.update(_model_arrays(key, model))
+    (out / "scorer.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    np.savez(out / "scorer.npz", **arrays)
+    return out
+
+
+def load_scorer(path: str | Path) -> dict[str, Any]:
+    """Load a compiled scorer as a bundle usable by ``predict_texts``."""
+    path = Path(path)
+    meta = json.loads((path / "scorer.json").read_text(encoding="utf-8"))
+    if meta.get("format") != SCORER_FORMAT:
+        raise ValueError(f"Unsupported scorer format: {meta.get('format')}")
+    bundle: dict[str, Any] = {
+        "labels": meta["labels"],
+        "threshold": meta["threshold"],
+        "primary_name": meta["primary_name"],
+    }
+    if "conformal" in meta:
+        bundle["conformal"] = meta["conformal"]
+    with np.load(path / "scorer.npz") as arrays:
+        for key, m in meta["models"].items():
+            n_terms = len(m["terms"])
+            coefs, calibration = [], []
+            for f, cal in enumerate(m["calibration"]):
+                coefs.append(
+                    sp.csr_matrix(
+                        (
+                            arrays[f"{key}/{f}/coef_data"],
+                            arrays[f"{key}/{f}/coef_indices"],
+                            arrays[f"{key}/{f}/coef_indptr"],
+                        ),
+                        shape=(n_terms, m["n_out"]),
+                    )
+                )
+                if cal["method"] == "sigmoid":
+                    cal = {
+                        "method": "sigmoid",
+                        "a": arrays[f"{key}/{f}/cal_a"],
+                        "b": arrays[f"{key}/{f}/cal_b"],
+                    }
+                elif cal["method"] == "isotonic":
+                    n_maps = 1 if m["n_classes"] == 2 else m["n_classes"]
+                    cal = {
+                        "method": "isotonic",
+                        "x": [arrays[f"{key}/{f}/cal_x{j}"] for j in range(n_maps)],
+                        "y": [arrays[f"{key}/{f}/cal_y{j}"] for j in range(n_maps)],
+                    }
+                calibration.append(cal)
+            bundle[key] = CompiledTextModel(
+                analyzer=m["analyzer"],
+                vocabulary={term: i for i, term in enumerate(m["terms"])},
+                idf=arrays[f"{key}/idf"],
+                coef=coefs,
+                intercept=arrays[f"{key}/intercept"],
+                calibration=calibration,
+                n_classes=m["n_classes"],
+            )
+    return bundle
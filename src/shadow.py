@@ -0,0 +1,406 @@
+"""Shadow evaluation of a candidate bundle on live traffic.
+
+Before a new ``model.joblib`` is promoted it can run in shadow next to the
+serving bundle: ``ShadowScorer.score`` returns the live decisions (the same
+dicts as ``src.inference.predict_texts``) and scores the same texts with the
+candidate, accumulating the comparison in ``ShadowStats`` streaming counters.
+``ShadowScorer.report`` turns them into a promotion report: agreement rate,
+abstain-rate delta, confidence shift and label transitions, checked against
+``PromotionCriteria``.
+
+Calling ``predict_texts`` for both bundles would tokenize every text once per
+calibration fold of each of the four models. Instead, models whose TF-IDF
+vectorizers share analyzer settings (word with word, char with char) are
+featurized together: n-grams are counted once over the union of their
+vocabularies, each distinct TF-IDF matrix is built once (folds with the same
+vocabulary and IDF share it), and only the sparse products and calibration
+maps run per fold. Models that do not fit this layout (hashing, compiled or
+language-routed models, mismatched settings) are scored with their own
+``predict_proba``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+
+from src.clean import clean_df, detect_columns, detect_text_column
+from src.export import model_folds
+from src.inference import decide, load_bundle
+from src.io_utils import iter_csv_chunks, write_json
+from src.scorer import apply_calibration
+
+MODEL_KEYS = ("primary_model", "other_model")
+# Settings that only shape the fitted vocabulary; the joint counter fixes it.
+_VOCAB_PARAMS = ("vocabulary", "max_df", "min_df", "max_features", "dtype")
+# |shadow - live| confidence above this counts as a large shift.
+LARGE_SHIFT = 0.1
+
+
+@dataclass(frozen=True)
+class PromotionCriteria:
+    min_samples: int = 500
+    min_agreement: float = 0.9
+    max_abstain_rate_increase: float = 0.02
+    max_mean_confidence_drop: float = 0.02
+
+
+def feature_signature(vec: Any) -> tuple | None:
+    """Hashable analyzer settings of a TF-IDF vectorizer, or None if unsupported."""
+    if not isinstance(vec, TfidfVectorizer) or vec.norm != "l2":
+        return None
+    params = vec.get_params()
+    names = sorted(set(CountVectorizer().get_params()) - set(_VOCAB_PARAMS))
+    return (*((k, repr(params[k])) for k in names), ("sublinear_tf", bool(vec.sublinear_tf)))
+
+
+@dataclass
+class _SharedGroup:
+    # One n-gram count per text over the union vocabulary of the group's models;
+    # ``idf`` holds each distinct fold IDF over those columns (0 outside a fold).
+    counter: CountVectorizer
+    sublinear_tf: bool
+    idf: list[np.ndarray]
+
+    def matrices(self, texts: list[str]) -> list[sp.csr_matrix]:
+        counts = sp.csr_matrix(self.counter.transform(texts), dtype=np.float64)
+        if self.sublinear_tf:
+            np.log(counts.data, out=counts.data)
+            counts.data += 1.0
+        out = []
+        for idf in self.idf:
+            X = counts.copy()
+            X.data *= idf[X.indices]
+            norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+            norms[norms == 0.0] = 1.0
+            X.data /= np.repeat(norms, np.diff(X.indptr))
+            out.append(X)
+        return out
+
+
+@dataclass
+class _SharedModel:
+    group: int
+    # (matrix index, joint-column coefficients, intercept, calibration) per fold
+    folds: list[tuple[int, sp.csr_matrix, np.ndarray, dict]]
+    n_classes: int
+
+    def predict_proba(self, matrices: list[sp.csr_matrix]) -> np.ndarray:
+        proba = np.zeros((matrices[0].shape[0], self.n_classes))
+        for m, coef, intercept, cal in self.folds:
+            scores = (matrices[m] @ coef).toarray() + intercept
+            proba += apply_calibration(scores, cal, self.n_classes)
+        return proba / len(self.folds)
+
+
+def _model_folds(model: Any) -> tuple[tuple, list[dict]] | None:
+    try:
+        folds = model_folds(model)
+    except ValueError:
+        return None
+    sigs = {feature_signature(f["vectorizer"]) for f in folds}
+    sig = sigs.pop()
+    if sigs or sig is None:
+        return None
+    return sig, folds
+
+
+def build_shared(
+    bundles: list[dict[str, Any]],
+) -> tuple[list[_SharedGroup], dict[tuple[int, str], _SharedModel]]:
+    """Joint featurization plan for the models of ``bundles``.
+
+    Returns the shared groups and, per ``(bundle index, model key)`` that
+    fits, the model's fold heads over its group's columns.
+    """
+    by_sig: dict[tuple, list[tuple[int, str, list[dict], int]]] = {}
+    for b, bundle in enumerate(bundles):
+        for key in MODEL_KEYS:
+            found = _model_folds(bundle[key])
+            if found is not None:
+                sig, folds = found
+                by_sig.setdefault(sig, []).append((b, key, folds, len(bundle[key].classes_)))
+
+    groups: list[_SharedGroup] = []
+    models: dict[tuple[int, str], _SharedModel] = {}
+    for members in by_sig.values():
+        vocabulary: dict[str, int] = {}
+        for _, _, folds, _ in members:
+            for f in folds:
+                for term in f["vectorizer"].vocabulary_:
+                    vocabulary.setdefault(term, len(vocabulary))
+        vec0 = members[0][2][0]["vectorizer"]
+        params = {k: v for k, v in vec0.get_params().items() if k in CountVectorizer().get_params()}
+        params.update(vocabulary=vocabulary, max_features=None, min_df=1, max_df=1.0)
+
+        idfs: list[np.ndarray] = []
+        idf_index: dict[bytes, int] = {}
+        for b, key, folds, n_classes in members:
+            heads = []
+            for f in folds:
+                vec = f["vectorizer"]
+                local = np.fromiter(vec.vocabulary_.values(), dtype=np.int64)
+                cols = np.fromiter((vocabulary[t] for t in vec.vocabulary_), dtype=np.int64)
+                idf = np.zeros(len(vocabulary))
+                idf[cols] = vec.idf_[local] if vec.use_idf else 1.0
+                digest = hashlib.blake2b(idf.tobytes(), digest_size=16).digest()
+                if digest not in idf_index:
+                    idf_index[digest] = len(idfs)
+                    idfs.append(idf)
+                coef = np.zeros((len(vocabulary), f["coef"].shape[0]))
+                coef[cols] = f["coef"][:, local].T
+                heads.append(
+                    (idf_index[digest], sp.csr_matrix(coef), f["intercept"], f["calibration"])
+                )
+            models[(b, key)] = _SharedModel(len(groups), heads, n_classes)
+        groups.append(_SharedGroup(CountVectorizer(**params), bool(vec0.sublinear_tf), idfs))
+    return groups, models
+
+
+class ShadowStats:
+    """Streaming counters comparing live and shadow decisions on the same texts."""
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.batches = 0
+        self.seconds = 0.0
+        self.agree = 0
+        self.live_abstain = 0
+        self.shadow_abstain = 0
+        self.auto_to_abstain = 0
+        self.abstain_to_auto = 0
+        self.both_auto = 0
+        self.both_auto_agree = 0
+        self.conf_shift_sum = 0.0
+        self.conf_shift_sq = 0.0
+        self.conf_shift_abs = 0.0
+        self.large_shift = 0
+        self.transitions: Counter[tuple[str, str]] = Counter()
+        self.labeled = 0
+        self.live_correct = 0
+        self.shadow_correct = 0
+
+    def update(
+        self,
+        live: list[dict[str, Any]],
+        shadow: list[dict[str, Any]],
+        true_labels: list[str] | None = None,
+        seconds: float = 0.0,
+    ) -> None:
+        self.batches += 1
+        self.seconds += seconds
+        for i, (a, b) in enumerate(zip(live, shadow, strict=True)):
+            self.n += 1
+            same = a["pred_label"] == b["pred_label"]
+            self.agree += same
+            self.live_abstain += a["abstain"]
+            self.shadow_abstain += b["abstain"]
+            self.auto_to_abstain += not a["abstain"] and b["abstain"]
+            self.abstain_to_auto += a["abstain"] and not b["abstain"]
+            if not a["abstain"] and not b["abstain"]:
+                self.both_auto += 1
+                self.both_auto_agree += same
+            shift = b["confidence"] - a["confidence"]
+            self.conf_shift_sum += shift
+            self.conf_shift_sq += shift * shift
+            self.conf_shift_abs += abs(shift)
+            self.large_shift += abs(shift) > LARGE_SHIFT
+            self.transitions[(a["pred_label"], b["pred_label"])] += 1
+            if true_labels is not None:
+                self.labeled += 1
+                self.live_correct += a["pred_label"] == true_labels[i]
+                self.shadow_correct += b["pred_label"] == true_labels[i]
+
+    def merge(self, other: ShadowStats) -> None:
+        """Add another instance's counts (e.g. from a second worker)."""
+        for name, value in vars(other).items():
+            if name == "transitions":
+                self.transitions.update(value)
+            else:
+                setattr(self, name, getattr(self, name) + value)
+
+    def summary(self) -> dict[str, Any]:
+        n = max(self.n, 1)
+        mean = self.conf_shift_sum / n
+        live_pred, shadow_pred = Counter[str](), Counter[str]()
+        for (a, b), count in self.transitions.items():
+            live_pred[a] += count
+            shadow_pred[b] += count
+        out: dict[str, Any] = {
+            "n": self.n,
+            "batches": self.batches,
+            "seconds": self.seconds,
+            "agreement_rate": self.agree / n,
+            "auto_agreement_rate": self.both_auto_agree / max(self.both_auto, 1),
+            "live_abstain_rate": self.live_abstain / n,
+            "shadow_abstain_rate": self.shadow_abstain / n,
+            "abstain_rate_delta": (self.shadow_abstain - self.live_abstain) / n,
+            "auto_to_abstain_rate": self.auto_to_abstain / n,
+            "abstain_to_auto_rate": self.abstain_to_auto / n,
+            "confidence_shift": {
+                "mean": mean,
+                "std": float(np.sqrt(max(self.conf_shift_sq / n - mean * mean, 0.0))),
+                "mean_abs": self.conf_shift_abs / n,
+                f"share_over_{LARGE_SHIFT}": self.large_shift / n,
+            },
+            "pred_label_rates": {
+                "live": {k: v / n for k, v in sorted(live_pred.items())},
+                "shadow": {k: v / n for k, v in sorted(shadow_pred.items())},
+            },
+            "label_transitions": {
+                f"{a} -> {b}": c for (a, b), c in sorted(self.transitions.items()) if a != b
+            },
+        }
+        if self.labeled:
+            out["accuracy"] = {
+                "labeled": self.labeled,
+                "live": self.live_correct / self.labeled,
+                "shadow": self.shadow_correct / self.labeled,
+            }
+        return out
+
+
+def promotion_report(stats: ShadowStats, criteria: PromotionCriteria) -> dict[str, Any]:
+    """Comparison summary plus pass/fail checks and a promote/hold verdict."""
+    summary = stats.summary()
+    checks = {
+        "agreement_rate": {
+            "value": summary["agreement_rate"],
+            "min": criteria.min_agreement,
+            "passed": summary["agreement_rate"] >= criteria.min_agreement,
+        },
+        "abstain_rate_delta": {
+            "value": summary["abstain_rate_delta"],
+            "max": criteria.max_abstain_rate_increase,
+            "passed": summary["abstain_rate_delta"] <= criteria.max_abstain_rate_increase,
+        },
+        "mean_confidence_shift": {
+            "value": summary["confidence_shift"]["mean"],
+            "min": -criteria.max_mean_confidence_drop,
+            "passed": summary["confidence_shift"]["mean"] >= -criteria.max_mean_confidence_drop,
+        },
+    }
+    if "accuracy" in summary:
+        acc = summary["accuracy"]
+        checks["labeled_accuracy"] = {
+            "value": acc["shadow"] - acc["live"],
+            "min": 0.0,
+            "passed": acc["shadow"] >= acc["live"],
+        }
+    if stats.n < criteria.min_samples:
+        recommendation = "insufficient_data"
+    else:
+        recommendation = "promote" if all(c["passed"] for c in checks.values()) else "hold"
+    return {**summary, "checks": checks, "recommendation": recommendation}
+
+
+class ShadowScorer:
+    """Serve ``live`` decisions while scoring the same texts with ``shadow``."""
+
+    def __init__(
+        self, live: dict[str, Any], shadow: dict[str, Any], share_features: bool = True
+    ) -> None:
+        self.live = live
+        self.shadow = shadow
+        self.stats = ShadowStats()
+        self._groups, self._models = build_shared([live, shadow]) if share_features else ([], {})
+
+    def featurization(self) -> dict[str, Any]:
+        """Which models share featurization, and how many TF-IDF matrices a batch builds."""
+        return {
+            "groups": len(self._groups),
+            "tfidf_matrices_per_batch": sum(len(g.idf) for g in self._groups),
+            "shared_models": sorted(
+                f"{'live' if b == 0 else 'shadow'}.{key}" for b, key in self._models
+            ),
+        }
+
+    def _scores(
+        self, b: int, bundle: dict[str, Any], texts: list[str], matrices: list
+    ) -> tuple[np.ndarray, np.ndarray]:
+        proba = {}
+        for key in MODEL_KEYS:
+            shared = self._models.get((b, key))
+            proba[key] = (
+                shared.predict_proba(matrices[shared.group])
+                if shared is not None
+                else bundle[key].predict_proba(texts)
+            )
+        return proba["primary_model"], proba["other_model"].argmax(axis=1)
+
+    def score(self, texts: list[str], true_labels: list[str] | None = None) -> list[dict]:
+        """Live decisions for ``texts``; the shadow comparison goes into ``stats``."""
+        start = time.perf_counter()
+        texts = [str(t) for t in texts]
+        matrices = [group.matrices(texts) for group in self._groups]
+        live = decide(self.live, *self._scores(0, self.live, texts, matrices))
+        shadow = decide(self.shadow, *self._scores(1, self.shadow, texts, matrices))
+        self.stats.update(live, shadow, true_labels, time.perf_counter() - start)
+        return live
+
+    def report(self, criteria: PromotionCriteria | None = None) -> dict[str, Any]:
+        report = promotion_report(self.stats, criteria or PromotionCriteria())
+        report["featurization"] = self.featurization()
+        return report
+
+
+def traffic_columns(df: pd.DataFrame) -> tuple[str, str | None]:
+    """Text and label columns of replayed traffic; the label is None if absent.
+
+    Detection follows ``src.clean``, so unlabeled traffic (only decisions are
+    compared) may name its text column anything ``detect_text_column`` finds.
+    """
+    try:
+        return detect_columns(df)
+    except ValueError:
+        return detect_text_column(df), None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay traffic through a shadow bundle")
+    parser.add_argument("--live", default="outputs/model.joblib", help="Serving bundle")
+    parser.add_argument("--shadow", required=True, help="Candidate bundle")
+    parser.add_argument("--input", required=True, help="CSV of traffic (text, optional label)")
+    parser.add_argument("--out", default="outputs/shadow_report.json", help="Report path")
+    parser.add_argument("--batch-size", type=int, default=256, help="Texts per scoring batch")
+    parser.add_argument("--min-samples", type=int, default=500, help="Texts needed to decide")
+    parser.add_argument("--min-agreement", type=float, default=0.9, help="Required agreement")
+    args = parser.parse_args()
+
+    scorer = ShadowScorer(load_bundle(args.live), load_bundle(args.shadow))
+    text_col, label_col = "", None
+    for i, chunk in enumerate(iter_csv_chunks(args.input, args.batch_size)):
+        if i == 0:
+            text_col, label_col = traffic_columns(chunk)
+        if label_col is not None:
+            chunk = clean_df(chunk, text_col, label_col)
+            scorer.score(chunk["text"].tolist(), chunk["label"].tolist())
+        else:
+            scorer.score(chunk[text_col].fillna("").astype(str).tolist())
+    criteria = PromotionCriteria(min_samples=args.min_samples, min_agreement=args.min_agreement)
+    report = scorer.report(criteria)
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    write_json(report, args.out)
+
+    print(f"\nShadow report: {args.out}", flush=True)
+    print(
+        f"Agreement {report['agreement_rate']:.3f} · abstain rate "
+        f"{report['live_abstain_rate']:.3f} -> {report['shadow_abstain_rate']:.3f} · "
+        f"mean confidence shift {report['confidence_shift']['mean']:+.3f}",
+        flush=True,
+    )
+    print(f"Recommendation: {report['recommendation']}\n", flush=True)
+
+
+if __name__ == "__main__":
+    main()
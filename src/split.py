@@ -1,9 +1,17 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
 
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import GroupShuffleSplit, StratifiedGroupKFold, train_test_split
+
+SPLIT_PARTS = ("train", "val", "test")
 
 
 @dataclass(frozen=True)
@@ -13,24 +21,178 @@ class SplitConfig:
     random_state: int = 42
 
 
-def make_splits(df: pd.DataFrame, cfg: SplitConfig) -> dict:
-    y = df["label"]
-    strat = y if y.nunique() > 1 else None
+def _group_holdout(
+    positions: np.ndarray, groups: np.ndarray, size: float, strat: np.ndarray | None, seed: int
+) -> tuple[np.ndarray, np.ndarray]:
+    # Whole groups go to one side. Stratified group folds only approximate
+    # ``size`` (one fold of round(1/size)), which is fine for holdout purposes.
+    if strat is None:
+        splitter = GroupShuffleSplit(n_splits=1, test_size=size, random_state=seed)
+        keep, hold = next(splitter.split(positions, groups=groups))
+    else:
+        n_splits = max(2, int(round(1.0 / size)))
+        sgkf = StratifiedGroupKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+        keep, hold = next(sgkf.split(positions, strat, groups))
+    return positions[keep], positions[hold]
+
+
+def _holdout(
+    positions: np.ndarray,
+    y: np.ndarray,
+    size: float,
+    groups: np.ndarray | None,
+    seed: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    strat = y[positions] if len(np.unique(y[positions])) > 1 else None
+    if groups is None:
+        keep, hold = train_test_split(positions, test_size=size, random_state=seed, stratify=strat)
+        return keep, hold
+    return _group_holdout(positions, groups[positions], size, strat, seed)
 
-    train_val, test = train_test_split(
-        df, test_size=cfg.test_size, random_state=cfg.random_state, stratify=strat
-    )
 
-    y_tv = train_val["label"]
-    strat_tv = y_tv if y_tv.nunique() > 1 else None
+def split_indices(
+    df: pd.DataFrame, cfg: SplitConfig, groups: np.ndarray | None = None
+) -> dict[str, np.ndarray]:
+    """Stratified train/val/test split as row positions into ``df``.
+
+    Only the label column is read, so no frame (and no text) is copied; index
+    the frame or its column arrays with the returned positions. With
+    ``groups`` (e.g. near-duplicate cluster ids from ``src.dedup``), rows
+    sharing a group never straddle two splits.
+    """
+    # Sorted integer codes stratify exactly like the labels, without object copies.
+    y = pd.factorize(df["label"], sort=True)[0]
+    groups = None if groups is None else np.asarray(groups)
+    train_val, test = _holdout(np.arange(len(df)), y, cfg.test_size, groups, cfg.random_state)
     val_rel = cfg.val_size / (1.0 - cfg.test_size)
+    train, val = _holdout(train_val, y, val_rel, groups, cfg.random_state)
+    return {"train": train, "val": val, "test": test}
 
-    train, val = train_test_split(
-        train_val, test_size=val_rel, random_state=cfg.random_state, stratify=strat_tv
-    )
 
+def parse_times(values: pd.Series) -> np.ndarray:
+    """Timestamps as naive UTC ``datetime64[ns]``; unparseable values become NaT."""
+    parsed = pd.to_datetime(values, errors="coerce", utc=True, format="mixed")
+    return parsed.dt.tz_convert(None).to_numpy(dtype="datetime64[ns]")
+
+
+def temporal_split_indices(
+    df: pd.DataFrame,
+    cfg: SplitConfig,
+    column: str = "generation_date",
+    cutoff: str | pd.Timestamp | None = None,
+) -> dict[str, np.ndarray]:
+    """Train-before / test-after split on a timestamp column, as row positions.
+
+    Rows at or after ``cutoff`` are the test split; by default the cutoff is
+    the timestamp that leaves ``cfg.test_size`` of the rows after it. The
+    latest ``cfg.val_size`` share of all rows before the cutoff is the val
+    split and the rest is train. Positions are in time order; rows whose
+    timestamp does not parse belong to no split.
+    """
+    if column not in df:
+        raise ValueError(f"Temporal split needs a {column!r} column.")
+    times = parse_times(df[column])
+    valid = np.flatnonzero(~pd.isna(times))
+    if len(valid) == 0:
+        raise ValueError(f"No parseable timestamps in {column!r}.")
+    ordered = valid[np.argsort(times[valid], kind="stable")]
+    if cutoff is None:
+        cut = times[ordered[int(len(ordered) * (1.0 - cfg.test_size))]]
+    else:
+        cut = parse_times(pd.Series([cutoff]))[0]
+    n_before = int(np.searchsorted(times[ordered], cut, side="left"))
+    before, test = ordered[:n_before], ordered[n_before:]
+    n_val = int(round(len(ordered) * cfg.val_size))
+    train, val = before[: max(len(before) - n_val, 0)], before[len(before) - n_val :]
+    if len(train) == 0 or len(val) == 0 or len(test) == 0:
+        raise ValueError("Temporal cutoff leaves train, val or test empty.")
+    return {"train": train, "val": val, "test": test}
+
+
+def make_splits(df: pd.DataFrame, cfg: SplitConfig, groups: np.ndarray | None = None) -> dict:
+    """Stratified train/val/test split as DataFrames (see ``split_indices``)."""
     return {
-        "train": train.reset_index(drop=True),
-        "val": val.reset_index(drop=True),
-        "test": test.reset_index(drop=True),
+        part: df.iloc[idx].reset_index(drop=True)
+        for part, idx in split_indices(df, cfg, groups).items()
     }
+
+
+def data_digest(df: pd.DataFrame, columns: tuple[str, ...] = ("text", "label")) -> str:
+    """Content hash of the columns a split depends on, in row order."""
+    h = hashlib.blake2b(digest_size=16)
+    for col in columns:
+        h.update(col.encode() + b"\0")
+        # Streamed value by value: no second copy of the text column.
+        for value in map(str, df[col]):
+            h.update(value.encode("utf-8", "surrogatepass") + b"\0")
+    return h.hexdigest()
+
+
+def _split_key(digest: str, cfg: SplitConfig, groups: np.ndarray | None) -> str:
+    payload = {"data": digest, "config": asdict(cfg)}
+    if groups is not None:
+        payload["groups"] = hashlib.blake2b(
+            np.ascontiguousarray(groups, dtype=np.int64).tobytes(), digest_size=16
+        ).hexdigest()
+    return hashlib.blake2b(json.dumps(payload, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def save_splits(path: str | Path, idx: dict[str, np.ndarray], digest: str, key: str) -> Path:
+    """Write split positions plus the data hash and split key they belong to."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.stem}.tmp.npz")
+    arrays: dict[str, Any] = {**idx, "data_digest": np.array(digest), "split_key": np.array(key)}
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+    return path
+
+
+def load_splits(path: str | Path, key: str) -> dict[str, np.ndarray] | None:
+    """Split positions saved under ``key``, or None if missing or stale."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with np.load(path) as arrays:
+        if "split_key" not in arrays.files or str(arrays["split_key"]) != key:
+            return None
+        return {part: arrays[part] for part in SPLIT_PARTS}
+
+
+def cached_split_indices(
+    df: pd.DataFrame,
+    cfg: SplitConfig,
+    path: str | Path,
+    groups: np.ndarray | None = None,
+) -> tuple[dict[str, np.ndarray], bool]:
+    """``split_indices`` persisted at ``path``; reused while data and settings match.
+
+    The saved split is keyed by a hash of the text/label columns, the split
+    config and the groups, so an edited input file (or a different seed) is
+    split afresh and overwrites it. Returns the positions and whether they
+    were reused.
+    """
+    digest = data_digest(df)
+    key = _split_key(digest, cfg, groups)
+    idx = load_splits(path, key)
+    if idx is not None:
+        return idx, True
+    idx = split_indices(df, cfg, groups)
+    save_splits(path, idx, digest, key)
+    return idx, False
+
+
+def hash_split(keys: pd.Series, cfg: SplitConfig) -> np.ndarray:
+    """Assign each row to ``train``/``val``/``test`` from a seeded hash of its key.
+
+    The key is the row's text (or a group id such as a near-duplicate cluster).
+    The assignment depends only on the key and the seed, so chunked readers
+    agree on it without ever seeing the whole file, and rows sharing a key
+    always land in the same split.
+    """
+    salt = f"{cfg.random_state:016d}"[-16:]
+    h = pd.util.hash_pandas_object(keys.astype(str), index=False, hash_key=salt).to_numpy()
+    u = (h >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+    return np.where(
+        u < cfg.test_size, "test", np.where(u < cfg.test_size + cfg.val_size, "val", "train")
+    )
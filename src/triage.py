@@ -0,0 +1,326 @@
+"""Server-side review queue over ``test_predictions.csv``.
+
+The dashboard's review queue pages through predictions sorted by confidence,
+filtered by abstain / disagreement / label / slice, with text search. To stay
+responsive on prediction files with millions of rows, the CSV is converted
+once (chunk by chunk) into a column store next to it:
+
+- numeric columns as ``.npy`` files, memory-mapped on first use;
+- string columns other than ``text`` as integer codes plus a category list;
+- ``text`` as one UTF-8 blob plus row offsets (and a lowercased copy for
+  case-insensitive search), so only the rows of the visible page are decoded;
+- a precomputed confidence sort index.
+
+Filters are evaluated on the memory-mapped columns they need, and the page is
+the only part that becomes a DataFrame. The store is rebuilt when the CSV's
+mtime or size changes: each build goes into a new version directory and the
+``CURRENT`` pointer file is swapped to it with one atomic rename, so readers
+see either the old or the new store, and concurrent rebuilds never collide.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.inference import ABSTAIN_DELTA
+from src.io_utils import iter_csv_chunks
+
+STORE_FORMAT = 1
+POINTER = "CURRENT"
+# Complete store versions kept after a swap; older sessions may still read one.
+KEEP_VERSIONS = 2
+# Unfinished version directories older than this are from crashed builds.
+STALE_BUILD_SECONDS = 3600
+TEXT_COLUMN = "text"
+DISAGREE_COLUMN = "disagree_word_char"
+# Written by conformal runs; when present, rows abstain unless the set has one label.
+SET_SIZE_COLUMN = "set_size"
+# Integer columns with at most this many distinct values can be used as slices.
+MAX_SLICE_VALUES = 256
+SEARCH_CACHE_SIZE = 8
+
+
+@dataclass(frozen=True)
+class TriageFilter:
+    abstain: bool | None = None
+    disagree: bool | None = None
+    labels: tuple[str, ...] = ()
+    pred_labels: tuple[str, ...] = ()
+    slice_column: str | None = None
+    slice_values: tuple[str, ...] = ()
+    search: str = ""
+    least_confident_first: bool = True
+
+
+def _source_stamp(csv_path: Path) -> list[int]:
+    stat = csv_path.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def build_store(csv_path: str | Path, store_dir: str | Path, chunksize: int = 100_000) -> Path:
+    """Convert a predictions CSV into the column store read by ``TriageQueue``."""
+    csv_path, store = Path(csv_path), Path(store_dir)
+    store.mkdir(parents=True, exist_ok=True)
+    numeric: dict[str, list[np.ndarray]] = {}
+    codes: dict[str, list[np.ndarray]] = {}
+    categories: dict[str, dict[str, int]] = {}
+    offsets = [0]
+    lower_offsets = [0]
+    n_rows = 0
+    with (store / "text.bin").open("wb") as text_f, (store / "text_lower.bin").open("wb") as low_f:
+        for chunk in iter_csv_chunks(csv_path, chunksize):
+            n_rows += len(chunk)
+            for col in chunk.columns:
+                values = chunk[col]
+                if col == TEXT_COLUMN:
+                    for text in values.fillna("").astype(str):
+                        raw = text.encode("utf-8", "surrogatepass")
+                        low = text.lower().encode("utf-8", "surrogatepass")
+                        text_f.write(raw + b"\0")
+                        low_f.write(low + b"\0")
+                        offsets.append(offsets[-1] + len(raw) + 1)
+                        lower_offsets.append(lower_offsets[-1] + len(low) + 1)
+                elif pd.api.types.is_numeric_dtype(values) and col not in categories:
+                    numeric.setdefault(col, []).append(values.to_numpy())
+                else:
+                    # A column inferred as numeric in earlier chunks (e.g. an empty
+                    # ``prediction_set`` read as NaN) becomes a string column.
+                    parts = [pd.Series(p) for p in numeric.pop(col, [])] + [values]
+                    cats = categories.setdefault(col, {})
+                    for part in parts:
+                        strings = part.astype(object).where(part.notna(), "").astype(str)
+                        for value in pd.unique(strings):
+                            cats.setdefault(value, len(cats))
+                        codes.setdefault(col, []).append(strings.map(cats).to_numpy(np.int32))
+
+    for prefix, columns in (("num", numeric), ("cat", codes)):
+        for col, parts in columns.items():
+            values = np.concatenate(parts)
+            if len(values) != n_rows:
+                raise ValueError(f"Column {col!r} has {len(values)} of {n_rows} rows.")
+            np.save(store / f"{prefix}_{col}.npy", values)
+    np.save(store / "text_offsets.npy", np.asarray(offsets, dtype=np.int64))
+    np.save(store / "text_lower_offsets.npy", np.asarray(lower_offsets, dtype=np.int64))
+    confidence = np.load(store / "num_confidence.npy")
+    np.save(store / "order_confidence.npy", np.argsort(confidence, kind="stable"))
+
+    meta = {
+        "format": STORE_FORMAT,
+        "source": _source_stamp(csv_path),
+        "n_rows": n_rows,
+        "columns": list(pd.read_csv(csv_path, nrows=0).columns),
+        "numeric": list(numeric),
+        "categories": {col: list(cats) for col, cats in categories.items()},
+    }
+    # Written last: a store without meta.json is incomplete and gets rebuilt.
+    (store / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    return store
+
+
+class TriageQueue:
+    """Filtered, sorted, paginated view of a predictions column store."""
+
+    def __init__(self, csv_path: str | Path, store_dir: str | Path | None = None) -> None:
+        self.csv_path = Path(csv_path)
+        self.root = (
+            Path(store_dir)
+            if store_dir is not None
+            else self.csv_path.parent / f".triage_{self.csv_path.stem}"
+        )
+        self.store = self._current()
+        meta = self._read_meta()
+        if meta is None or meta["source"] != _source_stamp(self.csv_path):
+            self.store = self._rebuild()
+            meta = self._read_meta()
+        assert meta is not None
+        self.meta = meta
+        self.n_rows = int(meta["n_rows"])
+        self._arrays: dict[str, np.ndarray] = {}
+        self._blobs: dict[str, mmap.mmap | bytes] = {}
+        # Paging through one search re-uses its hit mask.
+        self._searches: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _current(self) -> Path:
+        try:
+            return self.root / (self.root / POINTER).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return self.root / "missing"
+
+    def _rebuild(self) -> Path:
+        # Readers follow the pointer, so the swap is a single atomic rename and
+        # a concurrent rebuild just points it at its own (equivalent) version.
+        self.root.mkdir(parents=True, exist_ok=True)
+        version = self.root / f"v-{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        build_store(self.csv_path, version)
+        tmp = self.root / f"{POINTER}.tmp-{uuid.uuid4().hex[:8]}"
+        tmp.write_text(version.name, encoding="utf-8")
+        os.replace(tmp, self.root / POINTER)
+        self._prune(version)
+        return version
+
+    def _prune(self, keep: Path) -> None:
+        """Drop all but the newest complete versions and abandoned builds."""
+        versions = sorted(self.root.glob("v-*"))
+        complete = [v for v in versions if (v / "meta.json").exists()]
+        current = self._current()
+        for v in complete[:-KEEP_VERSIONS]:
+            if v not in (keep, current):
+                shutil.rmtree(v, ignore_errors=True)
+        cutoff = time.time() - STALE_BUILD_SECONDS
+        for v in versions:
+            if v not in complete and v.stat().st_mtime < cutoff:
+                shutil.rmtree(v, ignore_errors=True)
+
+    def _read_meta(self) -> dict | None:
+        path = self.store / "meta.json"
+        if not path.exists():
+            return None
+        meta = json.loads(path.read_text(encoding="utf-8"))
+        return meta if meta.get("format") == STORE_FORMAT else None
+
+    def _array(self, name: str) -> np.ndarray:
+        # Columns are memory-mapped the first time a filter or page needs them.
+        if name not in self._arrays:
+            self._arrays[name] = np.load(self.store / f"{name}.npy", mmap_mode="r")
+        return self._arrays[name]
+
+    def _blob(self, name: str) -> mmap.mmap | bytes:
+        if name not in self._blobs:
+            with (self.store / f"{name}.bin").open("rb") as f:
+                size = f.seek(0, 2)
+                # mmap cannot map an empty file.
+                self._blobs[name] = (
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+                )
+        return self._blobs[name]
+
+    def categories(self, column: str) -> list[str]:
+        return list(self.meta["categories"].get(column, []))
+
+    def slice_columns(self) -> list[str]:
+        """Columns usable as slices: strings plus low-cardinality integers."""
+        fixed = {"label", "pred_label", TEXT_COLUMN}
+        cols = [c for c in self.meta["categories"] if c not in fixed]
+        for col in self.meta["numeric"]:
+            values = self._array(f"num_{col}")
+            if (
+                col != DISAGREE_COLUMN
+                and np.issubdtype(values.dtype, np.integer)
+                and len(np.unique(values)) <= MAX_SLICE_VALUES
+            ):
+                cols.append(col)
+        return cols
+
+    def slice_values(self, column: str) -> list[str]:
+        if column in self.meta["categories"]:
+            return self.categories(column)
+        return [str(v) for v in np.unique(self._array(f"num_{column}"))]
+
+    def _in(self, column: str, values: tuple[str, ...]) -> np.ndarray:
+        if column in self.meta["categories"]:
+            cats = self.meta["categories"][column]
+            wanted = [cats.index(v) for v in values if v in cats]
+            return np.isin(self._array(f"cat_{column}"), wanted)
+        arr = self._array(f"num_{column}")
+        return np.isin(arr, np.asarray(values).astype(arr.dtype))
+
+    def _search(self, needle: str) -> np.ndarray:
+        """Rows whose lowercased text contains ``needle`` (case-insensitive)."""
+        with self._lock:
+            if needle in self._searches:
+                self._searches.move_to_end(needle)
+                return self._searches[needle]
+        blob = self._blob("text_lower")
+        offsets = self._array("text_lower_offsets")
+        target = needle.lower().encode("utf-8", "surrogatepass")
+        hits = np.zeros(self.n_rows, dtype=bool)
+        pos = blob.find(target)
+        while pos != -1:
+            row = int(np.searchsorted(offsets, pos, side="right")) - 1
+            # Texts are NUL-separated, so a match never spans two rows.
+            hits[row] = True
+            pos = blob.find(target, int(offsets[row + 1]))
+        with self._lock:
+            self._searches[needle] = hits
+            if len(self._searches) > SEARCH_CACHE_SIZE:
+                self._searches.popitem(last=False)
+        return hits
+
+    def mask(self, flt: TriageFilter, threshold: float) -> np.ndarray:
+        keep = np.ones(self.n_rows, dtype=bool)
+        if flt.disagree is not None or flt.abstain is not None:
+            disagree = self._array(f"num_{DISAGREE_COLUMN}").astype(bool)
+            if flt.disagree is not None:
+                keep &= disagree == flt.disagree
+            if flt.abstain is not None and SET_SIZE_COLUMN in self.meta["numeric"]:
+                keep &= (self._array(f"num_{SET_SIZE_COLUMN}") != 1) == flt.abstain
+            elif flt.abstain is not None:
+                conf = self._array("num_confidence")
+                abstain = (conf < threshold) | (
+                    disagree & (conf < min(0.99, threshold + ABSTAIN_DELTA))
+                )
+                keep &= abstain == flt.abstain
+        if flt.labels:
+            keep &= self._in("label", flt.labels)
+        if flt.pred_labels:
+            keep &= self._in("pred_label", flt.pred_labels)
+        if flt.slice_column and flt.slice_values:
+            keep &= self._in(flt.slice_column, flt.slice_values)
+        if flt.search.strip():
+            keep &= self._search(flt.search.strip())
+        return keep
+
+    def _texts(self, rows: np.ndarray) -> list[str]:
+        blob = self._blob("text")
+        offsets = self._array("text_offsets")
+        return [
+            bytes(blob[int(offsets[r]) : int(offsets[r + 1]) - 1]).decode("utf-8", "surrogatepass")
+            for r in rows
+        ]
+
+    def _materialize(self, rows: np.ndarray, threshold: float) -> pd.DataFrame:
+        data: dict[str, Any] = {"row": rows}
+        for col in self.meta["columns"]:
+            if col == TEXT_COLUMN:
+                data[col] = self._texts(rows)
+            elif col in self.meta["categories"]:
+                cats = np.asarray(self.meta["categories"][col], dtype=object)
+                data[col] = cats[self._array(f"cat_{col}")[rows]]
+            else:
+                data[col] = np.asarray(self._array(f"num_{col}")[rows])
+        page = pd.DataFrame(data)
+        if SET_SIZE_COLUMN in page:
+            page["abstain"] = page[SET_SIZE_COLUMN] != 1
+        elif DISAGREE_COLUMN in page and "confidence" in page:
+            disagree = page[DISAGREE_COLUMN].astype(bool)
+            page["abstain"] = (page["confidence"] < threshold) | (
+                disagree & (page["confidence"] < min(0.99, threshold + ABSTAIN_DELTA))
+            )
+        return page
+
+    def page(
+        self, flt: TriageFilter, threshold: float, page: int = 0, page_size: int = 50
+    ) -> tuple[pd.DataFrame, int]:
+        """Rows of one page (0-based) in confidence order, and the total match count."""
+        order = self._array("order_confidence")
+        if not flt.least_confident_first:
+            order = order[::-1]
+        keep = self.mask(flt, threshold)
+        matched = order[keep[order]]
+        start = max(page, 0) * page_size
+        rows = np.asarray(matched[start : start + page_size])
+        return self._materialize(rows, threshold), int(len(matched))
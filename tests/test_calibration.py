@@ -0,0 +1,75 @@
+"""Unit tests for src.calibration (held-out calibration of a fitted model)."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+
+from sklearn.linear_model import LogisticRegression  # noqa: E402
+
+from src.calibration import PrefitCalibratedClassifier  # noqa: E402
+
+
+def _fitted(n_classes: int):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4))
+    y = (X[:, 0] > 0).astype(int) + (n_classes == 3) * (X[:, 1] > 1).astype(int)
+    return LogisticRegression().fit(X, y), X, y
+
+
+@pytest.mark.parametrize("method", ["sigmoid", "isotonic"])
+@pytest.mark.parametrize("n_classes", [2, 3])
+def test_probabilities_are_normalized(method, n_classes):
+    base, X, y = _fitted(n_classes)
+    cal = PrefitCalibratedClassifier(base, method).fit(X, y)
+    proba = cal.predict_proba(X)
+    assert proba.shape == (len(X), n_classes)
+    assert np.allclose(proba.sum(axis=1), 1.0)
+    assert (proba >= 0).all() and (proba <= 1).all()
+
+
+def test_base_is_not_refit():
+    base, X, y = _fitted(2)
+    coef = base.coef_.copy()
+    PrefitCalibratedClassifier(base, "sigmoid").fit(X[:50], y[:50])
+    assert np.array_equal(base.coef_, coef)
+
+
+def test_sigmoid_is_monotone_in_score():
+    base, X, y = _fitted(2)
+    cal = PrefitCalibratedClassifier(base, "sigmoid").fit(X, y)
+    scores = np.linspace(-5, 5, 11)
+    p = cal.proba_from_scores(scores)[:, 1]
+    assert np.all(np.diff(p) > 0)
+
+
+def test_unknown_method_raises():
+    with pytest.raises(ValueError):
+        PrefitCalibratedClassifier(LogisticRegression(), "beta")
+
+
+@pytest.mark.parametrize("n_classes", [2, 3])
+def test_temperature_scaling_keeps_argmax(n_classes):
+    base, X, y = _fitted(n_classes)
+    cal = PrefitCalibratedClassifier(base, "temperature").fit(X, y)
+    proba = cal.predict_proba(X)
+    assert np.allclose(proba.sum(axis=1), 1.0)
+    # a single temperature rescales logits, so the decision never changes
+    assert np.array_equal(proba.argmax(axis=1), base.predict(X))
+    assert cal.calibrators_[0].temperature_ > 0
+
+
+def test_temperature_drops_val_labels_the_model_never_saw():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4))
+    y = np.digitize(X[:, 0], [-0.5, 0.5])  # classes {0, 1, 2}
+    base = LogisticRegression().fit(X, y)
+    y_val = np.where(y == 2, 3, y)  # val carries a label train lacks
+    with pytest.warns(UserWarning, match="dropped"):
+        cal = PrefitCalibratedClassifier(base, "temperature").fit(X, y_val)
+    assert cal.n_unknown_labels_ == int((y == 2).sum())
+    assert np.allclose(cal.predict_proba(X).sum(axis=1), 1.0)
+    with pytest.raises(ValueError, match="no held-out label"):
+        PrefitCalibratedClassifier(base, "temperature").fit(X, np.full(len(X), 3))
@@ -5,7 +5,7 @@ from __future__ import annotations
 import pandas as pd
 import pytest
 
-from src.clean import clean_df
+from src.clean import clean_df, detect_text_column
 
 
 def test_named_columns_renamed_and_normalized():
@@ -38,6 +38,13 @@ def test_missing_text_column_raises():
         clean_df(df)
 
 
+def test_text_column_detected_without_a_label():
+    df = pd.DataFrame({"id": [1, 2], "body": ["some long text", "more long text"]})
+    assert detect_text_column(df) == "body"
+    with pytest.raises(ValueError, match=r"\['id'\]"):
+        detect_text_column(df[["id"]])
+
+
 def test_fallback_text_column_is_longest_string_column():
     # no column named text/content/sentence -> pick the longest string column
     df = pd.DataFrame(
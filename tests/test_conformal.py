@@ -0,0 +1,48 @@
+"""Unit tests for split-conformal prediction sets."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.conformal import (
+    conformal_quantile,
+    conformal_report,
+    nonconformity_scores,
+    prediction_sets,
+    set_stats,
+)
+
+
+def test_quantile_is_finite_sample_corrected_order_statistic():
+    scores = np.array([0.5, 0.1, 0.4, 0.2, 0.3, 0.9, 0.8, 0.7, 0.6])
+    # n=9, alpha=0.2 -> k = ceil(10 * 0.8) = 8 -> 8th smallest score
+    assert conformal_quantile(scores, 0.2) == pytest.approx(0.8)
+    # k = ceil(10 * 0.95) = 10 > n: sets must hold every label
+    assert conformal_quantile(scores, 0.05) == 1.0
+    with pytest.raises(ValueError):
+        conformal_quantile(scores, 0.0)
+
+
+def test_sets_and_stats_hand_computed():
+    proba = np.array([[0.7, 0.2, 0.1], [0.4, 0.35, 0.25], [0.1, 0.1, 0.8]])
+    y = np.array([0, 1, 2])
+    assert nonconformity_scores(y, proba) == pytest.approx([0.3, 0.65, 0.2])
+    sets = prediction_sets(proba, 0.65)
+    assert sets.tolist() == [[True, False, False], [True, True, False], [False, False, True]]
+    stats = set_stats(y, sets)
+    assert stats["coverage"] == 1.0
+    assert stats["set_size_counts"] == {"0": 0, "1": 2, "2": 1}
+    assert stats["singleton_rate"] == pytest.approx(2 / 3)
+    assert stats["singleton_accuracy"] == 1.0
+
+
+def test_coverage_holds_on_exchangeable_data():
+    rng = np.random.default_rng(0)
+    proba = rng.dirichlet([0.5, 0.5, 0.5], 4000)
+    # labels drawn from the predicted distribution: the probabilities are calibrated
+    y = (rng.random(4000)[:, None] > np.cumsum(proba, axis=1)).sum(axis=1)
+    report = conformal_report(y[:2000], proba[:2000], y[2000:], proba[2000:], alpha=0.1)
+    assert report["n_calibration"] == 2000
+    assert report["coverage"] == pytest.approx(0.9, abs=0.02)
+    assert 1.0 <= report["mean_set_size"] < 3.0
@@ -0,0 +1,147 @@
+"""Unit tests for src.dedup (MinHash/LSH near-duplicate clusters)."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+from src.dedup import (  # noqa: E402
+    DedupConfig,
+    NearDupIndex,
+    build_index,
+    cluster_stats,
+    representatives,
+)
+
+ERR = (
+    "Error: 400 Client Error: Bad Request for url: https://api.groq.com/openai/v1/chat/completions"
+)
+
+
+def test_near_duplicates_share_a_cluster():
+    texts = [
+        ERR,
+        "The quick brown fox jumps over the lazy dog near the river bank today.",
+        ERR + " ",
+        ERR.lower(),
+        "Completely unrelated sentence about photosynthesis and plant biology.",
+    ]
+    clusters = build_index(texts).clusters()
+    assert clusters[0] == clusters[2] == clusters[3] == 0
+    assert len({clusters[0], clusters[1], clusters[4]}) == 3
+
+
+def test_long_unrelated_texts_stay_apart():
+    topics = ["river", "engine", "garden", "market", "violin", "glacier"]
+    texts = [
+        " ".join(
+            f"Sentence {s} about the {topic} describes item {7 * s + k} in some detail."
+            for s in range(12)
+        )
+        for k, topic in enumerate(topics)
+    ]
+    index = build_index(texts)
+    assert index.clusters().tolist() == list(range(len(texts)))
+    # every signature slot is its own minhash, not one shared minimum
+    assert len(set(index.signature(texts[0]).tolist())) > 32
+
+
+def test_members_are_close_to_their_root_not_just_to_a_neighbour():
+    words = [f"token{i:03d}" for i in range(140)]
+    texts = [" ".join(words[start : start + 100]) for start in (0, 8, 16)]
+    index = build_index(texts)
+    assert index.jaccard(0, 1) >= 0.8 and index.jaccard(1, 2) >= 0.8
+    assert index.jaccard(0, 2) < 0.8
+    assert index.clusters().tolist() == [0, 0, 2]
+
+
+def test_incremental_adds_match_single_batch():
+    texts = [f"sample text {i % 5} with a shared long tail of words" for i in range(20)]
+    index = NearDupIndex()
+    for start in range(0, 20, 6):
+        index.add(texts[start : start + 6])
+    assert len(index) == 20
+    assert index.clusters().tolist() == build_index(texts).clusters().tolist()
+
+
+def _leader_loop(index: NearDupIndex) -> list[int]:
+    # The plain leader-first pass over every row that ``clusters`` shortcuts.
+    keys = np.concatenate(index._keys).tolist()
+    root = list(range(len(keys)))
+    leaders: list[dict] = [{} for _ in keys[0]]
+    for j, row_keys in enumerate(keys):
+        candidates = sorted({i for b, k in enumerate(row_keys) for i in leaders[b].get(k, ())})
+        for i in candidates:
+            if index.jaccard(i, j) >= index.cfg.threshold:
+                root[j] = i
+                break
+        else:
+            for b, k in enumerate(row_keys):
+                leaders[b].setdefault(k, []).append(j)
+    return root
+
+
+@pytest.mark.parametrize("exact", [True, False])
+def test_clusters_match_the_leader_loop_over_every_row(exact):
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(300)]
+    texts = []
+    for _ in range(400):
+        r = rng.random()
+        if r < 0.2 and texts:
+            texts.append(texts[rng.integers(len(texts))])
+        elif r < 0.4 and texts:
+            texts.append(texts[rng.integers(len(texts))] + " x")
+        else:
+            texts.append(" ".join(rng.choice(words, 12)))
+    texts += ["", "a", "ab"] * 2
+    index = build_index(texts, DedupConfig(exact_jaccard=exact))
+    clusters = index.clusters()
+    assert clusters.tolist() == _leader_loop(index)
+    assert len(np.unique(clusters)) < len(texts)
+
+
+def test_too_many_shingles_fall_back_to_signature_jaccard():
+    texts = [ERR, "The quick brown fox jumps over the lazy dog.", ERR + " "]
+    small = NearDupIndex(DedupConfig(exact_max_shingles=100))
+    small.add(texts[:1])
+    assert small.exact
+    small.add(texts[1:])
+    assert not small.exact and len(small) == 3
+    sigs = [small.signature(t).astype(np.uint32) for t in texts[:2]]
+    assert small.jaccard(0, 1) == float((sigs[0] == sigs[1]).mean())
+    assert small.clusters().tolist() == [0, 1, 0]
+    assert build_index(texts).exact
+
+
+def test_spilled_index_matches_in_memory_index(tmp_path):
+    texts = [f"sample text {i % 7} with a shared long tail of words" for i in range(30)]
+    texts += [ERR, ERR.lower(), "Completely unrelated sentence about plant biology."]
+    cfg = DedupConfig(exact_jaccard=False)
+    spilled = NearDupIndex(cfg, spill_dir=tmp_path / "spill")
+    for start in range(0, len(texts), 8):
+        spilled.add(texts[start : start + 8])
+    assert spilled.jaccard(0, 7) == 1.0
+    spilled.add(["one more row"])
+    assert (tmp_path / "spill" / "sigs.bin").stat().st_size == len(spilled) * 64 * 4
+    assert (
+        spilled.clusters().tolist()
+        == build_index(texts + ["one more row"], cfg).clusters().tolist()
+    )
+
+
+def test_cluster_stats_and_representatives():
+    clusters = np.array([0, 0, 2, 0, 4, 4])
+    stats = cluster_stats(clusters, np.array(["train", "test", "train", "train", "val", "val"]))
+    assert stats["n_clusters"] == 3
+    assert stats["n_duplicate_rows"] == 3
+    assert stats["largest_cluster"] == 3
+    assert stats["clusters_spanning_splits"] == 1
+    assert representatives(clusters).tolist() == [True, False, True, False, True, False]
+
+
+def test_bands_must_divide_num_perm():
+    with pytest.raises(ValueError):
+        NearDupIndex(DedupConfig(num_perm=64, bands=7))
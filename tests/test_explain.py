@@ -0,0 +1,111 @@
+"""Tests for per-text n-gram attributions."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+
+pytest.importorskip("sklearn")
+pytest.importorskip("matplotlib")
+
+from src.explain import (  # noqa: E402
+    _linear_view,
+    class_contributions,
+    explain_texts,
+    top_k_rows,
+)
+from src.export import compile_bundle  # noqa: E402
+from src.inference import LongTextConfig, load_bundle, window_segments  # noqa: E402
+from src.pipeline import run  # noqa: E402
+
+TEXTS = ["machine generated model output sample 3", "i went to the market today", ""]
+
+
+def _bundle(tmp_path, **kwargs) -> dict:
+    rows = []
+    for i in range(20):
+        rows.append({"text": f"machine generated model output sample {i}", "label": "ai"})
+        rows.append({"text": f"i went to the market today with friends {i}", "label": "human"})
+        rows.append(
+            {"text": f"machine output lightly revised by a person {i}", "label": "post_edited_ai"}
+        )
+    csv = tmp_path / "tiny.csv"
+    pd.DataFrame(rows).to_csv(csv, index=False)
+    res = run(
+        input_path=str(csv),
+        out_dir=str(tmp_path / "out"),
+        figures_dir=str(tmp_path / "fig"),
+        random_state=0,
+        **kwargs,
+    )
+    return load_bundle(res["model_path"])
+
+
+def test_top_k_rows_keeps_largest_positive_entries_per_row():
+    C = sp.csr_matrix(np.array([[0.1, 0.5, -1.0, 0.3], [0.0, 0.0, 0.0, 0.0], [2.0, 0.0, 0.0, 1.0]]))
+    rows, cols, vals = top_k_rows(C, 2)
+    assert rows.tolist() == [0, 0, 2, 2]
+    assert cols.tolist() == [1, 3, 0, 3]
+    assert vals.tolist() == [0.5, 0.3, 2.0, 1.0]
+
+
+@pytest.mark.parametrize("mode", ["cv", "prefit"])
+def test_contributions_add_up_to_decision_scores(tmp_path, mode):
+    bundle = _bundle(tmp_path, calibration_mode=mode)
+    compiled = compile_bundle(bundle)
+    for key in ("primary_model", "other_model"):
+        model = compiled[key]
+        scores = np.mean(model.decision_scores(TEXTS), axis=0)
+        totals = np.column_stack(
+            [np.asarray(C.sum(axis=1)).ravel() for C in class_contributions(model, TEXTS)]
+        )
+        np.testing.assert_allclose(totals + model.intercept.mean(axis=0), scores, atol=1e-12)
+        # fitted scikit-learn models go through the float32 compact layout
+        from_sklearn = class_contributions(bundle[key], TEXTS)
+        for C, D in zip(from_sklearn, class_contributions(model, TEXTS), strict=True):
+            np.testing.assert_allclose(C.toarray().sum(axis=1), D.toarray().sum(axis=1), atol=1e-5)
+
+
+def test_explain_texts_lists_top_ngrams_per_model_and_class(tmp_path):
+    bundle = _bundle(tmp_path)
+    out = explain_texts(bundle, TEXTS, top_k=3)
+    assert len(out) == len(TEXTS)
+    assert set(out[0]) == {"word", "char"}
+    assert set(out[0]["word"]) == set(bundle["labels"])
+    human = out[1]["word"]["human"]
+    assert 0 < len(human) <= 3
+    weights = [w for _, w in human]
+    assert weights == sorted(weights, reverse=True) and weights[-1] > 0
+    assert {term for term, _ in human} & {"went", "market", "today", "went to", "the market"}
+    # an empty text has no evidence for any class
+    assert all(not terms for per_class in out[2].values() for terms in per_class.values())
+    assert explain_texts(bundle, []) == []
+
+
+def test_long_texts_are_explained_as_the_mean_over_scored_windows(tmp_path):
+    bundle = _bundle(tmp_path)
+    cfg = LongTextConfig(max_chars=60, window_chars=40, overlap_chars=5)
+    long = "i went to the market today with friends 3 and machine generated model output"
+    segments, _, weight = window_segments([long, TEXTS[0]], cfg)
+    assert len(segments) > 2 and weight[-1] == 1.0
+    # A top_k above the vocabulary size lists every positive term, so ties
+    # cannot reorder the comparison.
+    k = 10**6
+    out = explain_texts(bundle, [long, TEXTS[0]], top_k=k, long_text=cfg)
+    short = explain_texts(bundle, TEXTS[:1], top_k=k)[0]
+    for model_name, per_class in short.items():
+        for label, terms in per_class.items():
+            np.testing.assert_allclose(
+                [v for _, v in out[1][model_name][label]], [v for _, v in terms]
+            )
+    model, name = bundle["primary_model"], bundle["primary_name"]
+    terms = _linear_view(model).terms
+    for c, C in enumerate(class_contributions(model, segments[:-1])):
+        # Length-weighted mean of the windows' contributions, not the joined text's.
+        mean = weight[:-1] @ C.toarray()
+        expected = {terms[j]: mean[j] for j in np.flatnonzero(mean > 0)}
+        got = dict(out[0][name][bundle["labels"][c]])
+        assert got.keys() == expected.keys()
+        np.testing.assert_allclose([got[t] for t in expected], list(expected.values()))
@@ -0,0 +1,124 @@
+"""Tests for the compact model export."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("matplotlib")
+
+from src.export import (  # noqa: E402
+    MAX_PROBA_DIFF,
+    MIN_AGREEMENT,
+    TOL_GRID,
+    compact_bundle,
+    export_compact,
+)
+from src.inference import load_bundle, predict_texts  # noqa: E402
+from src.pipeline import run  # noqa: E402
+
+TEXTS = [
+    "machine generated model output sample 7",
+    "i went to the market today with friends",
+    "machine output lightly revised by a person",
+    "something else entirely",
+]
+
+
+def _make_csv(path) -> None:
+    rows = []
+    for i in range(20):
+        rows.append({"text": f"machine generated model output sample {i}", "label": "ai"})
+        rows.append({"text": f"i went to the market today with friends {i}", "label": "human"})
+        rows.append(
+            {"text": f"machine output lightly revised by a person {i}", "label": "post_edited_ai"}
+        )
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+@pytest.fixture(scope="module", params=[("cv", "sigmoid"), ("prefit", "isotonic")])
+def bundle_path(request, tmp_path_factory):
+    mode, method = request.param
+    tmp = tmp_path_factory.mktemp(f"export_{mode}")
+    csv = tmp / "tiny.csv"
+    _make_csv(csv)
+    res = run(
+        input_path=str(csv),
+        out_dir=str(tmp / "out"),
+        figures_dir=str(tmp / "fig"),
+        random_state=0,
+        calibration_method=method,
+        calibration_mode=mode,
+    )
+    return res["model_path"]
+
+
+def test_unpruned_compact_matches_original(bundle_path):
+    bundle = load_bundle(bundle_path)
+    compact, stats = compact_bundle(bundle, tol=0.0)
+    for key in ("primary_model", "other_model"):
+        diff = np.abs(bundle[key].predict_proba(TEXTS) - compact[key].predict_proba(TEXTS))
+        # only float32 weight storage separates the two
+        assert diff.max() < 1e-5
+        assert stats[key]["vocab_terms_after"] == stats[key]["vocab_terms_before"]
+    # the compact bundle is a drop-in for live inference
+    got = [r["pred_label"] for r in predict_texts(compact, TEXTS)]
+    assert got == [r["pred_label"] for r in predict_texts(bundle, TEXTS)]
+
+
+def test_pruning_shrinks_vocabulary(bundle_path):
+    _, stats = compact_bundle(load_bundle(bundle_path), tol=0.5)
+    s = stats["primary_model"]
+    assert s["vocab_terms_after"] < s["vocab_terms_before"]
+
+
+def test_export_writes_bundle_and_report(bundle_path, tmp_path):
+    report = export_compact(
+        bundle_path,
+        tmp_path / "compact.joblib",
+        TEXTS,
+        collapse_folds=True,
+        max_proba_diff=1.0,
+        min_agreement=0.0,
+        report_path=tmp_path / "report.json",
+        repeats=1,
+    )
+    assert (tmp_path / "compact.joblib").exists()
+    saved = json.loads((tmp_path / "report.json").read_text(encoding="utf-8"))
+    for key in ("compact_bytes", "load_speedup", "predict_speedup", "max_abs_proba_diff"):
+        assert key in saved
+    assert report["compact_bytes"] < report["original_bytes"]
+    assert 0.0 <= report["max_abs_proba_diff"] <= 1.0
+
+
+def test_default_tolerance_is_the_largest_within_bounds(bundle_path, tmp_path):
+    report = export_compact(bundle_path, tmp_path / "compact.joblib", TEXTS, repeats=1)
+    assert report["tol_searched"] and report["within_bounds"]
+    assert report["tol"] in TOL_GRID
+    assert report["max_abs_proba_diff"] <= MAX_PROBA_DIFF
+    assert report["primary_decision_agreement"] >= MIN_AGREEMENT
+    larger = [t for t in TOL_GRID if t > report["tol"]]
+    if larger:
+        # the next grid step would have broken a bound
+        with pytest.raises(ValueError, match="bounds are"):
+            export_compact(bundle_path, tmp_path / "next.joblib", TEXTS, tol=larger[0])
+
+
+def test_export_fails_outside_bounds_without_writing(bundle_path, tmp_path):
+    with pytest.raises(ValueError, match="max \\|dp\\|"):
+        export_compact(
+            bundle_path,
+            tmp_path / "compact.joblib",
+            TEXTS,
+            tol=0.0,
+            collapse_folds=True,
+            max_proba_diff=0.0,
+            report_path=tmp_path / "report.json",
+        )
+    assert not (tmp_path / "compact.joblib").exists()
+    saved = json.loads((tmp_path / "report.json").read_text(encoding="utf-8"))
+    assert saved["within_bounds"] is False and saved["tol"] == 0.0
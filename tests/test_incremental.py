@@ -0,0 +1,120 @@
+"""Tests for incremental retraining (appended rows, warm start, fallbacks)."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("matplotlib")
+
+from src.features import FeatureConfig, make_char_vectorizer  # noqa: E402
+from src.incremental import (  # noqa: E402
+    STATE_DIR,
+    IncrementalConfig,
+    _idf,
+    _tfidf,
+    count_terms,
+    load_state,
+    run_incremental,
+)
+from src.inference import load_bundle, predict_texts  # noqa: E402
+
+
+def _rows(start: int, stop: int) -> list[dict]:
+    # Texts repeat every 20 ids, so appended rows add rows but no new vocabulary.
+    rows = []
+    for i in range(start, stop):
+        rows.append({"id": f"a{i}", "text": f"machine generated model output sample {i % 20}"})
+        rows.append({"id": f"h{i}", "text": f"i went to the market today with friends {i % 20}"})
+        rows.append({"id": f"p{i}", "text": f"machine output lightly revised by a person {i % 20}"})
+    for row, label in zip(rows, ["ai", "human", "post_edited_ai"] * (stop - start), strict=True):
+        row["label"] = label
+    return rows
+
+
+def _run(csv, tmp_path, **kwargs) -> dict:
+    return run_incremental(
+        input_path=str(csv),
+        out_dir=str(tmp_path / "out"),
+        figures_dir=str(tmp_path / "fig"),
+        **kwargs,
+    )
+
+
+def test_tfidf_from_counts_matches_vectorizer():
+    texts = np.array([f"sample text number {i} with words" for i in range(20)], dtype=object)
+    vec = make_char_vectorizer(FeatureConfig()).fit(texts[:15])
+    counts, oov = count_terms(vec, texts)
+    vec.idf_ = _idf(counts[:15])
+    diff = _tfidf(counts, vec) - make_char_vectorizer(FeatureConfig()).fit(texts[:15]).transform(
+        texts
+    )
+    assert abs(diff).max() < 1e-12
+    assert 0.0 <= oov < 1.0
+
+
+def test_appended_rows_update_incrementally(tmp_path):
+    csv = tmp_path / "data.csv"
+    pd.DataFrame(_rows(0, 40)).to_csv(csv, index=False)
+    first = _run(csv, tmp_path)
+    assert first["mode"] == "full"
+    old = load_state(tmp_path / "out" / STATE_DIR)
+    assert old is not None
+
+    pd.DataFrame(_rows(0, 48)).sample(frac=1.0, random_state=0).to_csv(csv, index=False)
+    res = _run(csv, tmp_path, compare_full=True)
+    assert res["mode"] == "incremental" and res["n_new_rows"] == 24
+    rep = res["incremental"]
+    assert rep["full_retrain_reason"] is None
+    assert rep["full_retrain_comparison"]["seconds"] > 0
+    # extrapolated saving, labeled as such; the comparison measures it
+    assert "estimated_seconds_saved" in rep and "seconds_saved" not in rep
+    assert rep["full_retrain_comparison"]["seconds_saved"] == pytest.approx(
+        rep["full_retrain_comparison"]["seconds"] - rep["train_seconds"]
+    )
+
+    # old rows keep their split; new rows are appended to the state
+    new = load_state(tmp_path / "out" / STATE_DIR)
+    assert new is not None
+    assert np.array_equal(new["keys"][: len(old["keys"])], old["keys"])
+    assert np.array_equal(new["split"][: len(old["split"])], old["split"])
+    assert new["counts"]["word"].shape[0] == 144
+    assert new["manifest"]["updates_since_full"] == 1
+
+    metrics = json.loads((tmp_path / "out" / "metrics_overall.json").read_text(encoding="utf-8"))
+    assert metrics["incremental"]["mode"] == "incremental"
+    # the report card is written by the pipeline's own helpers
+    preds = pd.read_csv(tmp_path / "out" / "test_predictions.csv")
+    assert {"pred_label", "confidence", "disagree_word_char"} <= set(preds.columns)
+    assert metrics["primary_model"] == res["primary_model"]
+    out = predict_texts(load_bundle(tmp_path / "out" / "model.joblib"), ["machine output"])
+    assert out[0]["pred_label"] in {"ai", "human", "post_edited_ai"}
+
+    assert _run(csv, tmp_path)["mode"] == "unchanged"
+
+
+def test_unsafe_updates_fall_back_to_full_retrain(tmp_path):
+    csv = tmp_path / "data.csv"
+    base = pd.DataFrame(_rows(0, 40))
+    base.to_csv(csv, index=False)
+    _run(csv, tmp_path)
+
+    edited = base.copy()
+    edited.loc[0, "text"] = "rewritten row"
+    edited.to_csv(csv, index=False)
+    res = _run(csv, tmp_path)
+    assert res["mode"] == "full"
+    assert "edited or removed" in res["incremental"]["full_retrain_reason"]
+
+    # a batch of a single label shifts the training mix past a tight bound
+    extra = pd.DataFrame(
+        [{"id": f"x{i}", "text": f"machine generated text {i}", "label": "ai"} for i in range(30)]
+    )
+    pd.concat([edited, extra]).to_csv(csv, index=False)
+    res = _run(csv, tmp_path, inc_cfg=IncrementalConfig(max_drift=0.01))
+    assert res["mode"] == "full"
+    assert res["incremental"]["full_retrain_reason"].startswith("label shift")
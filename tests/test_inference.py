@@ -2,13 +2,21 @@
 
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 import pytest
 
 pytest.importorskip("sklearn")
 pytest.importorskip("joblib")
 
-from src.inference import load_bundle, predict_texts  # noqa: E402
+from src.inference import (  # noqa: E402
+    LongTextConfig,
+    PredictionCache,
+    load_bundle,
+    predict_texts,
+    window_starts,
+    window_stats,
+)
 from src.pipeline import run  # noqa: E402
 
 
@@ -61,3 +69,111 @@ def test_abstain_rule_is_consistent_with_threshold(bundle_path):
     # confident and agreeing -> must auto-decide
     if r["confidence"] >= thr and not r["disagree"]:
         assert r["abstain"] is False
+
+
+class _CountingModel:
+    def __init__(self, model) -> None:
+        self.model = model
+        self.scored = 0
+
+    def predict_proba(self, texts):
+        self.scored += len(texts)
+        return self.model.predict_proba(texts)
+
+
+def test_cache_matches_uncached_and_dedupes_batch(bundle_path):
+    bundle = load_bundle(bundle_path)
+    texts = ["repeat me", "Repeat  ME", "other text", "repeat me", "other text"]
+    expected = predict_texts(bundle, texts)
+
+    counting = dict(bundle, primary_model=_CountingModel(bundle["primary_model"]))
+    cache = PredictionCache(max_entries=10)
+    got = predict_texts(counting, texts, cache=cache)
+    assert got == expected
+    # "Repeat  ME" normalizes to "repeat me": two unique texts scored once each
+    assert counting["primary_model"].scored == 2
+    assert cache.stats()["misses"] == 2
+    assert cache.stats()["batch_duplicates"] == 3
+
+    assert predict_texts(counting, ["other text"], cache=cache) == expected[2:3]
+    assert counting["primary_model"].scored == 2
+    assert cache.hits == 1
+
+
+def test_cache_evicts_least_recently_used(bundle_path):
+    bundle = load_bundle(bundle_path)
+    cache = PredictionCache(max_entries=2)
+    predict_texts(bundle, ["a text", "b text"], cache=cache)
+    predict_texts(bundle, ["a text"], cache=cache)  # refresh "a"
+    predict_texts(bundle, ["c text"], cache=cache)  # evicts "b"
+    assert len(cache) == 2 and cache.evictions == 1
+    predict_texts(bundle, ["a text", "b text"], cache=cache)
+    assert cache.hits == 2  # "a" twice; "b" had to be rescored
+    assert cache.misses == 4
+    # Entries own their rows rather than viewing the batch's matrix.
+    assert all(proba.base is None for proba, _ in cache._entries.values())
+
+
+def test_loading_a_bundle_invalidates_cache(bundle_path):
+    cache = PredictionCache()
+    first = load_bundle(bundle_path, cache=cache)
+    predict_texts(first, ["some text"], cache=cache)
+    fingerprint = cache.fingerprint
+    second = load_bundle(bundle_path, cache=cache)
+    assert len(cache) == 0 and cache.invalidations == 1
+    assert cache.fingerprint == fingerprint  # same file content, same key space
+    predict_texts(second, ["some text"], cache=cache)
+    assert cache.misses == 2
+
+
+def test_window_starts_cover_or_sample_long_texts():
+    cfg = LongTextConfig(max_chars=100, window_chars=40, overlap_chars=10, max_windows=3)
+    assert window_starts(100, cfg)[0].tolist() == [0]
+    starts, n_full = window_starts(130, cfg)
+    # four windows with stride 30 would cover it; three evenly spaced are kept
+    assert n_full == 4 and starts.tolist() == [0, 60, 90]
+    with pytest.raises(ValueError):
+        LongTextConfig(window_chars=100, overlap_chars=100)
+
+
+def test_long_texts_are_scored_as_windows(bundle_path):
+    bundle = load_bundle(bundle_path)
+    counting = dict(bundle, primary_model=_CountingModel(bundle["primary_model"]))
+    cfg = LongTextConfig(max_chars=200, window_chars=100, overlap_chars=20, max_windows=4)
+    long_text = " ".join(f"i went to the market today with friends {i}" for i in range(40))
+    texts = ["short text", long_text]
+    out = predict_texts(counting, texts, long_text=cfg)
+    # one batch: the short text plus four windows of the long one
+    assert counting["primary_model"].scored == 5
+    assert out[0]["window"] == {"chars": 10, "windows": 1, "chars_scored": 10, "truncated": False}
+    assert out[0]["probs"] == predict_texts(bundle, ["short text"])[0]["probs"]
+    win = out[1]["window"]
+    assert win["windows"] == 4 and win["truncated"] and win["chars_skipped"] > 0
+
+    starts, _ = window_starts(len(long_text), cfg)
+    parts = [long_text[s : s + 100] for s in starts]
+    lengths = np.array([len(p) for p in parts], dtype=float)
+    assert win["chars_scored"] == lengths.sum()
+    expected = bundle["primary_model"].predict_proba(parts).T @ lengths / lengths.sum()
+    assert list(out[1]["probs"].values()) == pytest.approx(expected.tolist())
+
+    stats = window_stats(out)
+    assert stats["texts"] == 2 and stats["windowed"] == 1 and stats["truncated"] == 1
+    assert stats["windows"] == 5 and stats["chars"] == 10 + len(long_text)
+
+
+def test_conformal_bundle_returns_prediction_sets(bundle_path):
+    bundle = load_bundle(bundle_path)
+    texts = ["machine generated model output", "i went to the market", "neutral words"]
+    proba = bundle["primary_model"].predict_proba(texts)
+    for quantile, sizes in ((1.0, {3}), (0.0, {0})):
+        out = predict_texts(dict(bundle, conformal={"alpha": 0.1, "quantile": quantile}), texts)
+        assert {len(r["prediction_set"]) for r in out} == sizes
+        assert all(r["abstain"] for r in out)
+    # a quantile between each row's top two scores leaves exactly the argmax
+    top2 = np.sort(1.0 - proba, axis=1)[:, :2]
+    q = float(top2[:, 0].max())
+    assert q < top2[:, 1].min()
+    out = predict_texts(dict(bundle, conformal={"alpha": 0.1, "quantile": q}), texts)
+    assert [r["prediction_set"] for r in out] == [[r["pred_label"]] for r in out]
+    assert not any(r["abstain"] for r in out)
@@ -0,0 +1,125 @@
+"""Tests for the background pipeline job runner."""
+
+from __future__ import annotations
+
+import json
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("matplotlib")
+
+from src.jobs import (  # noqa: E402
+    FIGURES_SUBDIR,
+    KEEP_VERSIONS,
+    JobRunner,
+    current_version,
+    published_dirs,
+    versions_dir,
+)
+from src.pipeline import PIPELINE_STAGES, run  # noqa: E402
+
+
+def _make_csv(path) -> None:
+    rows = []
+    for i in range(20):
+        rows.append({"text": f"machine generated model output sample {i}", "label": "ai"})
+        rows.append({"text": f"i went to the market today with friends {i}", "label": "human"})
+        rows.append(
+            {"text": f"machine output lightly revised by a person {i}", "label": "post_edited_ai"}
+        )
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+@pytest.fixture
+def runner():
+    r = JobRunner()
+    yield r
+    r.shutdown()
+
+
+def test_run_reports_stages_in_order(tmp_path):
+    csv = tmp_path / "tiny.csv"
+    _make_csv(csv)
+    seen: list[tuple[str, float]] = []
+    run(
+        input_path=str(csv),
+        out_dir=str(tmp_path / "out"),
+        figures_dir=str(tmp_path / "fig"),
+        progress=lambda stage, frac: seen.append((stage, frac)),
+    )
+    assert [s for s, _ in seen] == list(PIPELINE_STAGES)
+    fractions = [f for _, f in seen]
+    assert fractions == sorted(fractions) and fractions[-1] == 1.0
+
+
+def test_duplicate_submission_returns_running_job(tmp_path, runner):
+    csv = tmp_path / "tiny.csv"
+    _make_csv(csv)
+    out, fig = tmp_path / "out", tmp_path / "fig"
+    job = runner.submit(str(csv), out_dir=str(out), figures_dir=str(fig), random_state=0)
+    # Same content under another path is still the same run.
+    copy = tmp_path / "copy.csv"
+    copy.write_bytes(csv.read_bytes())
+    again = runner.submit(str(copy), out_dir=str(out), figures_dir=str(fig), random_state=0)
+    assert again is job
+
+    assert job.wait(timeout=300)
+    assert job.state == "done", job.error
+    assert job.progress == 1.0
+    live_out, live_fig = published_dirs(out, fig)
+    assert live_out == current_version(out) and live_fig == live_out / FIGURES_SUBDIR
+    assert job.result is not None and job.result["model_path"] == str(live_out / "model.joblib")
+    metrics = json.loads((live_out / "metrics_overall.json").read_text(encoding="utf-8"))
+    assert metrics["accuracy"] >= 0
+    assert (live_fig / "reliability_diagram.png").exists()
+    # the pointer names the finished version; no build directory is left
+    assert not list(versions_dir(out).glob("building-*"))
+
+
+def test_cancelled_and_failed_runs_publish_nothing(tmp_path, runner):
+    csv = tmp_path / "tiny.csv"
+    _make_csv(csv)
+    out, fig = tmp_path / "out", tmp_path / "fig"
+    first = runner.submit(str(csv), out_dir=str(out), figures_dir=str(fig), random_state=0)
+    queued = runner.submit(str(csv), out_dir=str(out), figures_dir=str(fig), random_state=1)
+    assert first.cancel() and queued.cancel()
+    assert first.wait(timeout=300) and queued.wait(timeout=300)
+    assert first.state == "cancelled" and queued.state == "cancelled"
+    assert not first.cancel()
+    assert current_version(out) is None
+
+    bad = tmp_path / "bad.csv"
+    bad.write_text("foo,bar\n1,2\n", encoding="utf-8")
+    failed = runner.submit(str(bad), out_dir=str(out), figures_dir=str(fig))
+    assert failed.wait(timeout=300)
+    assert failed.state == "failed" and failed.error
+    assert not list(versions_dir(out).glob("building-*"))
+
+
+def test_publish_keeps_out_dirs_and_drops_old_versions(tmp_path, runner):
+    csv = tmp_path / "tiny.csv"
+    _make_csv(csv)
+    out, fig = tmp_path / "out", tmp_path / "fig"
+    out.mkdir()
+    fig.mkdir()
+    # Committed artifacts in the plain directories are never touched.
+    (out / "metrics_overall.json").write_text('{"accuracy": -1}', encoding="utf-8")
+    (fig / "confusion_matrix.png").write_bytes(b"tracked")
+    for seed in range(3):
+        job = runner.submit(str(csv), out_dir=str(out), figures_dir=str(fig), random_state=seed)
+        assert job.wait(timeout=300) and job.state == "done", job.error
+        if seed == 0:
+            first = current_version(out)
+    assert not out.is_symlink() and not fig.is_symlink()
+    assert (out / "metrics_overall.json").read_text(encoding="utf-8") == '{"accuracy": -1}'
+    assert (fig / "confusion_matrix.png").read_bytes() == b"tracked"
+    live_out, live_fig = published_dirs(out, fig)
+    assert live_out != first and (live_fig / "confusion_matrix.png").exists()
+    kept = sorted(versions_dir(out).glob("v-*"))
+    assert len(kept) == KEEP_VERSIONS and kept[-1] == live_out
+
+    # A CLI run into out_dir after the last publish takes precedence.
+    run(input_path=str(csv), out_dir=str(out), figures_dir=str(fig))
+    assert published_dirs(out, fig) == (out, fig)
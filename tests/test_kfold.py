@@ -0,0 +1,88 @@
+"""Tests for k-fold evaluation with pooled out-of-fold predictions."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("matplotlib")
+
+from src.features import FeatureConfig  # noqa: E402
+from src.kfold import KFoldConfig, cross_val_oof, fold_indices  # noqa: E402
+from src.models import ModelConfig, build_word_model  # noqa: E402
+from src.pipeline import run  # noqa: E402
+
+
+def _rows() -> pd.DataFrame:
+    rows = []
+    for i in range(20):
+        rows.append({"text": f"machine generated model output sample {i}", "label": "ai"})
+        rows.append({"text": f"i went to the market today with friends {i}", "label": "human"})
+        rows.append(
+            {"text": f"machine output lightly revised by a person {i}", "label": "post_edited_ai"}
+        )
+    return pd.DataFrame(rows)
+
+
+def test_grouped_folds_keep_groups_together():
+    y = np.repeat([0, 1], 20)
+    groups = np.arange(40) // 2
+    folds = fold_indices(y, KFoldConfig(n_splits=4), random_state=0, groups=groups)
+    for tr, te in folds:
+        assert not set(groups[tr]) & set(groups[te])
+    assert sorted(np.concatenate([te for _, te in folds]).tolist()) == list(range(40))
+
+
+def test_oof_covers_every_row_and_cache_is_reused(tmp_path):
+    df = _rows()
+    y = df["label"].map({"ai": 0, "human": 1, "post_edited_ai": 2}).to_numpy()
+    cfg = KFoldConfig(n_splits=3, n_jobs=1, cache_dir=str(tmp_path / "cache"))
+    args = (df["text"].to_numpy(), y, 3, FeatureConfig(), ModelConfig(), cfg)
+    first = cross_val_oof(*args, random_state=0)
+    assert first["word_oof"].shape == (len(df), 3)
+    assert np.allclose(first["char_oof"].sum(axis=1), 1.0)
+    assert sorted(set(first["fold"])) == [0, 1, 2]
+    assert any((tmp_path / "cache").rglob("*.pkl"))
+
+    again = cross_val_oof(*args, random_state=0)
+    assert np.array_equal(first["word_oof"], again["word_oof"])
+
+
+def test_oof_scores_come_from_the_served_construction():
+    df = _rows()
+    texts = df["text"].to_numpy()
+    y = df["label"].map({"ai": 0, "human": 1, "post_edited_ai": 2}).to_numpy()
+    cfg = KFoldConfig(n_splits=3, n_jobs=1)
+    fcfg, mcfg = FeatureConfig(), ModelConfig()
+    res = cross_val_oof(texts, y, 3, fcfg, mcfg, cfg, random_state=0)
+    tr, te = fold_indices(y, cfg, random_state=0)[0]
+    served = build_word_model(fcfg, mcfg).fit(texts[tr], y[tr])
+    assert np.allclose(res["word_oof"][te], served.predict_proba(texts[te]))
+
+
+def test_pipeline_kfold_mode(tmp_path):
+    csv = tmp_path / "tiny.csv"
+    _rows().to_csv(csv, index=False)
+    out_dir = tmp_path / "out"
+    run(
+        input_path=str(csv),
+        out_dir=str(out_dir),
+        figures_dir=str(tmp_path / "fig"),
+        eval_mode="kfold",
+        n_folds=3,
+    )
+    metrics = json.loads((out_dir / "metrics_overall.json").read_text(encoding="utf-8"))
+    assert metrics["eval_mode"] == "kfold"
+    assert "oof_macro_f1_word" in metrics
+
+    summary = json.loads((out_dir / "splits_summary.json").read_text(encoding="utf-8"))
+    assert sum(summary["fold_sizes"]) == summary["n_total"] == 60
+
+    preds = pd.read_csv(out_dir / "test_predictions.csv")
+    assert len(preds) == 60
+    assert set(preds["fold"]) == {0, 1, 2}
+    assert (out_dir / "model.joblib").exists()
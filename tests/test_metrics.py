@@ -12,6 +12,7 @@ from src.metrics import (  # noqa: E402
     coverage_curve,
     expected_calibration_error,
     multiclass_brier,
+    rolling_window_metrics,
 )
 
 
@@ -78,3 +79,24 @@ def test_compute_overall_confusion_matrix_is_full_size_when_class_absent():
     assert out["macro_f1"] == pytest.approx(1.0)
     assert out["labels"] == ["ai", "human"]
     assert out["confusion_matrix"] == [[1, 0], [0, 1]]
+
+
+def test_rolling_window_metrics_match_refiltering():
+    rng = np.random.default_rng(0)
+    n = 500
+    times = np.datetime64("2024-01-01") + rng.integers(0, 10_000, n).astype("timedelta64[m]")
+    proba = rng.dirichlet(np.ones(3), n)
+    y_true = rng.integers(0, 3, n)
+    window = np.timedelta64(2000, "m")
+    out = rolling_window_metrics(times, y_true, proba, threshold=0.5, window=window, n_points=7)
+    assert len(out) == 7
+    for row in out.itertuples():
+        keep = (times >= row.window_start.to_datetime64()) & (
+            times <= row.window_end.to_datetime64()
+        )
+        conf, correct = proba[keep].max(axis=1), proba[keep].argmax(axis=1) == y_true[keep]
+        assert row.n == keep.sum()
+        assert row.accuracy == pytest.approx(correct.mean())
+        assert row.coverage == pytest.approx((conf >= 0.5).mean())
+        assert row.covered_accuracy == pytest.approx(correct[conf >= 0.5].mean())
+        assert row.ece == pytest.approx(expected_calibration_error(y_true[keep], proba[keep]))
@@ -51,6 +51,7 @@ def test_pipeline_end_to_end(tmp_path):
         "metrics_overall.json",
         "abstention_policy.json",
         "splits_summary.json",
+        "splits.npz",
         "test_predictions.csv",
         "coverage_curve.csv",
     ):
@@ -74,3 +75,178 @@ def test_pipeline_end_to_end(tmp_path):
     for lab in res["labels"]:
         assert f"p_{lab}" in preds.columns
     assert {"pred_label", "confidence", "disagree_word_char"}.issubset(preds.columns)
+
+    # a second run on the same data reuses the persisted split
+    summary = json.loads((out_dir / "splits_summary.json").read_text(encoding="utf-8"))
+    assert summary["splits_reused"] is False
+    run(input_path=str(csv), out_dir=str(out_dir), figures_dir=str(fig_dir), random_state=0)
+    summary = json.loads((out_dir / "splits_summary.json").read_text(encoding="utf-8"))
+    assert summary["splits_reused"] is True
+    pd.testing.assert_frame_equal(pd.read_csv(out_dir / "test_predictions.csv"), preds)
+
+
+def test_prefit_calibration_reports_comparison(tmp_path):
+    csv = tmp_path / "tiny.csv"
+    _make_csv(csv)
+    out_dir = tmp_path / "outputs"
+    run(
+        input_path=str(csv),
+        out_dir=str(out_dir),
+        figures_dir=str(tmp_path / "figures"),
+        calibration_mode="prefit",
+        calibration_method="temperature",
+        compare_calibration=True,
+    )
+    metrics = json.loads((out_dir / "metrics_overall.json").read_text(encoding="utf-8"))
+    assert metrics["calibration_mode"] == "prefit"
+    cmp = metrics["calibration_comparison"]
+    assert {"cv", "prefit", "prefit_speedup", "prefit_minus_cv_ece"} <= set(cmp)
+    assert cmp["cv"]["calibration_method"] == "sigmoid"
+    assert cmp["prefit"]["train_seconds"] > 0
+
+
+def test_temperature_requires_prefit_mode(tmp_path):
+    csv = tmp_path / "tiny.csv"
+    _make_csv(csv)
+    with pytest.raises(ValueError):
+        run(
+            input_path=str(csv),
+            out_dir=str(tmp_path / "o"),
+            figures_dir=str(tmp_path / "f"),
+            calibration_method="temperature",
+        )
+
+
+def test_temporal_mode_writes_rolling_metrics(tmp_path):
+    csv = tmp_path / "tiny.csv"
+    _make_csv(csv)
+    df = pd.read_csv(csv)
+    # interleaved labels, one row per hour
+    df["generation_date"] = pd.date_range("2024-01-01", periods=len(df), freq="h").astype(str)
+    df.to_csv(csv, index=False)
+    out_dir = tmp_path / "outputs"
+    run(
+        input_path=str(csv),
+        out_dir=str(out_dir),
+        figures_dir=str(tmp_path / "figures"),
+        eval_mode="temporal",
+    )
+    summary = json.loads((out_dir / "splits_summary.json").read_text(encoding="utf-8"))
+    temporal = summary["temporal"]
+    assert temporal["train_range"][1] < temporal["test_range"][0]
+    assert temporal["labels_missing_from_train"] == []
+    metrics = json.loads((out_dir / "metrics_overall.json").read_text(encoding="utf-8"))
+    assert metrics["eval_mode"] == "temporal" and metrics["temporal"]["n_windows"] > 0
+    rolling = pd.read_csv(out_dir / "rolling_metrics.csv")
+    assert {"window_end", "n", "accuracy", "ece", "coverage"} <= set(rolling.columns)
+
+
+def test_temporal_mode_warns_about_labels_missing_from_train(tmp_path):
+    rows = []
+    for i in range(20):
+        rows.append({"text": f"machine generated model output sample {i}", "label": "ai"})
+        rows.append({"text": f"i went to the market today with friends {i}", "label": "human"})
+    for i in range(10):
+        rows.append(
+            {"text": f"machine output lightly revised by a person {i}", "label": "post_edited_ai"}
+        )
+        rows.append(rows[2 * i + i % 2].copy())  # alternating ai / human
+    df = pd.DataFrame(rows)
+    # post_edited_ai only shows up at or after the cutoff (hour 40)
+    df["generation_date"] = pd.date_range("2024-01-01", periods=len(df), freq="h").astype(str)
+    csv = tmp_path / "late_label.csv"
+    df.to_csv(csv, index=False)
+    out_dir = tmp_path / "outputs"
+    with pytest.warns(UserWarning, match="post_edited_ai"):
+        res = run(
+            input_path=str(csv),
+            out_dir=str(out_dir),
+            figures_dir=str(tmp_path / "figures"),
+            eval_mode="temporal",
+            temporal_cutoff="2024-01-02 16:00",
+        )
+    temporal = res["temporal"]
+    assert temporal["labels_missing_from_train"] == ["post_edited_ai"]
+    assert temporal["test_rows_missing_from_train"] == 10
+    assert 0.0 <= temporal["accuracy_on_train_labels"] <= 1.0
+    metrics = json.loads((out_dir / "metrics_overall.json").read_text(encoding="utf-8"))
+    assert metrics["temporal"]["test_rows_missing_from_train"] == 10
+
+    # with only unseen labels after the cutoff, no metric means anything
+    late = df[(df.index < 40) | (df["label"] == "post_edited_ai")].copy()
+    late["generation_date"] = df["generation_date"].iloc[: len(late)].to_numpy()
+    late.to_csv(csv, index=False)
+    with pytest.raises(ValueError, match="every test row"):
+        run(
+            input_path=str(csv),
+            out_dir=str(out_dir),
+            figures_dir=str(tmp_path / "figures"),
+            eval_mode="temporal",
+            temporal_cutoff="2024-01-02 16:00",
+        )
+
+
+def test_temporal_prefit_temperature_drops_val_labels_missing_from_train(tmp_path):
+    rows = []
+    for i in range(20):
+        rows.append({"text": f"machine generated model output sample {i}", "label": "ai"})
+        rows.append({"text": f"i went to the market today with friends {i}", "label": "human"})
+    for i in range(10):
+        rows.append(
+            {"text": f"machine output lightly revised by a person {i}", "label": "post_edited_ai"}
+        )
+        rows.append(rows[2 * i + i % 2].copy())
+    df = pd.DataFrame(rows)
+    df["generation_date"] = pd.date_range("2024-01-01", periods=len(df), freq="h").astype(str)
+    csv = tmp_path / "late_label.csv"
+    df.to_csv(csv, index=False)
+    # val (hours 34-45) holds three post_edited_ai rows; train (hours 0-33) has none
+    out_dir = tmp_path / "outputs"
+    with pytest.warns(UserWarning, match="dropped 3 of 12"):
+        run(
+            input_path=str(csv),
+            out_dir=str(out_dir),
+            figures_dir=str(tmp_path / "figures"),
+            eval_mode="temporal",
+            temporal_cutoff="2024-01-02 22:00",
+            calibration_mode="prefit",
+            calibration_method="temperature",
+        )
+    metrics = json.loads((out_dir / "metrics_overall.json").read_text(encoding="utf-8"))
+    assert metrics["calibration_rows_dropped"] == 3
+
+
+def test_conformal_mode_stores_quantile_and_sets(tmp_path):
+    csv = tmp_path / "tiny.csv"
+    _make_csv(csv)
+    out_dir = tmp_path / "outputs"
+    res = run(
+        input_path=str(csv),
+        out_dir=str(out_dir),
+        figures_dir=str(tmp_path / "figures"),
+        abstention="conformal",
+        conformal_alpha=0.2,
+    )
+    metrics = json.loads((out_dir / "metrics_overall.json").read_text(encoding="utf-8"))
+    conformal = metrics["conformal"]
+    assert conformal["alpha"] == 0.2 and conformal["n_calibration"] > 0
+    assert 0.0 <= conformal["coverage"] <= 1.0 and conformal["mean_set_size"] >= 0.0
+    assert res["policy"]["conformal_quantile"] == conformal["quantile"]
+    preds = pd.read_csv(out_dir / "test_predictions.csv")
+    assert (preds["set_size"] == preds["prediction_set"].fillna("").str.count(r"\|") + 1).all()
+    with pytest.raises(ValueError):
+        run(
+            input_path=str(csv),
+            out_dir=str(tmp_path / "o"),
+            figures_dir=str(tmp_path / "f"),
+            eval_mode="kfold",
+            abstention="conformal",
+        )
+    with pytest.raises(ValueError, match="calibration-mode cv"):
+        run(
+            input_path=str(csv),
+            out_dir=str(tmp_path / "o"),
+            figures_dir=str(tmp_path / "f"),
+            calibration_mode="prefit",
+            abstention="conformal",
+        )
@@ -0,0 +1,88 @@
+"""Tests for the run registry."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("matplotlib")
+
+from src.io_utils import file_digest  # noqa: E402
+from src.jobs import JobRunner  # noqa: E402
+from src.pipeline import run, run_config  # noqa: E402
+from src.registry import RUN_ARTIFACTS, RunRegistry, run_id  # noqa: E402
+
+
+def _make_csv(path) -> None:
+    rows = []
+    for i in range(20):
+        rows.append({"text": f"machine generated model output sample {i}", "label": "ai"})
+        rows.append({"text": f"i went to the market today with friends {i}", "label": "human"})
+        rows.append(
+            {"text": f"machine output lightly revised by a person {i}", "label": "post_edited_ai"}
+        )
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def test_run_id_depends_on_data_and_effective_config():
+    # Explicit defaults and omitted defaults are the same run.
+    assert run_config() == run_config(calibration_method="sigmoid", cache_dir="x")
+    base = run_id("abc", run_config())
+    assert base == run_id("abc", run_config(random_state=42))
+    assert base != run_id("abc", run_config(calibration_method="isotonic"))
+    assert base != run_id("abd", run_config())
+
+
+def test_add_restore_and_curves(tmp_path):
+    csv = tmp_path / "tiny.csv"
+    _make_csv(csv)
+    out, fig = tmp_path / "out", tmp_path / "fig"
+    run(input_path=str(csv), out_dir=str(out), figures_dir=str(fig), random_state=0)
+
+    registry = RunRegistry(tmp_path / "runs")
+    config = run_config(random_state=0)
+    rid = run_id(file_digest(csv), config)
+    entry = registry.add(rid, config, out, fig, file_digest(csv), "tiny.csv")
+    assert registry.entries() == [entry]
+    assert entry["metrics"]["accuracy"] >= 0.0
+
+    curves = registry.curves(rid)
+    assert len(curves["curve_coverage"]) == len(pd.read_csv(out / "coverage_curve.csv"))
+    assert curves["reliability_count"].sum() == len(pd.read_csv(out / "test_predictions.csv"))
+
+    restored = tmp_path / "restored"
+    registry.restore(rid, restored, tmp_path / "restored_fig")
+    expected = [name for name in RUN_ARTIFACTS if (out / name).exists()]
+    assert sorted(p.name for p in restored.iterdir()) == sorted(expected)
+
+
+def test_uploads_are_stored_once_per_content(tmp_path):
+    registry = RunRegistry(tmp_path / "runs")
+    first = registry.store_upload(b"text,label\na,b\n")
+    assert registry.store_upload(b"text,label\na,b\n") == first
+    assert registry.store_upload(b"text,label\nc,d\n") != first
+    assert len(list((tmp_path / "runs" / "uploads").iterdir())) == 2
+
+
+def test_runner_restores_registered_run_without_retraining(tmp_path):
+    csv = tmp_path / "tiny.csv"
+    _make_csv(csv)
+    registry = RunRegistry(tmp_path / "runs")
+    runner = JobRunner(registry=registry)
+    kwargs = {"out_dir": str(tmp_path / "out"), "figures_dir": str(tmp_path / "fig")}
+    try:
+        first = runner.submit(str(csv), **kwargs)
+        assert first.wait(timeout=300) and first.state == "done", first.error
+        assert [e["run_id"] for e in registry.entries()] == [first.run_id]
+
+        (Path(first.result["out_dir"]) / "metrics_overall.json").unlink()
+        second = runner.submit(str(csv), **kwargs)
+        assert second.wait(timeout=300) and second.state == "done", second.error
+        assert second.run_id == first.run_id
+        assert second.result is not None and second.result["restored"] is True
+        assert (Path(second.result["out_dir"]) / "metrics_overall.json").exists()
+    finally:
+        runner.shutdown()
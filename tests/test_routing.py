@@ -0,0 +1,152 @@
+"""Tests for language-routed models."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("matplotlib")
+
+from src import routing as routing_module  # noqa: E402
+from src.explain import explain_texts  # noqa: E402
+from src.export import compact_bundle, compile_bundle, export_compact  # noqa: E402
+from src.inference import load_bundle, normalize_text, predict_texts  # noqa: E402
+from src.pipeline import run  # noqa: E402
+from src.routing import (  # noqa: E402
+    FALLBACK,
+    LanguageRouter,
+    RoutingConfig,
+    routed_languages,
+)
+
+TEMPLATES = {
+    "en": (
+        "machine generated model output sample {i}",
+        "i went to the market today with friends {i}",
+        "machine output lightly revised by a person {i}",
+    ),
+    "es": (
+        "texto generado por el modelo de lenguaje número {i}",
+        "ayer fui al mercado con mis amigos y compré pan {i}",
+        "texto del modelo corregido ligeramente por una persona {i}",
+    ),
+    "fr": (
+        "texte généré par le modèle numéro {i}",
+        "je suis allé au marché avec des amis {i}",
+        "texte du modèle légèrement révisé par quelqu'un {i}",
+    ),
+}
+LABELS = ("ai", "human", "post_edited_ai")
+
+
+def _csv(tmp_path, with_language: bool = True):
+    rows = []
+    for lang, templates in TEMPLATES.items():
+        for i in range(20 if lang != "fr" else 6):
+            for template, label in zip(templates, LABELS, strict=True):
+                row = {"text": template.format(i=i), "label": label}
+                if with_language:
+                    row["language"] = lang
+                rows.append(row)
+    csv = tmp_path / "multi.csv"
+    pd.DataFrame(rows).to_csv(csv, index=False)
+    return csv
+
+
+def _run(tmp_path, csv, **kwargs):
+    return run(
+        input_path=str(csv),
+        out_dir=str(tmp_path / "out"),
+        figures_dir=str(tmp_path / "fig"),
+        random_state=0,
+        **kwargs,
+    )
+
+
+def test_router_routes_on_the_normalized_text():
+    texts = [t.format(i=i) for lang in ("en", "es") for t in TEMPLATES[lang] for i in range(10)]
+    router = LanguageRouter(chars=40).fit(texts, ["en"] * 30 + ["es"] * 30)
+    spanish = TEMPLATES["es"][1].format(i=99)
+    # both share a cache key; raw truncation would leave the first one blank
+    variants = ["\n" * 60 + spanish.upper(), " " + spanish]
+    assert normalize_text(variants[0]) == normalize_text(variants[1])
+    assert list(router.predict(variants)) == ["es", "es"]
+
+
+def test_routed_languages_need_rows_of_every_label():
+    languages = np.array(["en"] * 9 + ["es"] * 9 + ["fr"] * 4)
+    y = np.array([0, 1, 2] * 3 + [0, 0, 0, 0, 1, 1, 1, 1, 2] + [0, 1, 2, 0])
+    assert routed_languages(languages, y, RoutingConfig(min_rows=4)) == ["en"]
+    assert routed_languages(languages, y, RoutingConfig(min_rows=10)) == []
+
+
+@pytest.mark.parametrize("mode", ["cv", "prefit"])
+def test_routed_bundle_scores_each_language_with_its_model(tmp_path, mode, monkeypatch):
+    # latency is timed on a bounded sample of the test texts
+    monkeypatch.setattr(routing_module, "LATENCY_SAMPLE", 5)
+    res = _run(
+        tmp_path,
+        _csv(tmp_path),
+        route_languages=True,
+        route_min_rows=30,
+        calibration_mode=mode,
+    )
+    routing = json.loads((tmp_path / "out" / "metrics_overall.json").read_text())[
+        "language_routing"
+    ]
+    assert routing["languages"] == ["en", "es"]
+    assert routing["fallback_languages"] == ["fr"]
+    # ~9 val rows per language cannot calibrate a 30-row language on their own
+    assert routing["val_fallback_languages"] == ([] if mode == "cv" else ["en", "es"])
+    assert set(routing["per_language"]) == {"en", "es", "fr"}
+    assert routing["latency_ms_per_text"]["routed"] > 0
+    assert routing["latency_sample_size"] == 5
+    preds = pd.read_csv(tmp_path / "out" / "test_predictions.csv")
+    assert set(preds["route"]) <= {"en", "es", FALLBACK}
+
+    bundle = load_bundle(res["model_path"])
+    model = bundle["primary_model"]
+    texts = [TEMPLATES[lang][1].format(i=99) for lang in ("es", "fr", "en")] + [""]
+    routes = model.routes(texts)
+    assert routes[0] == "es" and routes[2] == "en"
+    proba = model.predict_proba(texts)
+    np.testing.assert_allclose(proba.sum(axis=1), 1.0)
+    np.testing.assert_allclose(
+        proba[0], model.models["es"].predict_proba(np.array(texts[:1], dtype=object))[0]
+    )
+
+    results = predict_texts(bundle, texts)
+    assert [r["pred_label"] for r in results] == [bundle["labels"][i] for i in proba.argmax(1)]
+    explained = explain_texts(bundle, texts[:3], top_k=3)
+    assert all(set(e["word"]) == set(bundle["labels"]) for e in explained)
+    assert explained[0]["word"][results[0]["pred_label"]]
+
+
+def test_routing_requires_language_column_and_val_split(tmp_path):
+    with pytest.raises(ValueError, match="language"):
+        _run(tmp_path, _csv(tmp_path, with_language=False), route_languages=True)
+    with pytest.raises(ValueError, match="val split"):
+        _run(tmp_path, _csv(tmp_path), route_languages=True, eval_mode="kfold")
+
+
+def test_routed_bundle_compacts_per_route_and_refuses_to_compile(tmp_path):
+    res = _run(tmp_path, _csv(tmp_path), route_languages=True, route_min_rows=30)
+    bundle = load_bundle(res["model_path"])
+    texts = [t.format(i=99) for lang in TEMPLATES for t in TEMPLATES[lang]]
+
+    compact, stats = compact_bundle(bundle, tol=0.0)
+    for key in ("primary_model", "other_model"):
+        assert set(stats[key]["routes"]) == {"en", "es", FALLBACK}
+        assert list(compact[key].routes(texts)) == list(bundle[key].routes(texts))
+        np.testing.assert_allclose(
+            compact[key].predict_proba(texts), bundle[key].predict_proba(texts), atol=1e-5
+        )
+    report = export_compact(res["model_path"], tmp_path / "compact.joblib", texts)
+    assert report["within_bounds"]
+
+    with pytest.raises(ValueError, match="cannot be compiled"):
+        compile_bundle(bundle)
@@ -0,0 +1,100 @@
+"""Parity tests for the dependency-light compiled scorer."""
+
+from __future__ import annotations
+
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("matplotlib")
+
+from sklearn.feature_extraction.text import TfidfVectorizer  # noqa: E402
+
+from src.export import export_scorer  # noqa: E402
+from src.inference import load_bundle, predict_texts  # noqa: E402
+from src.pipeline import run  # noqa: E402
+from src.scorer import char_ngrams, load_scorer, word_ngrams  # noqa: E402
+
+TEXTS = [
+    "machine generated model output sample 7",
+    "i went to the market today with friends",
+    "Machine OUTPUT lightly   revised\n\tby a person",
+    "",
+    "   ",
+    "x",
+    "ÉCOLE Straße naïve café 123",
+]
+
+
+def _make_csv(path) -> None:
+    rows = []
+    for i in range(20):
+        rows.append({"text": f"machine generated model output sample {i}", "label": "ai"})
+        rows.append({"text": f"i went to the market today with friends {i}", "label": "human"})
+        rows.append(
+            {"text": f"machine output lightly revised by a person {i}", "label": "post_edited_ai"}
+        )
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+@pytest.mark.parametrize("text", TEXTS + ["a b c d", "one  two\n\nthree"])
+def test_analyzers_match_sklearn(text):
+    word = TfidfVectorizer(ngram_range=(1, 2)).build_analyzer()
+    char = TfidfVectorizer(analyzer="char", ngram_range=(3, 5)).build_analyzer()
+    pattern = re.compile(r"(?u)\b\w\w+\b")
+    assert sorted(word_ngrams(text.lower(), pattern, (1, 2))) == sorted(word(text))
+    assert sorted(char_ngrams(text.lower(), (3, 5))) == sorted(char(text))
+
+
+@pytest.mark.parametrize(
+    "mode,method", [("cv", "sigmoid"), ("prefit", "isotonic"), ("prefit", "temperature")]
+)
+def test_compiled_scorer_matches_predict_texts(tmp_path, mode, method):
+    csv = tmp_path / "tiny.csv"
+    _make_csv(csv)
+    res = run(
+        input_path=str(csv),
+        out_dir=str(tmp_path / "out"),
+        figures_dir=str(tmp_path / "fig"),
+        random_state=0,
+        calibration_method=method,
+        calibration_mode=mode,
+    )
+    export_scorer(res["model_path"], tmp_path / "scorer")
+    scorer = load_scorer(tmp_path / "scorer")
+    expected = predict_texts(load_bundle(res["model_path"]), TEXTS)
+    got = predict_texts(scorer, TEXTS)
+    for e, g in zip(expected, got, strict=True):
+        assert g["pred_label"] == e["pred_label"]
+        assert g["disagree"] == e["disagree"]
+        assert g["abstain"] == e["abstain"]
+        assert g["confidence"] == pytest.approx(e["confidence"], abs=1e-9)
+        for label, p in e["probs"].items():
+            assert g["probs"][label] == pytest.approx(p, abs=1e-9)
+
+
+def test_scorer_keeps_conformal_quantile(tmp_path):
+    csv = tmp_path / "tiny.csv"
+    _make_csv(csv)
+    res = run(
+        input_path=str(csv),
+        out_dir=str(tmp_path / "out"),
+        figures_dir=str(tmp_path / "fig"),
+        abstention="conformal",
+    )
+    export_scorer(res["model_path"], tmp_path / "scorer")
+    bundle, scorer = load_bundle(res["model_path"]), load_scorer(tmp_path / "scorer")
+    assert scorer["conformal"] == bundle["conformal"]
+    expected = predict_texts(bundle, TEXTS)
+    got = predict_texts(scorer, TEXTS)
+    assert [g["prediction_set"] for g in got] == [e["prediction_set"] for e in expected]
+
+
+def test_scorer_does_not_import_sklearn():
+    code = "import sys, src.scorer; assert 'sklearn' not in sys.modules"
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).parents[1])
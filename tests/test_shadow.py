@@ -0,0 +1,123 @@
+"""Tests for shadow-bundle evaluation."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("matplotlib")
+
+from src.export import compile_bundle  # noqa: E402
+from src.inference import load_bundle, predict_texts  # noqa: E402
+from src.pipeline import run  # noqa: E402
+from src.shadow import (  # noqa: E402
+    PromotionCriteria,
+    ShadowScorer,
+    ShadowStats,
+    promotion_report,
+    traffic_columns,
+)
+
+TEXTS = [
+    "machine generated model output sample 3",
+    "i went to the market today",
+    "machine output lightly revised by a person 7",
+    "",
+]
+
+
+def _bundle(tmp_path, name: str, **kwargs) -> dict:
+    rows = []
+    for i in range(20):
+        rows.append({"text": f"machine generated model output sample {i}", "label": "ai"})
+        rows.append({"text": f"i went to the market today with friends {i}", "label": "human"})
+        rows.append(
+            {"text": f"machine output lightly revised by a person {i}", "label": "post_edited_ai"}
+        )
+    csv = tmp_path / "tiny.csv"
+    pd.DataFrame(rows).to_csv(csv, index=False)
+    res = run(
+        input_path=str(csv),
+        out_dir=str(tmp_path / name),
+        figures_dir=str(tmp_path / f"{name}_fig"),
+        **kwargs,
+    )
+    return load_bundle(res["model_path"])
+
+
+def _result(label: str, abstain: bool, confidence: float) -> dict:
+    return {"pred_label": label, "abstain": abstain, "confidence": confidence}
+
+
+def test_shared_featurization_matches_predict_texts(tmp_path):
+    live = _bundle(tmp_path, "live", random_state=0)
+    shadow = _bundle(tmp_path, "shadow", random_state=1, calibration_mode="prefit")
+    scorer = ShadowScorer(live, shadow)
+    info = scorer.featurization()
+    assert info["groups"] == 2
+    assert len(info["shared_models"]) == 4
+
+    results = scorer.score(TEXTS)
+    ref = predict_texts(live, TEXTS)
+    for got, want in zip(results, ref, strict=True):
+        assert got["pred_label"] == want["pred_label"]
+        assert got["abstain"] == want["abstain"]
+        np.testing.assert_allclose(
+            [got["probs"][k] for k in want["probs"]], list(want["probs"].values()), atol=1e-9
+        )
+    # the shadow side matches scoring the candidate on its own
+    shadow_conf = np.mean([r["confidence"] for r in predict_texts(shadow, TEXTS)])
+    live_conf = np.mean([r["confidence"] for r in ref])
+    report = scorer.report()
+    assert report["n"] == len(TEXTS)
+    assert report["confidence_shift"]["mean"] == pytest.approx(shadow_conf - live_conf, abs=1e-9)
+    assert report["recommendation"] == "insufficient_data"
+
+
+def test_unshared_models_fall_back_to_their_own_scoring(tmp_path):
+    live = _bundle(tmp_path, "live", random_state=0)
+    compiled = compile_bundle(live)
+    scorer = ShadowScorer(live, compiled)
+    assert scorer.featurization()["shared_models"] == ["live.other_model", "live.primary_model"]
+    scorer.score(TEXTS)
+    report = scorer.report(PromotionCriteria(min_samples=1))
+    assert report["agreement_rate"] == 1.0
+    assert report["confidence_shift"]["mean_abs"] < 1e-9
+    assert report["recommendation"] == "promote"
+
+
+def test_stats_counters_and_promotion_checks():
+    stats = ShadowStats()
+    live = [_result("ai", False, 0.9), _result("human", True, 0.5), _result("ai", False, 0.8)]
+    shadow = [_result("ai", False, 0.7), _result("human", False, 0.8), _result("human", True, 0.4)]
+    stats.update(live[:2], shadow[:2], ["ai", "human"])
+    other = ShadowStats()
+    other.update(live[2:], shadow[2:], ["human"])
+    stats.merge(other)
+
+    summary = stats.summary()
+    assert summary["n"] == 3 and summary["batches"] == 2
+    assert summary["agreement_rate"] == pytest.approx(2 / 3)
+    assert summary["auto_agreement_rate"] == 1.0
+    assert summary["abstain_rate_delta"] == 0.0
+    assert summary["auto_to_abstain_rate"] == pytest.approx(1 / 3)
+    assert summary["abstain_to_auto_rate"] == pytest.approx(1 / 3)
+    assert summary["confidence_shift"]["mean"] == pytest.approx((-0.2 + 0.3 - 0.4) / 3)
+    assert summary["label_transitions"] == {"ai -> human": 1}
+    assert summary["accuracy"] == {"labeled": 3, "live": 2 / 3, "shadow": 1.0}
+
+    criteria = PromotionCriteria(min_samples=3, min_agreement=0.6)
+    report = promotion_report(stats, criteria)
+    assert not report["checks"]["mean_confidence_shift"]["passed"]
+    assert report["recommendation"] == "hold"
+
+
+def test_traffic_columns_accept_unlabeled_text_under_any_name():
+    labeled = pd.DataFrame({"content": ["a long text", "b long text"], "target": ["ai", "human"]})
+    assert traffic_columns(labeled) == ("content", "target")
+    unlabeled = pd.DataFrame({"id": [1, 2], "message": ["a long text", "b long text"]})
+    assert traffic_columns(unlabeled) == ("message", None)
+    with pytest.raises(ValueError, match="No obvious text column"):
+        traffic_columns(unlabeled[["id"]])
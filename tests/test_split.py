@@ -2,12 +2,20 @@
 
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 import pytest
 
 pytest.importorskip("sklearn")
 
-from src.split import SplitConfig, make_splits  # noqa: E402
+from src.split import (  # noqa: E402
+    SplitConfig,
+    cached_split_indices,
+    hash_split,
+    make_splits,
+    split_indices,
+    temporal_split_indices,
+)
 
 
 def _frame(n: int = 100) -> pd.DataFrame:
@@ -44,3 +52,68 @@ def test_different_seed_changes_split():
     s1 = make_splits(df, SplitConfig(random_state=1))
     s2 = make_splits(df, SplitConfig(random_state=2))
     assert s1["test"]["text"].tolist() != s2["test"]["text"].tolist()
+
+
+def test_hash_split_is_stable_and_row_local():
+    df = _frame(100)
+    full = hash_split(df["text"], SplitConfig())
+    # scoring rows in pieces gives the same assignment as scoring them together
+    parts = [hash_split(df["text"].iloc[i : i + 7], SplitConfig()) for i in range(0, 100, 7)]
+    assert full.tolist() == [s for p in parts for s in p.tolist()]
+    assert set(full) <= {"train", "val", "test"}
+    assert hash_split(df["text"], SplitConfig(random_state=1)).tolist() != full.tolist()
+
+
+def test_groups_never_straddle_splits():
+    df = _frame(100)
+    groups = np.arange(100) // 4  # 25 groups of 4 rows
+    s = make_splits(df.assign(g=groups), SplitConfig(), groups=groups)
+    seen = [set(s[part]["g"]) for part in ("train", "val", "test")]
+    assert not (seen[0] & seen[1] or seen[0] & seen[2] or seen[1] & seen[2])
+    assert sum(len(s[part]) for part in ("train", "val", "test")) == 100
+
+
+def test_split_indices_match_frame_splits():
+    df = _frame(100)
+    groups = np.arange(100) // 4
+    for g in (None, groups):
+        idx = split_indices(df, SplitConfig(), groups=g)
+        frames = make_splits(df, SplitConfig(), groups=g)
+        for part in ("train", "val", "test"):
+            assert df["text"].to_numpy()[idx[part]].tolist() == frames[part]["text"].tolist()
+        assert sorted(np.concatenate(list(idx.values())).tolist()) == list(range(100))
+
+
+def test_cached_split_is_reused_until_data_or_settings_change(tmp_path):
+    df = _frame(100)
+    path = tmp_path / "splits.npz"
+    idx, reused = cached_split_indices(df, SplitConfig(), path)
+    assert not reused and path.exists()
+    again, reused = cached_split_indices(df, SplitConfig(), path)
+    assert reused
+    assert all(np.array_equal(idx[p], again[p]) for p in idx)
+
+    edited = df.assign(text=df["text"].where(df.index != 5, "changed"))
+    assert not cached_split_indices(edited, SplitConfig(), path)[1]
+    assert not cached_split_indices(edited, SplitConfig(random_state=7), path)[1]
+    assert not cached_split_indices(edited, SplitConfig(random_state=7), path, np.arange(100))[1]
+
+
+def test_temporal_split_trains_on_the_past():
+    df = _frame(100)
+    # Shuffled days, with one unparseable timestamp that belongs to no split.
+    days = np.random.default_rng(0).permutation(100)
+    df["generation_date"] = pd.Timestamp("2024-01-01") + pd.to_timedelta(days, unit="D")
+    df["generation_date"] = df["generation_date"].astype(str)
+    df.loc[5, "generation_date"] = "not a date"
+    idx = temporal_split_indices(df, SplitConfig(test_size=0.2, val_size=0.2))
+    times = pd.to_datetime(df["generation_date"], errors="coerce")
+    assert times[idx["train"]].max() < times[idx["val"]].min()
+    assert times[idx["val"]].max() < times[idx["test"]].min()
+    assert sum(len(v) for v in idx.values()) == 99 and 5 not in np.concatenate(list(idx.values()))
+    assert len(idx["test"]) == 20 and len(idx["val"]) == 20
+
+    cut = temporal_split_indices(df, SplitConfig(), cutoff="2024-03-01")
+    assert times[cut["test"]].min() == pd.Timestamp("2024-03-01")
+    with pytest.raises(ValueError):
+        temporal_split_indices(df, SplitConfig(), cutoff="2023-01-01")
@@ -0,0 +1,102 @@
+"""Tests for out-of-core training (chunked hashing + partial_fit)."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("matplotlib")
+
+from src.inference import load_bundle, predict_texts  # noqa: E402
+from src.streaming import StreamConfig, run_streaming  # noqa: E402
+
+
+def _make_csv(path) -> None:
+    rows = []
+    for i in range(30):
+        rows.append({"text": f"machine generated model output sample {i}", "label": "ai"})
+        rows.append({"text": f"i went to the market today with friends {i}", "label": "human"})
+        rows.append(
+            {"text": f"machine output lightly revised by a person {i}", "label": "post_edited_ai"}
+        )
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+
+def test_streaming_writes_same_report_card(tmp_path):
+    csv = tmp_path / "tiny.csv"
+    _make_csv(csv)
+    out_dir = tmp_path / "out"
+    res = run_streaming(
+        input_path=str(csv),
+        out_dir=str(out_dir),
+        figures_dir=str(tmp_path / "fig"),
+        stream_cfg=StreamConfig(chunksize=7, epochs=3),
+    )
+    for name in (
+        "metrics_overall.json",
+        "abstention_policy.json",
+        "splits_summary.json",
+        "test_predictions.csv",
+        "coverage_curve.csv",
+        "model.joblib",
+    ):
+        assert (out_dir / name).exists(), name
+
+    summary = json.loads((out_dir / "splits_summary.json").read_text(encoding="utf-8"))
+    assert summary["n_train"] + summary["n_val"] + summary["n_test"] == summary["n_total"] == 90
+
+    preds = pd.read_csv(out_dir / "test_predictions.csv")
+    assert len(preds) == summary["n_test"]
+    assert {"pred_label", "confidence", "disagree_word_char"}.issubset(preds.columns)
+
+    bundle = load_bundle(res["model_path"])
+    out = predict_texts(bundle, ["machine generated model output sample 99"])
+    assert out[0]["pred_label"] in res["labels"]
+    assert pytest.approx(sum(out[0]["probs"].values()), abs=1e-6) == 1.0
+
+
+def test_split_assignment_does_not_depend_on_chunksize(tmp_path):
+    csv = tmp_path / "tiny.csv"
+    _make_csv(csv)
+    texts = []
+    for chunksize in (5, 1000):
+        out_dir = tmp_path / f"out_{chunksize}"
+        run_streaming(
+            input_path=str(csv),
+            out_dir=str(out_dir),
+            figures_dir=str(tmp_path / "fig"),
+            stream_cfg=StreamConfig(chunksize=chunksize, epochs=1),
+        )
+        texts.append(pd.read_csv(out_dir / "test_predictions.csv")["text"].tolist())
+    assert texts[0] == texts[1]
+
+
+def test_group_dedup_spills_signatures_and_cleans_up(tmp_path):
+    # Distinct texts (the shared templates above are one cluster each), and
+    # every tenth row repeated.
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(400)]
+    rows = [
+        {"text": " ".join(rng.choice(words, 15)), "label": ("ai", "human")[i % 2]}
+        for i in range(80)
+    ]
+    rows += rows[::10]
+    csv = tmp_path / "varied.csv"
+    pd.DataFrame(rows).to_csv(csv, index=False)
+    out_dir = tmp_path / "out"
+    run_streaming(
+        input_path=str(csv),
+        out_dir=str(out_dir),
+        figures_dir=str(tmp_path / "fig"),
+        stream_cfg=StreamConfig(chunksize=7, epochs=1),
+        dedup="group",
+    )
+    summary = json.loads((out_dir / "splits_summary.json").read_text(encoding="utf-8"))
+    assert summary["near_duplicates"]["n_rows"] == 88
+    assert summary["near_duplicates"]["n_duplicate_rows"] == 8
+    assert summary["near_duplicates"]["clusters_spanning_splits"] == 0
+    assert not list(out_dir.glob("dedup-*"))
@@ -0,0 +1,146 @@
+"""Tests for the server-side review queue."""
+
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.triage import KEEP_VERSIONS, TriageFilter, TriageQueue, build_store
+
+THRESHOLD = 0.6
+
+
+def _make_preds(path, n: int = 200) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    labels = np.array(["ai", "human", "post_edited_ai"])
+    proba = rng.dirichlet([1.0, 1.0, 1.0], n)
+    df = pd.DataFrame(
+        {
+            "text": [
+                f"Row {i} says {'Error: 400' if i % 7 == 0 else 'hello'} ünïcode" for i in range(n)
+            ],
+            "label": labels[rng.integers(0, 3, n)],
+            "fold": rng.integers(0, 4, n),
+            "p_ai": proba[:, 0],
+            "p_human": proba[:, 1],
+            "p_post_edited_ai": proba[:, 2],
+        }
+    )
+    df["pred_label"] = labels[proba.argmax(axis=1)]
+    df["confidence"] = proba.max(axis=1)
+    df["disagree_word_char"] = rng.integers(0, 2, n)
+    df.to_csv(path, index=False)
+    return df
+
+
+def _expected(df: pd.DataFrame, keep: pd.Series) -> list[int]:
+    return df[keep].sort_values("confidence", kind="stable").index.tolist()
+
+
+def test_pages_follow_confidence_order(tmp_path):
+    df = _make_preds(tmp_path / "preds.csv")
+    queue = TriageQueue(tmp_path / "preds.csv")
+    first, total = queue.page(TriageFilter(), THRESHOLD, page=0, page_size=30)
+    second, _ = queue.page(TriageFilter(), THRESHOLD, page=1, page_size=30)
+    assert total == len(df)
+    expected = _expected(df, df["confidence"] > -1)
+    assert first["row"].tolist() + second["row"].tolist() == expected[:60]
+    assert first["text"].tolist() == df.loc[expected[:30], "text"].tolist()
+
+    desc, _ = queue.page(TriageFilter(least_confident_first=False), THRESHOLD, page=0, page_size=5)
+    assert desc["confidence"].is_monotonic_decreasing
+
+
+def test_filters_match_pandas(tmp_path):
+    df = _make_preds(tmp_path / "preds.csv")
+    queue = TriageQueue(tmp_path / "preds.csv")
+    disagree = df["disagree_word_char"].astype(bool)
+    abstain = (df["confidence"] < THRESHOLD) | (disagree & (df["confidence"] < THRESHOLD + 0.05))
+
+    flt = TriageFilter(
+        abstain=True, labels=("ai", "human"), slice_column="fold", slice_values=("1", "2")
+    )
+    rows, total = queue.page(flt, THRESHOLD, page_size=1000)
+    keep = abstain & df["label"].isin(["ai", "human"]) & df["fold"].isin([1, 2])
+    assert rows["row"].tolist() == _expected(df, keep)
+    assert total == int(keep.sum())
+    assert rows["abstain"].all()
+
+    rows, _ = queue.page(
+        TriageFilter(disagree=False, search="error: 400"), THRESHOLD, page_size=1000
+    )
+    keep = ~disagree & df["text"].str.lower().str.contains("error: 400", regex=False)
+    assert rows["row"].tolist() == _expected(df, keep)
+    assert "fold" in queue.slice_columns()
+
+
+def test_store_is_rebuilt_when_csv_changes(tmp_path):
+    path = tmp_path / "preds.csv"
+    _make_preds(path, n=50)
+    assert TriageQueue(path).n_rows == 50
+    _make_preds(path, n=80)
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert TriageQueue(path).n_rows == 80
+
+
+def test_rebuild_swaps_pointer_and_keeps_open_stores_readable(tmp_path):
+    path = tmp_path / "preds.csv"
+    _make_preds(path, n=50)
+    old = TriageQueue(path)
+    for i, n in enumerate((60, 70, 80)):
+        _make_preds(path, n=n)
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + (i + 1) * 1_000_000))
+        if i == 0:
+            # a session opened on the previous version keeps paging it
+            assert old.page(TriageFilter(), THRESHOLD, page_size=100)[1] == 50
+        queue = TriageQueue(path)
+    assert queue.n_rows == 80
+    assert len(list(queue.root.glob("v-*"))) == KEEP_VERSIONS
+    assert (queue.root / "CURRENT").read_text() == queue.store.name
+
+
+def test_column_kind_fixed_across_chunks(tmp_path):
+    df = pd.DataFrame(
+        {
+            "text": [f"t{i}" for i in range(10)],
+            "confidence": np.linspace(0.1, 1.0, 10),
+            "prediction_set": [None] * 5 + ["ai", "ai|human", "human", "ai", ""],
+            "score": ["1", "2", "x", "4", "5", 6, 7, 8, 9, 10],
+        }
+    )
+    df.to_csv(tmp_path / "preds.csv", index=False)
+    store = build_store(tmp_path / "preds.csv", tmp_path / "store", chunksize=5)
+    queue = TriageQueue(tmp_path / "preds.csv", tmp_path / "q")
+    page, total = queue.page(TriageFilter(), THRESHOLD, page_size=10)
+    assert total == 10 and page["row"].tolist() == list(range(10))
+    assert page["prediction_set"].tolist() == [
+        "",
+        "",
+        "",
+        "",
+        "",
+        "ai",
+        "ai|human",
+        "human",
+        "ai",
+        "",
+    ]
+    assert "prediction_set" in queue.meta["categories"]
+    assert "prediction_set" not in queue.meta["numeric"]
+    assert len(np.load(store / "cat_prediction_set.npy")) == 10
+    assert len(np.load(store / "cat_score.npy")) == 10
+    assert not (store / "num_prediction_set.npy").exists()
+
+
+def test_conformal_set_size_drives_abstain(tmp_path):
+    df = _make_preds(tmp_path / "preds.csv")
+    df["set_size"] = np.random.default_rng(1).integers(0, 4, len(df))
+    df.to_csv(tmp_path / "preds.csv", index=False)
+    queue = TriageQueue(tmp_path / "preds.csv")
+    page, total = queue.page(TriageFilter(abstain=True), THRESHOLD, page_size=len(df))
+    assert total == int((df["set_size"] != 1).sum())
+    assert page["abstain"].all() and (page["set_size"] != 1).all()